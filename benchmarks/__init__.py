@@ -0,0 +1,7 @@
+"""
+Reproducible benchmarks for matching, inserts and export.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --out bench.json
+
+Everything runs against a temporary idioms.db; see benchmarks/run.py.
+"""
@@ -0,0 +1,112 @@
+import random
+from typing import Dict, Iterator, List, Tuple
+
+
+# ---------------------------------------------------------
+#  VOCABULARY
+# ---------------------------------------------------------
+
+EN_WORDS = (
+    "break ice kick bucket spill beans piece cake under weather cost arm leg "
+    "hit nail head bite bullet call day cut corners get out hand hang there "
+    "miss boat pull leg sell short back square one beat around bush burn "
+    "midnight oil cry over milk devil advocate eat words fit fiddle go extra "
+    "mile hear grapevine jump gun keep chin up let cat bag once blue moon "
+    "play ear rain cats dogs see eye to eye sit fence take rain check "
+    "time flies when having fun wild goose chase your guess good mine"
+).split()
+
+EN_GLUE = ("the", "a", "of", "on", "in", "to", "with", "at", "by")
+
+HE_WORDS = (
+    "שבר את הקרח בעט בדלי שפך שעועית חתיכת עוגה מזג אוויר עלה יד רגל "
+    "פגע בול בראש נשך כדור קרא לזה יום חתך פינות יצא משליטה תלוי שם "
+    "פספס רכבת משך רגל מכר בזול חזר לנקודה התחלה הלך סביב שיח שרף "
+    "שמן חצות בכה חלב שפוך פרקליט שטן אכל מילים בריא כשור הלך מייל "
+    "שמע מהשמועות קפץ אקדח שמר סנטר הרים חתול שק פעם בירח כחול "
+    "ניגן שמיעה גשם חתולים כלבים ראה עין בעין ישב גדר לקח גשם בדיקה"
+).split()
+
+# Hebrew points (niqqud) sprinkled on some words
+NIQQUD = ("\u05b0", "\u05b4", "\u05b5", "\u05b6", "\u05b7", "\u05b8", "\u05b9", "\u05bc")
+
+# Bidi marks users paste along with Hebrew text
+RTL_MARKS = ("\u200f", "\u200e")
+
+
+# ---------------------------------------------------------
+#  GENERATOR
+# ---------------------------------------------------------
+
+class CorpusGenerator:
+    """
+    Deterministic synthetic EN/HE idiom corpus.
+    The same seed always yields the same rows and queries.
+    """
+
+    def __init__(self, seed: int = 1):
+        self.rng = random.Random(seed)
+
+    def _en(self) -> str:
+        words = self.rng.sample(EN_WORDS, self.rng.randint(2, 5))
+        if self.rng.random() < 0.6:
+            words.insert(self.rng.randint(0, len(words)), self.rng.choice(EN_GLUE))
+        return " ".join(words)
+
+    def _point(self, word: str) -> str:
+        return "".join(
+            ch + self.rng.choice(NIQQUD) if self.rng.random() < 0.4 else ch
+            for ch in word
+        )
+
+    def _he(self) -> str:
+        words = self.rng.sample(HE_WORDS, self.rng.randint(2, 5))
+        if self.rng.random() < 0.15:
+            i = self.rng.randrange(len(words))
+            words[i] = self._point(words[i])
+        text = " ".join(words)
+        if self.rng.random() < 0.2:
+            mark = self.rng.choice(RTL_MARKS)
+            text = mark + text if self.rng.random() < 0.5 else text + mark
+        return text
+
+    def row(self, user: str) -> Dict:
+        return {
+            "created_by": user,
+            "idiom_en": self._en(),
+            "idiom_he": self._he(),
+            "translation_en": self._en(),
+            "translation_he": self._he(),
+            "half_en": self._en() if self.rng.random() < 0.3 else "",
+            "half_he": self._he() if self.rng.random() < 0.3 else "",
+            "off_en": "",
+            "off_he": "",
+        }
+
+    def rows(self, n: int, users: int = 5) -> Iterator[Dict]:
+        names = [f"user{i}" for i in range(users)]
+        for _ in range(n):
+            yield self.row(self.rng.choice(names))
+
+    def _perturb(self, text: str) -> str:
+        """Near-duplicate: drop, swap or duplicate one character."""
+        if len(text) < 4:
+            return text
+        i = self.rng.randrange(1, len(text) - 1)
+        op = self.rng.random()
+        if op < 0.33:
+            return text[:i] + text[i + 1:]
+        if op < 0.66:
+            return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+        return text[:i] + text[i] + text[i:]
+
+    def queries(self, existing: List[Dict], n: int) -> List[Tuple[str, str]]:
+        """Half near-duplicates of existing rows, half fresh idioms."""
+        out = []
+        for i in range(n):
+            if existing and i % 2 == 0:
+                src = self.rng.choice(existing)
+                out.append((self._perturb(src["idiom_en"]), self._perturb(src["idiom_he"])))
+            else:
+                out.append((self._en(), self._he()))
+        return out
@@ -0,0 +1,193 @@
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Run from the repo root: python -m benchmarks.run
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import settings
+import similarity
+import export_csv
+from benchmarks.corpus import CorpusGenerator
+
+
+SCENARIOS = (
+    "bulk_insert",
+    "get_all_idioms",
+    "load_corpus",
+    "match_full_scan",
+    "match_candidates",
+    "add_idiom",
+    "export_csv",
+)
+
+
+# ---------------------------------------------------------
+#  TIMING
+# ---------------------------------------------------------
+def _time(fn: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _result(scenario: str, rows: int, samples: List[float], ops: int = 1) -> Dict:
+    """Seconds per run; `ops` operations per run give the per-op figure."""
+    median = statistics.median(samples)
+    return {
+        "scenario": scenario,
+        "rows": rows,
+        "repeat": len(samples),
+        "ops_per_run": ops,
+        "min_s": min(samples),
+        "median_s": median,
+        "mean_s": statistics.fmean(samples),
+        "max_s": max(samples),
+        "median_per_op_s": median / ops,
+    }
+
+
+# ---------------------------------------------------------
+#  SCENARIOS (one corpus size)
+# ---------------------------------------------------------
+def run_size(size: int, scenarios, repeat: int, queries: int, seed: int) -> List[Dict]:
+    results = []
+    gen = CorpusGenerator(seed)
+
+    with tempfile.TemporaryDirectory(prefix="idioms-bench-") as tmp:
+        db.set_db_path(tmp)
+        db.init_db()
+
+        # export_csv reads the DB folder from settings.json
+        settings.SETTINGS_FILE = Path(tmp) / "settings.json"
+        settings.set_db_dir(tmp)
+
+        rows = list(gen.rows(size))
+        start = time.perf_counter()
+        for i in range(0, len(rows), 5000):
+            db.add_idioms_bulk(rows[i:i + 5000])
+        if "bulk_insert" in scenarios:
+            results.append(_result("bulk_insert", size, [time.perf_counter() - start], ops=size))
+
+        if "get_all_idioms" in scenarios:
+            results.append(_result("get_all_idioms", size, _time(db.get_all_idioms, repeat)))
+
+        if "load_corpus" in scenarios:
+            results.append(_result("load_corpus", size, _time(db.load_corpus, repeat)))
+
+        qs = gen.queries(rows, queries)
+
+        if "match_full_scan" in scenarios:
+            corpus = db.get_corpus()
+
+            def _full_scan():
+                for en, he in qs:
+                    similarity.find_best_match(corpus, en, he)
+
+            results.append(_result("match_full_scan", size, _time(_full_scan, repeat), ops=len(qs)))
+
+        if "match_candidates" in scenarios:
+            db.get_corpus()
+
+            def _candidates():
+                for en, he in qs:
+                    similarity.find_best_match(
+                        db.get_corpus(), en, he, candidates=db.get_match_candidates(en, he)
+                    )
+
+            results.append(_result("match_candidates", size, _time(_candidates, repeat), ops=len(qs)))
+
+        if "add_idiom" in scenarios:
+            extra = list(gen.rows(queries))
+
+            def _inserts():
+                for r in extra:
+                    db.add_idiom(**r)
+
+            results.append(_result("add_idiom", size, _time(_inserts, repeat), ops=len(extra)))
+
+        if "export_csv" in scenarios:
+            results.append(_result("export_csv", size, _time(export_csv.export_csv, repeat)))
+
+        db.close()
+
+    return results
+
+
+# ---------------------------------------------------------
+#  METADATA
+# ---------------------------------------------------------
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent.parent,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def metadata(args) -> Dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "similarity_backend": similarity.get_backend(),
+        "workers": args.workers,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "queries": args.queries,
+    }
+
+
+# ---------------------------------------------------------
+#  ENTRY POINT
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matching, inserts and export.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--queries", type=int, default=20, help="Idioms matched/inserted per run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backend", choices=similarity.BACKENDS, help="Similarity backend")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the full-scan scenarios")
+    parser.add_argument("--out", help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    if args.backend:
+        similarity.set_backend(args.backend)
+    similarity.set_parallel(args.workers)
+
+    report = {"meta": metadata(args), "results": []}
+    for size in args.sizes:
+        print(f"Benchmarking {size} rows...", file=sys.stderr)
+        report["results"].extend(run_size(size, args.scenarios, args.repeat, args.queries, args.seed))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
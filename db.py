@@ -1,6 +1,18 @@
+import atexit
+import hashlib
+import os
+import re
 import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Set, Tuple, Dict, Iterator
+from models import Corpus, CorpusRow
+from profiling import span, timed
+from util import (
+    key_ngrams, is_english, is_hebrew, match_key, MATCH_KEY_VERSION, UnionFind,
+    HEBREW_MARKS, HEBREW_POINTS
+)
 
 # ---------------------------------------------------------
 #  DB PATH IS SET EXTERNALLY BY settings.py
@@ -9,10 +21,17 @@ from typing import List, Optional, Tuple, Dict
 
 DB_PATH: Optional[Path] = None
 
+# How many index candidates per language are handed to the exact scorer
+CANDIDATE_LIMIT = 100
+# Grams on more idioms than this are not looked up (they rank nothing
+# and their postings grow with the table)
+CANDIDATE_MAX_DF = 2000
+
 
 # ---------------------------------------------------------
 #  PUBLIC SETTER
 # ---------------------------------------------------------
+@timed
 def set_db_path(db_dir: str):
     """
     Call this once at startup to tell the DB module
@@ -22,32 +41,763 @@ def set_db_path(db_dir: str):
     p = Path(db_dir)
     p.mkdir(parents=True, exist_ok=True)
     DB_PATH = p / "idioms.db"
+    _connections.close()
+    _corpus.clear()
+    _common_grams.clear()
+    if _replica is not None:
+        _replica.close()
+
+
+@timed
+def close():
+    """Close every open connection (they reopen lazily on next use)."""
+    _connections.close()
+    if _replica is not None:
+        _replica.close()
+
+
+# ---------------------------------------------------------
+#  CONNECTION MANAGER
+# ---------------------------------------------------------
+class _Connection(sqlite3.Connection):
+    """
+    Connection whose commits show up as "db.commit" when profiling.
+    Connections stay open, so SQLite never gets to checkpoint on close:
+    a commit that wrote anything copies the WAL back into the main file
+    (PASSIVE: never waits for readers), which is the file Drive syncs.
+    """
+
+    _synced_changes = 0
+
+    def commit(self):
+        with span("db.commit"):
+            super().commit()
+        if self.total_changes != self._synced_changes:
+            self._synced_changes = self.total_changes
+            with span("db.checkpoint"):
+                self.execute("PRAGMA wal_checkpoint(PASSIVE);")
+
+
+class ConnectionManager:
+    """
+    One long-lived connection per thread, opened on first use.
+    PRAGMAs run once per connection and prepared statements stay cached
+    between calls. Use close() or a `with` block to release them.
+    """
+
+    STATEMENT_CACHE_SIZE = 256
+
+    def __init__(self, path: Optional[Path] = None):
+        # None: the shared DB_PATH
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: List[sqlite3.Connection] = []
+
+    def get(self) -> sqlite3.Connection:
+        if DB_PATH is None:
+            raise RuntimeError("DB_PATH not set. Call set_db_path() before using db.py")
+
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # A call that failed half-way must not leak its transaction
+            if conn.in_transaction:
+                conn.rollback()
+            return conn
+
+        with span("db.connect"):
+            conn = sqlite3.connect(
+                self.path or DB_PATH,
+                check_same_thread=False,
+                cached_statements=self.STATEMENT_CACHE_SIZE,
+                factory=_Connection
+            )
+            conn.row_factory = sqlite3.Row
+
+            # Improve reliability on Google Drive sync
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA foreign_keys = ON;")
+
+        self._local.conn = conn
+        with self._lock:
+            self._open.append(conn)
+        return conn
+
+    def retire(self):
+        """
+        Hand this thread a new connection on its next get(). The current
+        one is not closed: cursors still reading from it keep working,
+        and it closes once the last of them is gone.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._open = [c for c in self._open if c is not conn]
+
+    def close(self):
+        with self._lock:
+            conns, self._open = self._open, []
+        if conns:
+            # Fold the whole WAL into the main file and empty it
+            try:
+                conns[0].execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            except sqlite3.Error:
+                pass
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        # Fresh thread-local storage: every thread reconnects on next use
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_connections = ConnectionManager()
+atexit.register(_connections.close)
+
+
+def connections() -> ConnectionManager:
+    """
+    The module's connection manager, usable as a context manager:
+        with db.connections():
+            ...
+    closes all connections on exit.
+    """
+    return _connections
+
+
+# ---------------------------------------------------------
+#  READ REPLICA
+#  Optional local copy of the shared idioms.db (sqlite online backup
+#  API). Read-only queries (get_idiom, get_all_idioms, get_variants,
+#  search, export...) are served from it; writes, the corpus cache and
+#  variant detection keep using the shared file. The copy is refreshed
+#  when the shared DB changed (PRAGMA data_version, or mtime/size of
+#  idioms.db and its WAL), at most every REPLICA_MIN_INTERVAL seconds,
+#  so it can lag the shared DB by that much.
+# ---------------------------------------------------------
+
+REPLICA_MIN_INTERVAL = 2.0
+
+
+class ReadReplica:
+
+    def __init__(self, cache_dir: str, min_interval: float = REPLICA_MIN_INTERVAL):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.min_interval = min_interval
+
+        self._lock = threading.Lock()
+        self._readers = ConnectionManager()
+        self._source: Optional[sqlite3.Connection] = None
+        self._signature = None
+        self._checked_at = 0.0
+        self.path: Optional[Path] = None
+        self.refreshes = 0
+
+    def _replica_path(self) -> Path:
+        # One copy per shared DB
+        digest = hashlib.sha1(str(DB_PATH.resolve()).encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / f"idioms-replica-{digest}.db"
+
+    def _source_signature(self):
+        files = []
+        for path in (DB_PATH, Path(f"{DB_PATH}-wal")):
+            try:
+                st = os.stat(path)
+                files.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                files.append(None)
+        # data_version moves whenever another connection committed
+        version = self._source.execute("PRAGMA data_version;").fetchone()[0]
+        return version, tuple(files)
+
+    @timed
+    def refresh(self, force: bool = False):
+        """Copy the shared DB if it changed since the last copy (or when forced)."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._signature is not None and now - self._checked_at < self.min_interval:
+                return
+            self._checked_at = now
+
+            if self._source is None:
+                self._source = sqlite3.connect(DB_PATH, check_same_thread=False)
+                self.path = self._replica_path()
+                self._readers.path = self.path
+
+            signature = self._source_signature()
+            if not force and signature == self._signature:
+                return
+
+            dest = sqlite3.connect(self.path)
+            try:
+                self._source.backup(dest)
+            finally:
+                dest.close()
+            self._signature = signature
+            self.refreshes += 1
+
+    def get(self) -> sqlite3.Connection:
+        self.refresh()
+        conn = self._readers.get()
+        copy = getattr(conn, "replica_copy", None)
+        if copy is not None and copy != self.refreshes:
+            # A cursor still open on it (a streaming read) would pin the
+            # previous copy for every later read on this thread
+            self._readers.retire()
+            conn = self._readers.get()
+        conn.replica_copy = self.refreshes
+        return conn
+
+    def close(self):
+        with self._lock:
+            self._readers.close()
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+            self._signature = None
+
+
+_replica: Optional[ReadReplica] = None
+
+
+def set_read_replica(cache_dir: Optional[str], min_interval: float = REPLICA_MIN_INTERVAL):
+    """
+    Serve read-only queries from a local copy kept in `cache_dir`
+    (a local folder, not the shared one). None turns it off.
+    """
+    global _replica
+    if _replica is not None:
+        _replica.close()
+    _replica = ReadReplica(cache_dir, min_interval) if cache_dir else None
+
+
+def get_read_replica() -> Optional[ReadReplica]:
+    return _replica
 
 
 # ---------------------------------------------------------
 #  INTERNAL HELPERS
 # ---------------------------------------------------------
+@timed
 def _get_conn() -> sqlite3.Connection:
-    if DB_PATH is None:
-        raise RuntimeError("DB_PATH not set. Call set_db_path() before using db.py")
+    return _connections.get()
+
+
+@timed
+def _get_read_conn() -> sqlite3.Connection:
+    """Connection for read-only queries: the local replica when enabled."""
+    if _replica is not None:
+        return _replica.get()
+    return _connections.get()
+
+
+def _index_ngrams(cur: sqlite3.Cursor, idiom_id: int, key_en: str, key_he: str):
+    """(Re)build the n-gram index entries of one idiom from its match keys."""
+    cur.execute("DELETE FROM idiom_ngrams WHERE idiom_id = ?;", (idiom_id,))
+    cur.executemany("""
+        INSERT OR IGNORE INTO idiom_ngrams (lang, gram, idiom_id)
+        VALUES (?, ?, ?);
+    """, [("en", g, idiom_id) for g in key_ngrams(key_en)] +
+         [("he", g, idiom_id) for g in key_ngrams(key_he)])
+
+
+def _migrate_match_keys(cur: sqlite3.Cursor):
+    """
+    Add and backfill the precomputed match-key columns.
+    Keys are recomputed for every row (and the n-gram index dropped)
+    when MATCH_KEY_VERSION changed, otherwise only where missing (rows written by older clients, or
+    edited by them: the trigger below clears stale keys). The n-gram
+    postings of every recomputed row are rebuilt from its new keys.
+
+    Every edit made here bumps match_rev along with the keys; older
+    clients do not know the column, so a text change that leaves it
+    alone came from them. (Comparing the keys would not do: an edit
+    that only touches niqqud or punctuation keeps the same key.)
+    """
+    cur.execute("PRAGMA table_info(idioms);")
+    columns = {r["name"] for r in cur.fetchall()}
+    for col in ("match_en", "match_he"):
+        if col not in columns:
+            cur.execute(f"ALTER TABLE idioms ADD COLUMN {col} TEXT;")
+    if "match_rev" not in columns:
+        cur.execute("ALTER TABLE idioms ADD COLUMN match_rev INTEGER NOT NULL DEFAULT 0;")
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_idioms_match_en ON idioms (match_en);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_idioms_match_he ON idioms (match_he);")
+
+    cur.execute("DROP TRIGGER IF EXISTS idioms_match_keys_stale;")
+    cur.execute("""
+        CREATE TRIGGER idioms_match_keys_stale
+        AFTER UPDATE OF idiom_en, idiom_he ON idioms
+        WHEN NEW.match_rev IS OLD.match_rev
+             AND (NEW.idiom_en IS NOT OLD.idiom_en OR NEW.idiom_he IS NOT OLD.idiom_he)
+        BEGIN
+            UPDATE idioms SET match_en = NULL, match_he = NULL WHERE id = NEW.id;
+        END;
+    """)
+
+    cur.execute("SELECT value FROM db_meta WHERE key = 'match_key_version';")
+    row = cur.fetchone()
+    if row is None or row["value"] != MATCH_KEY_VERSION:
+        # The n-gram index is built from the keys: init_db reindexes it
+        cur.execute("DELETE FROM idiom_ngrams;")
+        cur.execute("SELECT id, idiom_en, idiom_he FROM idioms;")
+    else:
+        cur.execute("""
+            SELECT id, idiom_en, idiom_he
+            FROM idioms
+            WHERE match_en IS NULL OR match_he IS NULL;
+        """)
+
+    keys = [(match_key(r["idiom_en"]), match_key(r["idiom_he"]), r["id"]) for r in cur.fetchall()]
+    cur.executemany("UPDATE idioms SET match_en = ?, match_he = ? WHERE id = ?;", keys)
+    # An edit by an older client left the old text's grams behind
+    for key_en, key_he, idiom_id in keys:
+        _index_ngrams(cur, idiom_id, key_en, key_he)
+
+    cur.execute("""
+        INSERT OR REPLACE INTO db_meta (key, value)
+        VALUES ('match_key_version', ?);
+    """, (MATCH_KEY_VERSION,))
+
+
+# ---------------------------------------------------------
+#  VARIANT GROUPS
+#  variant_groups holds one row per idiom that has variants: the id of
+#  its family (connected component of variants_link), which is the
+#  smallest idiom id in the family. Kept up to date on every link and
+#  delete; rebuilt from scratch whenever variants_link changed behind
+#  our back (the 'variant_links' trigger counter moved past the
+#  'variant_groups_synced' mark, e.g. links written by an older client).
+# ---------------------------------------------------------
+
+# Link batches above this size rebuild all groups instead of merging
+# (also keeps the merge query under SQLite's 999-parameter limit)
+VARIANT_GROUP_REBUILD_AT = 400
+
+
+def _variant_groups_stale(cur: sqlite3.Cursor) -> bool:
+    cur.execute("""
+        SELECT
+            (SELECT value FROM db_meta WHERE key = 'variant_links') AS links,
+            (SELECT value FROM db_meta WHERE key = 'variant_groups_synced') AS synced;
+    """)
+    row = cur.fetchone()
+    return row["links"] != row["synced"]
+
+
+def _mark_variant_groups_synced(cur: sqlite3.Cursor):
+    cur.execute("""
+        INSERT OR REPLACE INTO db_meta (key, value)
+        SELECT 'variant_groups_synced', value FROM db_meta WHERE key = 'variant_links';
+    """)
+
+
+def _store_variant_groups(cur: sqlite3.Cursor, uf: UnionFind):
+    """Write every family of two or more idioms, labelled by its smallest id."""
+    rows = []
+    for members in uf.groups().values():
+        if len(members) > 1:
+            group_id = min(members)
+            rows.extend((m, group_id) for m in members)
+    cur.executemany("""
+        INSERT OR REPLACE INTO variant_groups (idiom_id, group_id)
+        VALUES (?, ?);
+    """, rows)
+
+
+def _rebuild_variant_groups(cur: sqlite3.Cursor):
+    uf = UnionFind()
+    cur.execute("SELECT idiom_id, variant_id FROM variants_link WHERE idiom_id < variant_id;")
+    for r in cur.fetchall():
+        uf.union(r["idiom_id"], r["variant_id"])
+
+    cur.execute("DELETE FROM variant_groups;")
+    _store_variant_groups(cur, uf)
+    _mark_variant_groups_synced(cur)
+
+
+def _merge_variant_groups(cur: sqlite3.Cursor, pairs: List[Tuple[int, int]]):
+    """
+    Union the families of newly linked pairs. Each idiom is joined to
+    its current group id (itself a member), so merged families end up
+    labelled by their overall smallest id; the old labels are rewritten.
+    """
+    ids = sorted({i for pair in pairs for i in pair})
+    placeholders = ",".join("?" * len(ids))
+    cur.execute(f"""
+        SELECT idiom_id, group_id
+        FROM variant_groups
+        WHERE idiom_id IN ({placeholders});
+    """, ids)
+
+    uf = UnionFind()
+    old_groups = set()
+    for r in cur.fetchall():
+        uf.union(r["idiom_id"], r["group_id"])
+        old_groups.add(r["group_id"])
+    for a, b in pairs:
+        uf.union(a, b)
+
+    for members in uf.groups().values():
+        group_id = min(members)
+        relabel = [g for g in members if g in old_groups and g != group_id]
+        if relabel:
+            cur.execute(f"""
+                UPDATE variant_groups
+                SET group_id = ?
+                WHERE group_id IN ({",".join("?" * len(relabel))});
+            """, (group_id, *relabel))
+
+    _store_variant_groups(cur, uf)
+    _mark_variant_groups_synced(cur)
+
+
+def _split_variant_group(cur: sqlite3.Cursor, group_id: int):
+    """Recompute one family after a member was deleted (it may fall apart)."""
+    cur.execute("SELECT idiom_id FROM variant_groups WHERE group_id = ?;", (group_id,))
+    uf = UnionFind()
+    for r in cur.fetchall():
+        uf.find(r["idiom_id"])
+
+    cur.execute("""
+        SELECT idiom_id, variant_id
+        FROM variants_link
+        WHERE idiom_id < variant_id
+          AND idiom_id IN (SELECT idiom_id FROM variant_groups WHERE group_id = ?);
+    """, (group_id,))
+    for r in cur.fetchall():
+        uf.union(r["idiom_id"], r["variant_id"])
+
+    cur.execute("DELETE FROM variant_groups WHERE group_id = ?;", (group_id,))
+    _store_variant_groups(cur, uf)
+    _mark_variant_groups_synced(cur)
+
+
+def _link_variants(cur: sqlite3.Cursor, pairs: List[Tuple[int, int]]):
+    """Insert both directions of every pair and update the families."""
+    stale = _variant_groups_stale(cur)
+
+    cur.executemany("""
+        INSERT OR IGNORE INTO variants_link (idiom_id, variant_id)
+        VALUES (?, ?);
+    """, [p for a, b in pairs for p in ((a, b), (b, a))])
+
+    if stale or len(pairs) > VARIANT_GROUP_REBUILD_AT:
+        _rebuild_variant_groups(cur)
+    elif pairs:
+        _merge_variant_groups(cur, pairs)
+
+
+# ---------------------------------------------------------
+#  FULL-TEXT SEARCH INDEX
+#  idioms_fts (FTS5) mirrors the text columns of idioms, with Hebrew
+#  niqqud stripped so pointed and unpointed spellings match. It is
+#  kept in sync by triggers written in plain SQL, so edits from any
+#  client update it. Without FTS5 in this SQLite build the
+#  table is not created and search() falls back to LIKE.
+# ---------------------------------------------------------
+
+SEARCH_COLUMNS = (
+    "idiom_en", "idiom_he",
+    "translation_en", "translation_he",
+    "half_en", "half_he",
+    "off_en", "off_he",
+)
 
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
 
-    # Improve reliability on Google Drive sync
-    conn.execute("PRAGMA journal_mode = WAL;")
-    conn.execute("PRAGMA foreign_keys = ON;")
+def _strip_marks_sql(expr: str) -> str:
+    """
+    SQL expression removing HEBREW_POINTS from `expr` (cantillation is
+    left alone: a replace() per mark would overflow SQLite's parser).
+    """
+    for ch in HEBREW_POINTS:
+        expr = f"replace({expr}, char({ord(ch)}), '')"
+    return expr
+
+
+def _fts5_available(cur: sqlite3.Cursor) -> bool:
+    try:
+        cur.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x);")
+        cur.execute("DROP TABLE temp.fts5_probe;")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _has_search_index(cur: sqlite3.Cursor) -> bool:
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'idioms_fts';")
+    return cur.fetchone() is not None
+
+
+def _create_search_index(cur: sqlite3.Cursor):
+    if _has_search_index(cur) or not _fts5_available(cur):
+        return
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    cur.execute(f"""
+        CREATE VIRTUAL TABLE idioms_fts USING fts5(
+            {columns},
+            tokenize = "unicode61 remove_diacritics 2"
+        );
+    """)
+
+    def _values(prefix):
+        return ", ".join(
+            _strip_marks_sql(f"COALESCE({prefix}{c}, '')") if c.endswith("_he") else f"{prefix}{c}"
+            for c in SEARCH_COLUMNS
+        )
+
+    new_values = _values("NEW.")
+    cur.execute(f"""
+        CREATE TRIGGER idioms_fts_insert
+        AFTER INSERT ON idioms
+        BEGIN
+            INSERT INTO idioms_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END;
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER idioms_fts_update
+        AFTER UPDATE OF {columns} ON idioms
+        BEGIN
+            DELETE FROM idioms_fts WHERE rowid = OLD.id;
+            INSERT INTO idioms_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END;
+    """)
+    cur.execute("""
+        CREATE TRIGGER idioms_fts_delete
+        AFTER DELETE ON idioms
+        BEGIN
+            DELETE FROM idioms_fts WHERE rowid = OLD.id;
+        END;
+    """)
+
+    # Existing rows
+    cur.execute(f"INSERT INTO idioms_fts (rowid, {columns}) SELECT id, {_values('')} FROM idioms;")
+
+
+# ---------------------------------------------------------
+#  CHANGE LOG
+#  change_log records, per idiom, every event that changes its exported
+#  row: 'U' field edit, 'D' delete, 'L' variant link added/removed,
+#  'G' variant group changed. Written by triggers, so changes from any
+#  client are seen. Incremental exports remember the last seq they saw
+#  and only re-export the ids logged after it. Only the newest
+#  CHANGE_LOG_KEEP entries are kept; a reader whose seq fell behind
+#  them gets None from get_changes_since() and must start over.
+# ---------------------------------------------------------
+
+CHANGE_LOG_KEEP = 200000
+
+# Columns whose edits change the exported row (not the match keys)
+EXPORT_COLUMNS = (
+    "created_by", "created_at",
+    "idiom_en", "idiom_he",
+    "translation_en", "translation_he",
+    "half_en", "half_he",
+    "off_en", "off_he",
+)
+
+
+def _create_change_log(cur: sqlite3.Cursor):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            idiom_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        );
+    """)
 
-    return conn
+    columns = ", ".join(EXPORT_COLUMNS)
+    triggers = (
+        ("change_log_idiom_update", f"AFTER UPDATE OF {columns} ON idioms", "NEW.id", "U"),
+        ("change_log_idiom_delete", "AFTER DELETE ON idioms", "OLD.id", "D"),
+        ("change_log_link_insert", "AFTER INSERT ON variants_link", "NEW.idiom_id", "L"),
+        ("change_log_link_delete", "AFTER DELETE ON variants_link", "OLD.idiom_id", "L"),
+        ("change_log_group_insert", "AFTER INSERT ON variant_groups", "NEW.idiom_id", "G"),
+        ("change_log_group_update", "AFTER UPDATE ON variant_groups", "NEW.idiom_id", "G"),
+        ("change_log_group_delete", "AFTER DELETE ON variant_groups", "OLD.idiom_id", "G"),
+    )
+    for name, event, idiom_id, op in triggers:
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}
+            {event}
+            BEGIN
+                INSERT INTO change_log (idiom_id, op) VALUES ({idiom_id}, '{op}');
+            END;
+        """)
+
+    cur.execute("""
+        DELETE FROM change_log
+        WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?;
+    """, (CHANGE_LOG_KEEP,))
+
+
+# ---------------------------------------------------------
+#  USER STATS
+#  user_stats (idioms, first and last contribution per user) and
+#  user_daily (idioms per user per UTC day) are kept up to date by
+#  triggers on idioms, so milestones and the leaderboard are indexed
+#  reads instead of COUNT(*) scans, whichever client wrote the rows.
+#  Deletes lower the counts; first_at / last_at keep the history.
+# ---------------------------------------------------------
+def _user_stats_sql(row: str, sign: str) -> str:
+    """Trigger statements adding (sign "+") or removing ("-") one idiom of `row` (NEW / OLD)."""
+    if sign == "+":
+        return f"""
+            INSERT OR IGNORE INTO user_stats (created_by, idioms, first_at, last_at)
+            VALUES ({row}.created_by, 0, {row}.created_at, {row}.created_at);
+            UPDATE user_stats
+            SET idioms = idioms + 1,
+                first_at = MIN(first_at, {row}.created_at),
+                last_at = MAX(last_at, {row}.created_at)
+            WHERE created_by = {row}.created_by;
+            INSERT OR IGNORE INTO user_daily (created_by, day, idioms)
+            VALUES ({row}.created_by, date({row}.created_at), 0);
+            UPDATE user_daily SET idioms = idioms + 1
+            WHERE created_by = {row}.created_by AND day = date({row}.created_at);
+        """
+    return f"""
+            UPDATE user_stats SET idioms = idioms - 1
+            WHERE created_by = {row}.created_by;
+            UPDATE user_daily SET idioms = idioms - 1
+            WHERE created_by = {row}.created_by AND day = date({row}.created_at);
+            DELETE FROM user_daily
+            WHERE created_by = {row}.created_by AND day = date({row}.created_at) AND idioms <= 0;
+        """
+
+
+def _rebuild_user_stats(cur: sqlite3.Cursor):
+    cur.execute("DELETE FROM user_stats;")
+    cur.execute("DELETE FROM user_daily;")
+    cur.execute("""
+        INSERT INTO user_stats (created_by, idioms, first_at, last_at)
+        SELECT created_by, COUNT(*), MIN(created_at), MAX(created_at)
+        FROM idioms
+        GROUP BY created_by;
+    """)
+    cur.execute("""
+        INSERT INTO user_daily (created_by, day, idioms)
+        SELECT created_by, date(created_at), COUNT(*)
+        FROM idioms
+        GROUP BY created_by, date(created_at);
+    """)
+
+
+def _create_user_stats(cur: sqlite3.Cursor):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats';")
+    exists = cur.fetchone() is not None
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            created_by TEXT PRIMARY KEY,
+            idioms INTEGER NOT NULL,
+            first_at TEXT,
+            last_at TEXT
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_daily (
+            created_by TEXT NOT NULL,
+            day TEXT NOT NULL,
+            idioms INTEGER NOT NULL,
+            PRIMARY KEY (created_by, day)
+        ) WITHOUT ROWID;
+    """)
+
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS user_stats_insert
+        AFTER INSERT ON idioms
+        BEGIN
+            {_user_stats_sql("NEW", "+")}
+        END;
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS user_stats_delete
+        AFTER DELETE ON idioms
+        BEGIN
+            {_user_stats_sql("OLD", "-")}
+        END;
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS user_stats_update
+        AFTER UPDATE OF created_by, created_at ON idioms
+        BEGIN
+            {_user_stats_sql("OLD", "-")}
+            {_user_stats_sql("NEW", "+")}
+        END;
+    """)
+
+    # Existing rows
+    if not exists:
+        _rebuild_user_stats(cur)
 
 
 # ---------------------------------------------------------
 #  SCHEMA INIT
+#  The full init (DDL, triggers, migrations, backfills, one commit) runs
+#  only when the file is not known to be up to date: PRAGMA user_version
+#  below SCHEMA_VERSION, match keys from another MATCH_KEY_VERSION, rows
+#  still waiting for their keys (written by older clients), variant
+#  groups out of sync or a change_log due for pruning. Otherwise init_db
+#  costs a single read and never writes to the shared file.
 # ---------------------------------------------------------
-def init_db():
+
+# Bump whenever init_db creates or migrates anything new
+SCHEMA_VERSION = 5
+
+
+def _schema_current(cur: sqlite3.Cursor) -> bool:
+    try:
+        cur.execute("""
+            SELECT
+                (SELECT user_version FROM pragma_user_version) AS version,
+                (SELECT value FROM db_meta WHERE key = 'match_key_version') AS match_version,
+                EXISTS (
+                    SELECT 1 FROM idioms WHERE match_en IS NULL
+                    UNION ALL
+                    SELECT 1 FROM idioms WHERE match_he IS NULL
+                ) AS unkeyed,
+                (SELECT value FROM db_meta WHERE key = 'variant_links')
+                    IS NOT (SELECT value FROM db_meta WHERE key = 'variant_groups_synced') AS groups_stale,
+                (SELECT MAX(seq) - MIN(seq) FROM change_log) AS log_span;
+        """)
+    except sqlite3.OperationalError:
+        # Tables missing: new or pre-versioning file
+        return False
+
+    row = cur.fetchone()
+    return (
+        row["version"] >= SCHEMA_VERSION
+        and row["match_version"] == MATCH_KEY_VERSION
+        and not row["unkeyed"]
+        and not row["groups_stale"]
+        and (row["log_span"] or 0) < 2 * CHANGE_LOG_KEEP
+    )
+
+
+@timed
+def init_db(force: bool = False):
+    """
+    Create / migrate the schema. Cheap when the DB is already up to
+    date (see SCHEMA INIT above); force=True always runs the full init.
+    """
     conn = _get_conn()
     cur = conn.cursor()
 
+    if not force and _schema_current(cur):
+        return
+
     # Main idioms table
     cur.execute("""
         CREATE TABLE IF NOT EXISTS idioms (
@@ -66,10 +816,24 @@ def init_db():
             half_he TEXT,
 
             off_en TEXT,
-            off_he TEXT
+            off_he TEXT,
+
+            match_en TEXT,
+            match_he TEXT
         );
     """)
 
+    # Per-user lookups and keyset pages filtered by user (browse_idioms)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_idioms_created_by
+        ON idioms (created_by, id);
+    """)
+    # Date-filtered counts and pages (browse_idioms / count_idioms)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_idioms_created_at
+        ON idioms (created_at);
+    """)
+
     # Variants linking table (bidirectional)
     cur.execute("""
         CREATE TABLE IF NOT EXISTS variants_link (
@@ -83,13 +847,113 @@ def init_db():
         );
     """)
 
+    # Variant families (see VARIANT GROUPS above)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS variant_groups (
+            idiom_id INTEGER PRIMARY KEY,
+            group_id INTEGER NOT NULL,
+
+            FOREIGN KEY (idiom_id) REFERENCES idioms(id) ON DELETE CASCADE
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_variant_groups_group
+        ON variant_groups (group_id);
+    """)
+
+    # Character n-gram inverted index (one posting per lang/gram/idiom)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS idiom_ngrams (
+            lang TEXT NOT NULL,
+            gram TEXT NOT NULL,
+            idiom_id INTEGER NOT NULL,
+
+            PRIMARY KEY (lang, gram, idiom_id),
+
+            FOREIGN KEY (idiom_id) REFERENCES idioms(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_idiom_ngrams_idiom
+        ON idiom_ngrams (idiom_id);
+    """)
+
+    # Batches written by client outboxes (outbox.py), so a flush that
+    # is retried after an unknown outcome is never applied twice
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS applied_batches (
+            token TEXT PRIMARY KEY,
+            ids TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # Change counter: bumped by triggers on every edit/delete, so readers
+    # (e.g. the corpus cache) notice changes made by any client
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS db_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """)
+    cur.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('changes', 0);")
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS idioms_changes_update
+        AFTER UPDATE ON idioms
+        BEGIN
+            UPDATE db_meta SET value = value + 1 WHERE key = 'changes';
+        END;
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS idioms_changes_delete
+        AFTER DELETE ON idioms
+        BEGIN
+            UPDATE db_meta SET value = value + 1 WHERE key = 'changes';
+        END;
+    """)
+
+    # Link counter: lets us notice links added/removed by any client
+    cur.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('variant_links', 0);")
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS variants_link_changes_insert
+        AFTER INSERT ON variants_link
+        BEGIN
+            UPDATE db_meta SET value = value + 1 WHERE key = 'variant_links';
+        END;
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS variants_link_changes_delete
+        AFTER DELETE ON variants_link
+        BEGIN
+            UPDATE db_meta SET value = value + 1 WHERE key = 'variant_links';
+        END;
+    """)
+
+    _migrate_match_keys(cur)
+    _create_search_index(cur)
+    _create_change_log(cur)
+    _create_user_stats(cur)
+
+    if _variant_groups_stale(cur):
+        _rebuild_variant_groups(cur)
+
+    # Backfill rows that were added before the index existed
+    cur.execute("""
+        SELECT id, match_en, match_he
+        FROM idioms
+        WHERE id NOT IN (SELECT idiom_id FROM idiom_ngrams);
+    """)
+    for row in cur.fetchall():
+        _index_ngrams(cur, row["id"], row["match_en"], row["match_he"])
+
+    cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
     conn.commit()
-    conn.close()
 
 
 # ---------------------------------------------------------
 #  INSERT IDIOM
 # ---------------------------------------------------------
+@timed
 def add_idiom(
     *,
     created_by: str,
@@ -105,31 +969,160 @@ def add_idiom(
     conn = _get_conn()
     cur = conn.cursor()
 
+    key_en, key_he = match_key(idiom_en), match_key(idiom_he)
     cur.execute("""
         INSERT INTO idioms (
             created_by,
             idiom_en, idiom_he,
             translation_en, translation_he,
             half_en, half_he,
-            off_en, off_he
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+            off_en, off_he,
+            match_en, match_he
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
     """, (
         created_by,
         idiom_en, idiom_he,
         translation_en, translation_he,
         half_en, half_he,
-        off_en, off_he
+        off_en, off_he,
+        key_en, key_he
     ))
 
     new_id = cur.lastrowid
+    _index_ngrams(cur, new_id, key_en, key_he)
     conn.commit()
-    conn.close()
     return new_id
 
 
+# ---------------------------------------------------------
+#  BULK INSERT
+# ---------------------------------------------------------
+IDIOM_FIELDS = (
+    "created_by",
+    "idiom_en", "idiom_he",
+    "translation_en", "translation_he",
+    "half_en", "half_he",
+    "off_en", "off_he",
+)
+
+
+def _insert_idioms(cur: sqlite3.Cursor, rows: List[Dict]) -> List[int]:
+    """
+    executemany insert (plus n-gram postings) inside the caller's
+    BEGIN IMMEDIATE transaction. Returns the new ids in input order.
+    """
+    # Match keys once per row: stored, and the n-grams are built from them
+    keys = [(match_key(r["idiom_en"]), match_key(r["idiom_he"])) for r in rows]
+
+    # The write lock is held: no other writer can slip rows in, so the
+    # new ids are exactly those above the current maximum
+    cur.execute("SELECT COALESCE(MAX(id), 0) AS m FROM idioms;")
+    max_before = cur.fetchone()["m"]
+
+    cur.executemany("""
+        INSERT INTO idioms (
+            created_by,
+            idiom_en, idiom_he,
+            translation_en, translation_he,
+            half_en, half_he,
+            off_en, off_he,
+            match_en, match_he,
+            created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP));
+    """, [
+        tuple(r.get(f) for f in IDIOM_FIELDS) + key + (r.get("created_at") or None,)
+        for r, key in zip(rows, keys)
+    ])
+
+    cur.execute("SELECT id FROM idioms WHERE id > ? ORDER BY id;", (max_before,))
+    new_ids = [r["id"] for r in cur.fetchall()]
+
+    postings = []
+    for idiom_id, (key_en, key_he) in zip(new_ids, keys):
+        postings.extend(("en", g, idiom_id) for g in key_ngrams(key_en))
+        postings.extend(("he", g, idiom_id) for g in key_ngrams(key_he))
+    cur.executemany("""
+        INSERT OR IGNORE INTO idiom_ngrams (lang, gram, idiom_id)
+        VALUES (?, ?, ?);
+    """, postings)
+
+    return new_ids
+
+
+@timed
+def add_idioms_bulk(rows: List[Dict]) -> List[int]:
+    """
+    Insert many idioms in a single transaction with executemany.
+    Each row is a dict with the add_idiom() keyword arguments and an
+    optional "created_at" (defaults to now).
+    Returns the new ids in input order.
+    """
+    if not rows:
+        return []
+
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE;")
+    try:
+        new_ids = _insert_idioms(cur, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return new_ids
+
+
+@timed
+def add_batch(rows: List[Dict], links: List[Tuple[int, int]], token: Optional[str] = None) -> List[int]:
+    """
+    Insert rows (as for add_idioms_bulk) and variant links in ONE
+    transaction. In `links`, a negative id -n refers to rows[n - 1].
+    With a `token`, the batch is applied at most once: replaying a token
+    that already committed inserts nothing and returns the ids from the
+    first time (so a writer that crashed before learning the outcome can
+    safely retry). Returns the new ids in input order.
+    """
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE;")
+    try:
+        if token is not None:
+            cur.execute("SELECT ids FROM applied_batches WHERE token = ?;", (token,))
+            done = cur.fetchone()
+            if done is not None:
+                conn.rollback()
+                return [int(i) for i in done["ids"].split(",") if i]
+
+        new_ids = _insert_idioms(cur, rows) if rows else []
+
+        def _resolve(i):
+            return new_ids[-i - 1] if i < 0 else i
+
+        pairs = [(_resolve(a), _resolve(b)) for a, b in links]
+        if pairs:
+            _link_variants(cur, pairs)
+
+        if token is not None:
+            cur.execute(
+                "INSERT INTO applied_batches (token, ids) VALUES (?, ?);",
+                (token, ",".join(map(str, new_ids)))
+            )
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return new_ids
+
+
 # ---------------------------------------------------------
 #  VARIANT LINKING
 # ---------------------------------------------------------
+@timed
 def add_variant_link(id1: int, id2: int):
     """
     Bidirectional linking:
@@ -137,23 +1130,35 @@ def add_variant_link(id1: int, id2: int):
     """
     conn = _get_conn()
     cur = conn.cursor()
+    _link_variants(cur, [(id1, id2)])
+    conn.commit()
 
-    cur.execute("""
-        INSERT OR IGNORE INTO variants_link (idiom_id, variant_id)
-        VALUES (?, ?);
-    """, (id1, id2))
-
-    cur.execute("""
-        INSERT OR IGNORE INTO variants_link (idiom_id, variant_id)
-        VALUES (?, ?);
-    """, (id2, id1))
 
+@timed
+def add_variant_links_bulk(pairs: List[Tuple[int, int]]):
+    """Bidirectionally link many (id1, id2) pairs in one transaction."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    _link_variants(cur, list(pairs))
     conn.commit()
-    conn.close()
 
 
+@timed
+def get_variant_pairs() -> List[Tuple[int, int]]:
+    """Every linked pair once, as (smaller id, larger id)."""
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT idiom_id, variant_id
+        FROM variants_link
+        WHERE idiom_id < variant_id;
+    """)
+    return [(r["idiom_id"], r["variant_id"]) for r in cur.fetchall()]
+
+
+@timed
 def get_variants(idiom_id: int) -> List[int]:
-    conn = _get_conn()
+    conn = _get_read_conn()
     cur = conn.cursor()
 
     cur.execute("""
@@ -163,67 +1168,612 @@ def get_variants(idiom_id: int) -> List[int]:
     """, (idiom_id,))
 
     rows = cur.fetchall()
-    conn.close()
 
     return [r["variant_id"] for r in rows]
 
 
+@timed
+def get_variant_group(idiom_id: int) -> List[int]:
+    """
+    Every idiom in the same variant family (direct or transitive links),
+    including idiom_id itself, sorted. [idiom_id] when it has no variants.
+    """
+    conn = _get_read_conn()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT idiom_id
+        FROM variant_groups
+        WHERE group_id = (SELECT group_id FROM variant_groups WHERE idiom_id = ?)
+        ORDER BY idiom_id;
+    """, (idiom_id,))
+
+    return [r["idiom_id"] for r in cur.fetchall()] or [idiom_id]
+
+
 # ---------------------------------------------------------
 #  GET IDIOM
 # ---------------------------------------------------------
+@timed
 def get_idiom(idiom_id: int) -> Optional[Dict]:
-    conn = _get_conn()
+    conn = _get_read_conn()
     cur = conn.cursor()
     cur.execute("SELECT * FROM idioms WHERE id = ?;", (idiom_id,))
     row = cur.fetchone()
-    conn.close()
     return dict(row) if row else None
 
 
 # ---------------------------------------------------------
 #  GET ALL IDIOMS
 # ---------------------------------------------------------
+@timed
 def get_all_idioms() -> List[Dict]:
-    conn = _get_conn()
+    conn = _get_read_conn()
     cur = conn.cursor()
     cur.execute("SELECT * FROM idioms ORDER BY id;")
     rows = cur.fetchall()
-    conn.close()
     return [dict(r) for r in rows]
 
 
 # ---------------------------------------------------------
-#  USER COUNT
+#  STREAMING EXPORT
 # ---------------------------------------------------------
-def count_user_idioms(username: str) -> int:
-    conn = _get_conn()
+_EXPORT_QUERY = """
+        SELECT
+            i.*,
+            COALESCE((
+                SELECT GROUP_CONCAT(v.variant_id)
+                FROM (
+                    SELECT variant_id
+                    FROM variants_link
+                    WHERE idiom_id = i.id
+                    ORDER BY variant_id
+                ) AS v
+            ), '') AS variants,
+            COALESCE(g.group_id, i.id) AS variant_group
+        FROM idioms AS i
+        LEFT JOIN variant_groups AS g ON g.idiom_id = i.id
+        {where}
+        ORDER BY i.id;
+"""
+
+
+@timed
+def iter_idioms_with_variants(
+    batch_size: int = 1000,
+    after_id: Optional[int] = None,
+    ids: Optional[List[int]] = None
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream every idiom in id order with a "variants" column holding the
+    comma-separated variant ids (sorted, "" when none) and a
+    "variant_group" column (smallest id of its family, its own id when
+    it has no variants).
+    One query for the whole table; rows are fetched `batch_size` at a time.
+    after_id: only idioms with a larger id.
+    ids: only these idioms (sorted, queried batch_size at a time).
+    """
+    conn = _get_read_conn()
+    cur = conn.cursor()
+
+    if ids is not None:
+        ids = sorted(ids)
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i:i + batch_size]
+            where = f"WHERE i.id IN ({', '.join('?' * len(chunk))})"
+            cur.execute(_EXPORT_QUERY.format(where=where), chunk)
+            yield from cur.fetchall()
+        return
+
+    if after_id is None:
+        cur.execute(_EXPORT_QUERY.format(where=""))
+    else:
+        cur.execute(_EXPORT_QUERY.format(where="WHERE i.id > ?"), (after_id,))
+
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+
+@timed
+def get_change_seq() -> int:
+    """Seq of the newest change_log entry (0 before the first change)."""
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log;")
+    return cur.fetchone()["seq"]
+
+
+@timed
+def get_changes_since(seq: int) -> Optional[Tuple[bool, List[int]]]:
+    """
+    (any idiom deleted, sorted ids of idioms changed otherwise) for the
+    change_log entries after `seq`.
+    None when the log no longer reaches back to `seq` (pruned, or a
+    different DB): the caller has to assume everything changed.
+    """
+    conn = _get_read_conn()
     cur = conn.cursor()
+    cur.execute("SELECT MIN(seq) AS first, MAX(seq) AS last FROM change_log;")
+    row = cur.fetchone()
+    last = row["last"] or 0
+    if seq > last or (row["first"] is not None and seq < row["first"] - 1):
+        return None
+
     cur.execute("""
+        SELECT
+            EXISTS (SELECT 1 FROM change_log WHERE seq > ? AND op = 'D') AS deleted
+    """, (seq,))
+    deleted = bool(cur.fetchone()["deleted"])
+    cur.execute("""
+        SELECT DISTINCT idiom_id
+        FROM change_log
+        WHERE seq > ? AND op != 'D'
+        ORDER BY idiom_id;
+    """, (seq,))
+    return deleted, [r["idiom_id"] for r in cur.fetchall()]
+
+
+# ---------------------------------------------------------
+#  CORPUS CACHE
+# ---------------------------------------------------------
+
+# What the matching code reads from a corpus row (plus "id")
+CORPUS_COLUMNS = ("idiom_en", "idiom_he", "match_en", "match_he")
+
+_CORPUS_LOADABLE = ("created_at",) + IDIOM_FIELDS + ("match_en", "match_he")
+
+
+def _fill_corpus(cur: sqlite3.Cursor, corpus: Corpus, after_id: int = 0, batch_size: int = 5000):
+    """Append the idioms with id > after_id to `corpus` (its columns only)."""
+    columns = ", ".join(("id",) + tuple(corpus.columns))
+    # Plain tuples: no sqlite3.Row per row
+    cur.row_factory = None
+    cur.execute(f"SELECT {columns} FROM idioms WHERE id > ? ORDER BY id;", (after_id,))
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        corpus.extend(rows)
+
+
+@timed
+def load_corpus(columns: Tuple[str, ...] = CORPUS_COLUMNS) -> Corpus:
+    """
+    Read the idioms table into a compact Corpus holding only `columns`
+    (any of the idioms columns; "id" is always there). Not cached: see
+    get_corpus for the shared copy used by matching.
+    """
+    unknown = [c for c in columns if c not in _CORPUS_LOADABLE]
+    if unknown:
+        raise ValueError(f"unknown corpus columns: {', '.join(unknown)}")
+
+    corpus = Corpus(columns)
+    _fill_corpus(_get_read_conn().cursor(), corpus)
+    return corpus
+
+
+class _CorpusCache:
+    """
+    Process-wide Corpus (CORPUS_COLUMNS) of the idioms table.
+    Loaded once, then refreshed incrementally:
+      - new rows are fetched with id > last_seen
+      - edits/deletes (change counter moved) trigger a full reload
+    A full reload builds a new Corpus, so a corpus handed out earlier is
+    never mutated except for appended rows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.rows = Corpus(CORPUS_COLUMNS)
+        self.changes: Optional[int] = None
+
+    def get(self) -> Corpus:
+        with self._lock:
+            conn = _get_conn()
+            cur = conn.cursor()
+
+            cur.execute("SELECT value FROM db_meta WHERE key = 'changes';")
+            changes = cur.fetchone()["value"]
+
+            if changes != self.changes:
+                self.rows = Corpus(CORPUS_COLUMNS)
+                self.changes = changes
+
+            _fill_corpus(cur, self.rows, self.rows.ids[-1] if self.rows else 0)
+            return self.rows
+
+
+_corpus = _CorpusCache()
+
+
+@timed
+def get_corpus() -> Corpus:
+    """
+    Return the cached corpus ({id: row} with the CORPUS_COLUMNS),
+    refreshed with whatever changed since the last call.
+    Treat it as read-only.
+    """
+    return _corpus.get()
+
+
+# ---------------------------------------------------------
+#  MATCH CANDIDATES (N-GRAM INDEX)
+# ---------------------------------------------------------
+# (lang, gram) found on more than CANDIDATE_MAX_DF idioms: tables only
+# grow in practice, so they are not counted again
+_common_grams: Set[Tuple[str, str]] = set()
+
+
+@timed
+def _candidate_ids(cur: sqlite3.Cursor, lang: str, key: str, limit: int) -> List[int]:
+    """
+    Rank idioms by Dice overlap of their n-gram sets with the match key
+    `key` (gram count of a stored idiom is approximated by its key length).
+    Only grams on at most CANDIDATE_MAX_DF idioms are looked up (all of
+    them if every gram is that common), so the cost stays bounded.
+    """
+    grams = sorted(key_ngrams(key))
+    if not grams:
+        return []
+
+    # Document frequency, counted no further than the cut-off
+    rare = []
+    for gram in grams:
+        if (lang, gram) in _common_grams:
+            continue
+        cur.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM idiom_ngrams WHERE lang = ? AND gram = ? LIMIT ?
+            );
+        """, (lang, gram, CANDIDATE_MAX_DF + 1))
+        if cur.fetchone()[0] <= CANDIDATE_MAX_DF:
+            rare.append(gram)
+        else:
+            _common_grams.add((lang, gram))
+
+    total = len(grams)
+    if rare:
+        grams = rare
+
+    column = "match_en" if lang == "en" else "match_he"
+    placeholders = ",".join("?" * len(grams))
+    cur.execute(f"""
+        SELECT g.idiom_id, 2.0 * g.hits / (? + length(i.{column})) AS dice
+        FROM (
+            SELECT idiom_id, COUNT(*) AS hits
+            FROM idiom_ngrams
+            WHERE lang = ? AND gram IN ({placeholders})
+            GROUP BY idiom_id
+        ) AS g
+        JOIN idioms AS i ON i.id = g.idiom_id
+        ORDER BY dice DESC, g.idiom_id
+        LIMIT ?;
+    """, (total, lang, *grams, limit))
+    return [r["idiom_id"] for r in cur.fetchall()]
+
+
+@timed
+def get_match_candidates(
+    new_en: str,
+    new_he: str,
+    limit: int = CANDIDATE_LIMIT
+) -> Dict[int, CorpusRow]:
+    """
+    Return {id: row} for the idioms sharing the most n-grams with the
+    new idiom (top `limit` per language), in id order.
+    Rows come from the in-memory corpus cache (CORPUS_COLUMNS only).
+    Exact duplicates (same match key) are always included. Pass it as
+    `candidates` to similarity.find_best_match / find_top_matches to
+    score only these rows: n-gram overlap does not bound the difflib
+    ratio, so a match sharing few trigrams with the input can be
+    missed (see find_top_matches).
+    """
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    key_en, key_he = match_key(new_en), match_key(new_he)
+
+    ids = set()
+    if is_english(key_en):
+        ids.update(_candidate_ids(cur, "en", key_en, limit))
+    if is_hebrew(key_he):
+        ids.update(_candidate_ids(cur, "he", key_he, limit))
+
+    # Exact duplicates are always candidates (indexed key lookup)
+    cur.execute(
+        "SELECT id FROM idioms WHERE match_en = ? OR match_he = ?;",
+        (key_en, key_he)
+    )
+    ids.update(r["id"] for r in cur.fetchall())
+
+    corpus = get_corpus()
+    return {i: corpus[i] for i in sorted(ids) if i in corpus}
+
+
+# ---------------------------------------------------------
+#  SEARCH
+# ---------------------------------------------------------
+
+# Hebrew one-letter prefixes (the, and, in, as, to, from, that) and the
+# common two-letter combinations, tried in front of every Hebrew term
+HEBREW_PREFIXES = ("ה", "ו", "ב", "כ", "ל", "מ", "ש")
+HEBREW_PREFIX_PAIRS = tuple(a + b for a in ("ו", "ש") for b in HEBREW_PREFIXES if b != a)
+
+_search_term_re = re.compile(r"[^\W_]+")
+_strip_marks = str.maketrans("", "", HEBREW_MARKS)
+
+
+def _search_terms(query: str) -> List[str]:
+    return _search_term_re.findall(query.translate(_strip_marks))
+
+
+def _fts_term(term: str) -> str:
+    """
+    FTS5 expression for one query word: a prefix match, and for Hebrew
+    the same word behind (or without) a prefix letter, so "בית" finds
+    "הבית" / "ובבית" and "הבית" finds "בית".
+    """
+    if not is_hebrew(term):
+        return f'"{term}"*'
+
+    forms = [term]
+    if len(term) > 2 and term[0] in HEBREW_PREFIXES:
+        forms.append(term[1:])
+    forms += [p + term for p in HEBREW_PREFIXES + HEBREW_PREFIX_PAIRS]
+    return "(" + " OR ".join(f'"{f}"*' for f in forms) + ")"
+
+
+@timed
+def search(query: str, lang: Optional[str] = None, limit: int = 20) -> List[Dict]:
+    """
+    Full-text search over idioms, translations, half and off fields.
+    Every word of `query` must match (as a word prefix); `lang` ("en" or
+    "he") restricts the search to that language's columns.
+    Returns idiom rows, best match first.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+
+    columns = [c for c in SEARCH_COLUMNS if lang is None or c.endswith("_" + lang)]
+
+    conn = _get_read_conn()
+    cur = conn.cursor()
+
+    if _has_search_index(cur):
+        expr = " AND ".join(_fts_term(t) for t in terms)
+        cur.execute("""
+            SELECT i.*
+            FROM idioms_fts AS f
+            JOIN idioms AS i ON i.id = f.rowid
+            WHERE idioms_fts MATCH ?
+            ORDER BY f.rank, i.id
+            LIMIT ?;
+        """, ("{" + " ".join(columns) + "} : (" + expr + ")", limit))
+    else:
+        # No FTS5: substring match, newest first
+        where = " AND ".join(
+            "(" + " OR ".join(f"{c} LIKE ?" for c in columns) + ")"
+            for _ in terms
+        )
+        params = [f"%{t}%" for t in terms for _ in columns]
+        cur.execute(f"""
+            SELECT *
+            FROM idioms
+            WHERE {where}
+            ORDER BY id DESC
+            LIMIT ?;
+        """, (*params, limit))
+
+    return [dict(r) for r in cur.fetchall()]
+
+
+# ---------------------------------------------------------
+#  BROWSE (KEYSET PAGINATION)
+#  Pages are fetched by id position (WHERE id > ? ORDER BY id LIMIT ?),
+#  so every page costs the same however deep the reader has scrolled.
+#  Filters are pushed down to SQL; the created_by filter walks
+#  idx_idioms_created_by.
+# ---------------------------------------------------------
+BROWSE_PAGE_SIZE = 200
+
+
+def _browse_filter(
+    created_by: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str]
+) -> Tuple[List[str], List]:
+    """WHERE terms and parameters; dates are "YYYY-MM-DD", both inclusive."""
+    where, params = [], []
+    if created_by:
+        where.append("created_by = ?")
+        params.append(created_by)
+    if date_from:
+        where.append("created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("created_at < date(?, '+1 day')")
+        params.append(date_to)
+    return where, params
+
+
+@timed
+def browse_idioms(
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = BROWSE_PAGE_SIZE,
+    created_by: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> List[Dict]:
+    """
+    One page of idioms in id order: the first page, the page right after
+    `after_id`, or the page right before `before_id` (also returned in
+    ascending id order).
+    """
+    where, params = _browse_filter(created_by, date_from, date_to)
+    order = "ASC"
+    if before_id is not None:
+        where.append("id < ?")
+        params.append(before_id)
+        order = "DESC"
+    elif after_id is not None:
+        where.append("id > ?")
+        params.append(after_id)
+
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT *
+        FROM idioms
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY id {order}
+        LIMIT ?;
+    """, params + [limit])
+
+    rows = [dict(r) for r in cur.fetchall()]
+    if order == "DESC":
+        rows.reverse()
+    return rows
+
+
+@timed
+def count_idioms(
+    created_by: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> int:
+    """Number of idioms matching the browse_idioms filters."""
+    where, params = _browse_filter(created_by, date_from, date_to)
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    cur.execute(f"""
         SELECT COUNT(*) AS c
         FROM idioms
+        {"WHERE " + " AND ".join(where) if where else ""};
+    """, params)
+    return cur.fetchone()["c"]
+
+
+@timed
+def get_creators() -> List[str]:
+    """Every distinct created_by, sorted."""
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT created_by FROM user_stats WHERE idioms > 0 ORDER BY created_by;")
+    return [r["created_by"] for r in cur.fetchall()]
+
+
+# ---------------------------------------------------------
+#  USER COUNT / STATS
+# ---------------------------------------------------------
+@timed
+def count_user_idioms(username: str) -> int:
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT idioms AS c
+        FROM user_stats
         WHERE created_by = ?;
     """, (username,))
-    result = cur.fetchone()["c"]
-    conn.close()
-    return result
+    row = cur.fetchone()
+    return row["c"] if row else 0
+
+
+@timed
+def get_user_stats(username: str, days: int = 30) -> Dict:
+    """
+    {"created_by", "idioms", "first_at", "last_at", "today",
+     "daily": [(day, idioms), ...]} for one user; "daily" covers the
+    last `days` UTC days that have contributions, newest first.
+    """
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM user_stats WHERE created_by = ?;", (username,))
+    row = cur.fetchone()
+    stats = dict(row) if row else {"created_by": username, "idioms": 0, "first_at": None, "last_at": None}
+
+    cur.execute("""
+        SELECT day, idioms
+        FROM user_daily
+        WHERE created_by = ? AND day >= date('now', ?)
+        ORDER BY day DESC;
+    """, (username, f"-{max(days, 1) - 1} days"))
+    stats["daily"] = [(r["day"], r["idioms"]) for r in cur.fetchall()]
+
+    cur.execute("SELECT date('now') AS today;")
+    today = cur.fetchone()["today"]
+    stats["today"] = next((n for day, n in stats["daily"] if day == today), 0)
+    return stats
+
+
+@timed
+def leaderboard(limit: int = 20, days: Optional[int] = None) -> List[Dict]:
+    """
+    Top contributors: [{"created_by", "idioms", "first_at", "last_at",
+    "recent"}, ...]. "recent" counts the last `days` UTC days (ranked by
+    it); without `days` it equals "idioms" (all-time ranking).
+    """
+    conn = _get_read_conn()
+    cur = conn.cursor()
+    if days is None:
+        cur.execute("""
+            SELECT *, idioms AS recent
+            FROM user_stats
+            WHERE idioms > 0
+            ORDER BY idioms DESC, created_by
+            LIMIT ?;
+        """, (limit,))
+    else:
+        cur.execute("""
+            SELECT s.*, COALESCE(SUM(d.idioms), 0) AS recent
+            FROM user_stats AS s
+            LEFT JOIN user_daily AS d
+                ON d.created_by = s.created_by AND d.day >= date('now', ?)
+            WHERE s.idioms > 0
+            GROUP BY s.created_by
+            ORDER BY recent DESC, s.idioms DESC, s.created_by
+            LIMIT ?;
+        """, (f"-{max(days, 1) - 1} days", limit))
+    return [dict(r) for r in cur.fetchall()]
 
 
 # ---------------------------------------------------------
 #  DELETE IDIOM
 # ---------------------------------------------------------
+@timed
 def delete_idiom(idiom_id: int) -> bool:
     conn = _get_conn()
     cur = conn.cursor()
+
+    stale = _variant_groups_stale(cur)
+    cur.execute("SELECT group_id FROM variant_groups WHERE idiom_id = ?;", (idiom_id,))
+    group = cur.fetchone()
+
+    cur.execute("DELETE FROM idiom_ngrams WHERE idiom_id = ?;", (idiom_id,))
     cur.execute("DELETE FROM idioms WHERE id = ?;", (idiom_id,))
     affected = cur.rowcount
+
+    # Links went with the idiom (ON DELETE CASCADE): its family may split
+    if stale:
+        _rebuild_variant_groups(cur)
+    elif group is not None:
+        _split_variant_group(cur, group["group_id"])
+
     conn.commit()
-    conn.close()
     return affected > 0
 
 
 # ---------------------------------------------------------
 #  EDIT IDIOM
 # ---------------------------------------------------------
+@timed
 def update_idiom(
     idiom_id: int,
     *,
@@ -239,6 +1789,7 @@ def update_idiom(
     conn = _get_conn()
     cur = conn.cursor()
 
+    key_en, key_he = match_key(idiom_en), match_key(idiom_he)
     cur.execute("""
         UPDATE idioms
         SET
@@ -249,17 +1800,144 @@ def update_idiom(
             half_en = ?,
             half_he = ?,
             off_en = ?,
-            off_he = ?
+            off_he = ?,
+            match_en = ?,
+            match_he = ?,
+            match_rev = match_rev + 1
         WHERE id = ?;
     """, (
         idiom_en, idiom_he,
         translation_en, translation_he,
         half_en, half_he,
         off_en, off_he,
+        key_en, key_he,
         idiom_id
     ))
 
-    conn.commit()
     affected = cur.rowcount
-    conn.close()
+    if affected > 0:
+        _index_ngrams(cur, idiom_id, key_en, key_he)
+
+    conn.commit()
     return affected > 0
+
+
+# ---------------------------------------------------------
+#  BATCH EDIT / DELETE
+# ---------------------------------------------------------
+EDIT_FIELDS = IDIOM_FIELDS[1:]
+
+
+@timed
+def get_idioms(ids: List[int]) -> Dict[int, Dict]:
+    """{id: row} for the ids that exist (read from the shared DB)."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    out = {}
+    ids = sorted(set(ids))
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        cur.execute(
+            f"SELECT * FROM idioms WHERE id IN ({', '.join('?' * len(chunk))});", chunk
+        )
+        out.update((r["id"], dict(r)) for r in cur.fetchall())
+    return out
+
+
+@timed
+def update_idioms_bulk(rows: List[Dict]) -> int:
+    """
+    Apply many edits in one transaction with executemany. Each row is a
+    dict with "id" and every EDIT_FIELDS value (as for update_idiom).
+    Returns the number of idioms updated.
+    """
+    if not rows:
+        return 0
+
+    keys = [(match_key(r["idiom_en"]), match_key(r["idiom_he"])) for r in rows]
+
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE;")
+    try:
+        cur.executemany("""
+            UPDATE idioms
+            SET
+                idiom_en = ?,
+                idiom_he = ?,
+                translation_en = ?,
+                translation_he = ?,
+                half_en = ?,
+                half_he = ?,
+                off_en = ?,
+                off_he = ?,
+                match_en = ?,
+                match_he = ?,
+                match_rev = match_rev + 1
+            WHERE id = ?;
+        """, [
+            tuple(r.get(f) for f in EDIT_FIELDS) + key + (r["id"],)
+            for r, key in zip(rows, keys)
+        ])
+        affected = cur.rowcount
+
+        cur.executemany("DELETE FROM idiom_ngrams WHERE idiom_id = ?;", [(r["id"],) for r in rows])
+        postings = []
+        for r, (key_en, key_he) in zip(rows, keys):
+            postings.extend(("en", g, r["id"]) for g in key_ngrams(key_en))
+            postings.extend(("he", g, r["id"]) for g in key_ngrams(key_he))
+        # Ids that do not exist get no postings
+        cur.executemany("""
+            INSERT OR IGNORE INTO idiom_ngrams (lang, gram, idiom_id)
+            SELECT ?, ?, id FROM idioms WHERE id = ?;
+        """, postings)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return affected
+
+
+@timed
+def delete_idioms_bulk(ids: List[int]) -> int:
+    """
+    Delete many idioms (and their links) in one transaction with
+    executemany. Returns the number of idioms deleted.
+    """
+    ids = sorted(set(ids))
+    if not ids:
+        return 0
+
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE;")
+    try:
+        stale = _variant_groups_stale(cur)
+        groups = set()
+        for idiom_id in ids:
+            cur.execute("SELECT group_id FROM variant_groups WHERE idiom_id = ?;", (idiom_id,))
+            row = cur.fetchone()
+            if row is not None:
+                groups.add(row["group_id"])
+
+        cur.executemany("DELETE FROM idiom_ngrams WHERE idiom_id = ?;", [(i,) for i in ids])
+        cur.executemany("DELETE FROM idioms WHERE id = ?;", [(i,) for i in ids])
+        affected = cur.rowcount
+
+        # Links went with the idioms (ON DELETE CASCADE): families may split
+        if stale or len(groups) > VARIANT_GROUP_REBUILD_AT:
+            _rebuild_variant_groups(cur)
+        else:
+            for group_id in groups:
+                _split_variant_group(cur, group_id)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return affected
@@ -1,62 +1,339 @@
+import argparse
 import csv
+import gzip
+import itertools
+import json
+import os
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 import db
-from settings import get_db_dir
+import profiling
+from profiling import timed
+from settings import get_cache_dir, get_db_dir, load_settings
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, gzip JSONL is always available
+    pa = None
+    pq = None
+
+PROGRESS_EVERY = 500
+
+HEADER = [
+    "id",
+    "created_by",
+    "created_at",
+    "idiom_en",
+    "idiom_he",
+    "translation_en",
+    "translation_he",
+    "half_en",
+    "half_he",
+    "off_en",
+    "off_he",
+    "variants",
+    "variant_group"
+]
+
+# Bumped when the manifest or the CSV layout changes (forces a full export)
+MANIFEST_VERSION = 1
+
+# Rows per Parquet row group
+COLUMNAR_BATCH = 10000
+
+
+def _csv_row(row) -> List:
+    return [
+        row["id"],
+        row["created_by"],
+        row["created_at"],
+        row["idiom_en"],
+        row["idiom_he"],
+        row["translation_en"],
+        row["translation_he"],
+        row["half_en"] or "",
+        row["half_he"] or "",
+        row["off_en"] or "",
+        row["off_he"] or "",
+        row["variants"],
+        row["variant_group"]
+    ]
 
-def export_csv():
-    """
-    Export idioms into <db_dir>/idioms.csv with UTF-8 BOM.
-    Includes variants (comma-separated list).
-    """
 
+def _export_dir() -> Path:
     db_dir = get_db_dir()
     if not db_dir:
         raise RuntimeError("DB directory is not set. Please choose folder in the GUI first.")
+    return Path(db_dir)
+
+
+# ---------------------------------------------------------
+#  MANIFEST
+#  idioms.csv.manifest.json describes the idioms.csv it sits next to:
+#  the last exported id, the change_log seq it is up to date with, and
+#  the file's size/mtime (if the CSV was touched by anything else, the
+#  next export is a full one).
+# ---------------------------------------------------------
+def _manifest_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.name + ".manifest.json")
+
+
+def _read_manifest(csv_path: Path) -> Optional[Dict]:
+    try:
+        with open(_manifest_path(csv_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        stat = csv_path.stat()
+    except (OSError, ValueError):
+        return None
+
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("header") != HEADER
+        or manifest.get("size") != stat.st_size
+        or manifest.get("mtime_ns") != stat.st_mtime_ns
+    ):
+        return None
+    return manifest
+
+
+def _write_manifest(csv_path: Path, last_id: int, change_seq: int, rows: int):
+    stat = csv_path.stat()
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "header": HEADER,
+        "last_id": last_id,
+        "change_seq": change_seq,
+        "rows": rows,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    path = _manifest_path(csv_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
 
-    csv_path = Path(db_dir) / "idioms.csv"
+# ---------------------------------------------------------
+#  CSV EXPORT
+# ---------------------------------------------------------
+class _Counter:
+    """Rows written so far, reported to `progress` every PROGRESS_EVERY rows."""
 
-    # Fetch idioms
-    idioms = db.get_all_idioms()
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.written = 0
 
-    # Prepare CSV
+    def add(self):
+        self.written += 1
+        if self.progress and self.written % PROGRESS_EVERY == 0:
+            self.progress(self.written)
+
+    def done(self):
+        if self.progress:
+            self.progress(self.written)
+
+
+def _write_rows(writer, rows: Iterable, counter: _Counter) -> int:
+    """Write DB rows; returns the largest id written (0 if none)."""
+    last_id = 0
+    for row in rows:
+        writer.writerow(_csv_row(row))
+        last_id = row["id"]
+        counter.add()
+    return last_id
+
+
+def _export_full(csv_path: Path, change_seq: int, counter: _Counter):
     with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
         writer = csv.writer(f)
+        writer.writerow(HEADER)
+        last_id = _write_rows(writer, db.iter_idioms_with_variants(), counter)
+
+    _write_manifest(csv_path, last_id, change_seq, counter.written)
+
+
+def _export_append(csv_path: Path, manifest: Dict, change_seq: int, counter: _Counter):
+    """Only new rows: append them to the end of the file (untouched if there are none)."""
+    rows = db.iter_idioms_with_variants(after_id=manifest["last_id"])
+    first = next(rows, None)
+    if first is None:
+        return
+
+    with open(csv_path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        last_id = _write_rows(writer, itertools.chain([first], rows), counter)
+
+    _write_manifest(
+        csv_path, max(last_id, manifest["last_id"]), change_seq, manifest["rows"] + counter.written
+    )
+
+
+def _export_patch(csv_path: Path, manifest: Dict, changed: List[int], change_seq: int, counter: _Counter):
+    """
+    Changed rows: copy the file, swapping in the fresh version of each
+    changed row, then append the new ones. Only the changed and new rows
+    are read from the DB.
+    """
+    last_id = manifest["last_id"]
+    fresh = {
+        row["id"]: _csv_row(row)
+        for row in db.iter_idioms_with_variants(ids=[i for i in changed if i <= last_id])
+    }
+
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as src, \
+            open(tmp, "w", encoding="utf-8-sig", newline="") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        writer.writerow(next(reader))
+
+        rows = 0
+        for record in reader:
+            idiom_id = int(record[0])
+            if idiom_id in fresh:
+                record = fresh[idiom_id]
+                counter.add()
+            writer.writerow(record)
+            rows += 1
 
-        # Header
-        writer.writerow([
-            "id",
-            "created_by",
-            "created_at",
-            "idiom_en",
-            "idiom_he",
-            "translation_en",
-            "translation_he",
-            "half_en",
-            "half_he",
-            "off_en",
-            "off_he",
-            "variants"
-        ])
-
-        # Rows
-        for row in idioms:
-            vid_list = db.get_variants(row["id"])
-            vid_csv = ",".join(str(v) for v in vid_list)
-
-            writer.writerow([
-                row["id"],
-                row["created_by"],
-                row["created_at"],
-                row["idiom_en"],
-                row["idiom_he"],
-                row["translation_en"],
-                row["translation_he"],
-                row.get("half_en", "") or "",
-                row.get("half_he", "") or "",
-                row.get("off_en", "") or "",
-                row.get("off_he", "") or "",
-                vid_csv
-            ])
+        patched = counter.written
+        new_last = _write_rows(writer, db.iter_idioms_with_variants(after_id=last_id), counter)
+        rows += counter.written - patched
 
+    os.replace(tmp, csv_path)
+    _write_manifest(csv_path, max(new_last, last_id), change_seq, rows)
+
+
+@timed
+def export_csv(progress=None, incremental: bool = False):
+    """
+    Export idioms into <db_dir>/idioms.csv with UTF-8 BOM.
+    Includes variants (comma-separated list of direct links) and the
+    variant group (family id shared by all transitively linked idioms).
+    Rows are written as they stream from a single query, so memory use
+    does not grow with the table.
+
+    incremental: bring the existing file up to date instead of
+    rewriting it. New idioms are appended, edited ones (fields, links,
+    groups) are swapped in while copying the file (only those rows are
+    queried), and nothing is written at all when nothing changed. Deletes, a missing/outdated manifest or a CSV
+    changed by something else fall back to a full export.
+
+    progress: optional callable, called with the number of rows written
+    so far every PROGRESS_EVERY rows and once at the end.
+    """
+
+    csv_path = _export_dir() / "idioms.csv"
+    counter = _Counter(progress)
+
+    # Read the seq before the rows: a change landing in between is
+    # exported now and simply patched again next time
+    change_seq = db.get_change_seq()
+
+    manifest = _read_manifest(csv_path) if incremental else None
+    changes = db.get_changes_since(manifest["change_seq"]) if manifest else None
+
+    if changes is None or changes[0]:
+        _export_full(csv_path, change_seq, counter)
+    elif changes[1]:
+        _export_patch(csv_path, manifest, changes[1], change_seq, counter)
+    else:
+        _export_append(csv_path, manifest, change_seq, counter)
+
+    counter.done()
     return str(csv_path)
+
+
+# ---------------------------------------------------------
+#  COLUMNAR EXPORT
+#  Same rows and columns as the CSV (variants as a list of ids), for
+#  analysis tools: Parquet (zstd) when pyarrow is installed, gzip JSONL
+#  otherwise. Written to a temporary file and swapped in when complete.
+# ---------------------------------------------------------
+def _columnar_record(row) -> Dict:
+    record = dict(zip(HEADER, _csv_row(row)))
+    record["variants"] = [int(v) for v in row["variants"].split(",")] if row["variants"] else []
+    return record
+
+
+def _write_parquet(path: Path, counter: _Counter):
+    fields = [pa.field(name, pa.string()) for name in HEADER]
+    fields[0] = pa.field("id", pa.int64())
+    fields[-2] = pa.field("variants", pa.list_(pa.int64()))
+    fields[-1] = pa.field("variant_group", pa.int64())
+    schema = pa.schema(fields)
+
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch: List[Dict] = []
+        for row in db.iter_idioms_with_variants():
+            batch.append(_columnar_record(row))
+            counter.add()
+            if len(batch) >= COLUMNAR_BATCH:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch or not counter.written:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+def _write_jsonl_gz(path: Path, counter: _Counter):
+    with gzip.open(path, "wt", encoding="utf-8", newline="\n") as f:
+        for row in db.iter_idioms_with_variants():
+            f.write(json.dumps(_columnar_record(row), ensure_ascii=False))
+            f.write("\n")
+            counter.add()
+
+
+@timed
+def export_columnar(progress=None):
+    """
+    Export idioms into <db_dir>/idioms.parquet, or <db_dir>/idioms.jsonl.gz
+    without pyarrow. Returns the path written.
+    progress: as for export_csv.
+    """
+    name = "idioms.parquet" if pq is not None else "idioms.jsonl.gz"
+    path = _export_dir() / name
+    tmp = path.with_name(path.name + ".tmp")
+    counter = _Counter(progress)
+
+    if pq is not None:
+        _write_parquet(tmp, counter)
+    else:
+        _write_jsonl_gz(tmp, counter)
+
+    os.replace(tmp, path)
+    counter.done()
+    return str(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export idioms to <db_dir>/idioms.csv.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only append/patch what changed since the last export")
+    parser.add_argument("--columnar", action="store_true",
+                        help="Also write idioms.parquet (pyarrow) or idioms.jsonl.gz")
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+    profiling.install(args.profile)
+
+    db_dir = get_db_dir()
+    if not db_dir:
+        print("ERROR: DB path not set. Run GUI first.")
+        return
+
+    db.set_db_path(db_dir)
+    db.init_db()
+    if load_settings().get("read_replica"):
+        db.set_read_replica(get_cache_dir())
+    path = export_csv(incremental=args.incremental)
+    columnar_path = export_columnar() if args.columnar else None
+    db.close()
+
+    print(f"CSV exported to: {path}")
+    if columnar_path:
+        print(f"Columnar export written to: {columnar_path}")
+
+
+if __name__ == "__main__":
+    main()
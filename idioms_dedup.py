@@ -0,0 +1,201 @@
+import argparse
+import csv
+import os
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import db
+import settings
+import similarity
+from util import is_english, is_hebrew
+
+
+REVIEW_HEADER = [
+    "id_a", "id_b", "score", "lang",
+    "idiom_en_a", "idiom_he_a",
+    "idiom_en_b", "idiom_he_b",
+]
+
+# Pair = (id_a, id_b, score, lang) with id_a < id_b
+Pair = Tuple[int, int, float, str]
+
+
+# ---------------------------------------------------------
+#   WORKER STATE
+#   Set once per worker by the pool initializer (inherited for free
+#   with fork, pickled once per worker with spawn).
+# ---------------------------------------------------------
+_keys: Dict[str, Dict[int, str]] = {}
+_index: Dict[str, similarity.NGramIndex] = {}
+_params: Dict = {}
+
+
+def _init_worker(keys, index, params):
+    global _keys, _index, _params
+    _keys = keys
+    _index = index
+    _params = params
+
+
+def _pairs_for_chunk(ids: List[int]) -> List[Pair]:
+    """All-pairs within each block: score every id against its candidates with a larger id."""
+    threshold = _params["threshold"]
+    limit = _params["max_candidates"]
+    max_df = _params["max_df"]
+
+    best: Dict[Tuple[int, int], Pair] = {}
+    for lang in ("en", "he"):
+        keys = _keys[lang]
+        index = _index[lang]
+        for a in ids:
+            key_a = keys.get(a)
+            if not key_a:
+                continue
+
+            cands = index.candidates(key_a, limit, max_df=max_df, min_id=a, probe=_params["probe"])
+            if not cands:
+                continue
+
+            scores = similarity.score_many(key_a, {b: keys[b] for b, _ in cands}, threshold)
+            for b, score in scores.items():
+                prev = best.get((a, b))
+                if prev is None or score > prev[2]:
+                    best[(a, b)] = (a, b, score, lang)
+
+    return list(best.values())
+
+
+# ---------------------------------------------------------
+#   JOB
+# ---------------------------------------------------------
+def find_duplicate_pairs(
+    corpus: Dict[int, Dict],
+    *,
+    threshold: float = 0.60,
+    workers: int = 0,
+    chunk_size: int = 500,
+    max_candidates: int = 50,
+    max_df_ratio: float = 0.05,
+    probe: Optional[int] = None,
+) -> List[Pair]:
+    """
+    Blocked all-pairs similarity over the corpus.
+    Blocking: each idiom is only compared with the `max_candidates`
+    idioms sharing the most trigrams with it (per language); trigrams
+    present in more than `max_df_ratio` of the corpus are ignored.
+    `probe` limits the lookup to each idiom's rarest trigrams (faster,
+    lower recall).
+    Returns pairs sorted by score (best first).
+    """
+    keys = {"en": {}, "he": {}}
+    index = {"en": similarity.NGramIndex(), "he": similarity.NGramIndex()}
+    for idiom_id, en, he in similarity.key_entries(corpus):
+        if en and is_english(en):
+            keys["en"][idiom_id] = en
+            index["en"].add(idiom_id, en)
+        if he and is_hebrew(he):
+            keys["he"][idiom_id] = he
+            index["he"].add(idiom_id, he)
+
+    params = {
+        "threshold": threshold,
+        "max_candidates": max_candidates,
+        "max_df": max(50, int(len(corpus) * max_df_ratio)),
+        "probe": probe,
+    }
+
+    ids = sorted(corpus)
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+    best: Dict[Tuple[int, int], Pair] = {}
+
+    def _merge(pairs: List[Pair]):
+        for p in pairs:
+            prev = best.get(p[:2])
+            if prev is None or p[2] > prev[2] or (p[2] == prev[2] and p[3] == "en"):
+                best[p[:2]] = p
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(keys, index, params)
+        for chunk in chunks:
+            _merge(_pairs_for_chunk(chunk))
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(keys, index, params)) as pool:
+            for pairs in pool.imap_unordered(_pairs_for_chunk, chunks):
+                _merge(pairs)
+
+    return sorted(best.values(), key=lambda p: (-p[2], p[0], p[1]))
+
+
+# ---------------------------------------------------------
+#   ENTRY POINT
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate idioms across the whole DB.")
+    parser.add_argument("--threshold", type=float, default=0.60, help="Minimum similarity to report")
+    parser.add_argument("--apply-above", type=float,
+                        help="Link pairs scoring at least this as variants (others go to review)")
+    parser.add_argument("--review-file", help="Default: <db_dir>/dedup_review.csv")
+    parser.add_argument("--workers", type=int, default=0, help="Processes (default: all cores)")
+    parser.add_argument("--max-candidates", type=int, default=50,
+                        help="Idioms compared per idiom and language")
+    parser.add_argument("--probe", type=int,
+                        help="Only look up each idiom's N rarest trigrams (faster, lower recall)")
+    args = parser.parse_args()
+
+    db_dir = settings.get_db_dir()
+    if not db_dir:
+        print("ERROR: DB path not set. Run GUI first.")
+        return
+
+    db.set_db_path(db_dir)
+    db.init_db()
+
+    start = time.perf_counter()
+    corpus = db.get_corpus()
+    pairs = find_duplicate_pairs(
+        corpus,
+        threshold=args.threshold,
+        workers=args.workers,
+        max_candidates=args.max_candidates,
+        probe=args.probe,
+    )
+
+    # Already-linked pairs are not news
+    linked = set(db.get_variant_pairs())
+    pairs = [p for p in pairs if (p[0], p[1]) not in linked]
+
+    to_apply = []
+    to_review = pairs
+    if args.apply_above is not None:
+        to_apply = [p for p in pairs if p[2] >= args.apply_above]
+        to_review = [p for p in pairs if p[2] < args.apply_above]
+
+    if to_apply:
+        db.add_variant_links_bulk([(a, b) for a, b, _, _ in to_apply])
+
+    review_path = Path(args.review_file) if args.review_file else Path(db_dir) / "dedup_review.csv"
+    with open(review_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(REVIEW_HEADER)
+        for a, b, score, lang in to_review:
+            writer.writerow([
+                a, b, round(score, 3), lang,
+                corpus[a]["idiom_en"], corpus[a]["idiom_he"],
+                corpus[b]["idiom_en"], corpus[b]["idiom_he"],
+            ])
+
+    db.close()
+
+    print(f"Scanned {len(corpus)} idioms in {time.perf_counter() - start:.1f}s.")
+    print(f"  candidate pairs (not yet linked): {len(pairs)}")
+    if args.apply_above is not None:
+        print(f"  linked as variants (score >= {args.apply_above}): {len(to_apply)}")
+    print(f"  written for review: {len(to_review)} -> {review_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,51 @@
 import argparse
+from pathlib import Path
+from typing import List, Optional
 import db
 import settings
+from util import parse_ids, read_records, safe_int
+
+
+def collect_ids(id_specs: List[str], path: Optional[Path], fmt: Optional[str]) -> List[int]:
+    """Ids from --id lists and from the "id" column of a CSV/JSONL file."""
+    ids = set()
+    for spec in id_specs:
+        ids.update(parse_ids(spec))
+
+    if path is not None:
+        for rec in read_records(path, fmt):
+            idiom_id = safe_int(str(rec.get("id", "")).strip())
+            if idiom_id <= 0:
+                raise ValueError(f"record without a valid id: {rec}")
+            ids.add(idiom_id)
+
+    return sorted(ids)
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Delete an idiom by ID.")
-    parser.add_argument("--id", required=True, type=int)
+    parser = argparse.ArgumentParser(description="Delete idioms by ID (one, a list, ranges, or a file).")
+    parser.add_argument("--id", action="append", default=[], metavar="IDS",
+                        help='Idioms to delete: "12", "3,7,9" or "100-250" (repeatable)')
+    parser.add_argument("--file", help="CSV or JSONL with an id column")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be deleted, delete nothing")
     args = parser.parse_args()
 
+    if not args.id and not args.file:
+        print("ERROR: Pass --id and/or --file.")
+        return
+
+    path = Path(args.file) if args.file else None
+    if path is not None and not path.exists():
+        print(f"ERROR: File not found: {path}")
+        return
+
+    try:
+        ids = collect_ids(args.id, path, args.format)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+
     db_dir = settings.get_db_dir()
     if not db_dir:
         print("ERROR: DB path not set. Run GUI first.")
@@ -16,10 +54,21 @@ def main():
     db.set_db_path(db_dir)
     db.init_db()
 
-    if db.delete_idiom(args.id):
-        print(f"Deleted idiom #{args.id}")
+    rows = db.get_idioms(ids)
+    missing = [i for i in ids if i not in rows]
+
+    if args.dry_run:
+        for idiom_id in sorted(rows):
+            print(f"#{idiom_id}  {rows[idiom_id]['idiom_en']} | {rows[idiom_id]['idiom_he']}")
+        print(f"Dry run: {len(rows)} idioms would be deleted. Nothing was written.")
     else:
-        print("Idiom not found.")
+        deleted = db.delete_idioms_bulk(sorted(rows))
+        print(f"Deleted {deleted} idioms.")
+    db.close()
+
+    if missing:
+        shown = ", ".join(map(str, missing[:20])) + (" ..." if len(missing) > 20 else "")
+        print(f"  not found: {len(missing)} ({shown})")
 
 
 if __name__ == "__main__":
@@ -1,12 +1,44 @@
 import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
 import db
 import settings
-from util import normalize_text
+from util import normalize_text, parse_ids, read_records, safe_int
+
+
+def collect_edits(id_specs: List[str], fields: Dict[str, Optional[str]],
+                  path: Optional[Path], fmt: Optional[str]) -> Dict[int, Dict[str, str]]:
+    """
+    {id: {field: new value}} from --id lists with field options, then
+    from the edits file (one record per idiom, "id" plus the fields to
+    change; export_csv.py files work, extra columns are ignored).
+    Empty values mean "keep"; later edits of the same field win.
+    """
+    edits: Dict[int, Dict[str, str]] = {}
+    given = {f: v for f, v in fields.items() if v}
+    for spec in id_specs:
+        for idiom_id in parse_ids(spec):
+            edits.setdefault(idiom_id, {}).update(given)
+
+    if path is not None:
+        for rec in read_records(path, fmt):
+            idiom_id = safe_int(str(rec.get("id", "")).strip())
+            if idiom_id <= 0:
+                raise ValueError(f"record without a valid id: {rec}")
+            edits.setdefault(idiom_id, {}).update(
+                (f, rec[f]) for f in db.EDIT_FIELDS if rec.get(f)
+            )
+
+    return edits
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Edit an idiom by ID.")
-    parser.add_argument("--id", required=True, type=int, help="ID of idiom to edit")
+    parser = argparse.ArgumentParser(description="Edit idioms by ID (one, a list, ranges, or a file of edits).")
+    parser.add_argument("--id", action="append", default=[], metavar="IDS",
+                        help='Idioms to edit: "12", "3,7,9" or "100-250" (repeatable)')
+    parser.add_argument("--file", help="CSV or JSONL of edits: an id column plus the fields to change")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change, write nothing")
 
     parser.add_argument("--idiom_en")
     parser.add_argument("--idiom_he")
@@ -19,6 +51,21 @@ def main():
 
     args = parser.parse_args()
 
+    if not args.id and not args.file:
+        print("ERROR: Pass --id and/or --file.")
+        return
+
+    path = Path(args.file) if args.file else None
+    if path is not None and not path.exists():
+        print(f"ERROR: File not found: {path}")
+        return
+
+    try:
+        edits = collect_edits(args.id, {f: getattr(args, f) for f in db.EDIT_FIELDS}, path, args.format)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+
     db_dir = settings.get_db_dir()
     if not db_dir:
         print("ERROR: DB path not set. Run GUI once to choose folder.")
@@ -27,27 +74,37 @@ def main():
     db.set_db_path(db_dir)
     db.init_db()
 
-    row = db.get_idiom(args.id)
-    if not row:
-        print("ERROR: Idiom not found.")
-        return
+    rows = db.get_idioms(list(edits))
 
-    updated = db.update_idiom(
-        args.id,
-        idiom_en=normalize_text(args.idiom_en or row["idiom_en"]),
-        idiom_he=normalize_text(args.idiom_he or row["idiom_he"]),
-        translation_en=normalize_text(args.translation_en or row["translation_en"]),
-        translation_he=normalize_text(args.translation_he or row["translation_he"]),
-        half_en=normalize_text(args.half_en or row["half_en"]),
-        half_he=normalize_text(args.half_he or row["half_he"]),
-        off_en=normalize_text(args.off_en or row["off_en"]),
-        off_he=normalize_text(args.off_he or row["off_he"]),
-    )
-
-    if updated:
-        print(f"Updated idiom #{args.id}")
+    updates = []
+    unchanged = 0
+    missing = [i for i in sorted(edits) if i not in rows]
+    for idiom_id in sorted(rows):
+        row = rows[idiom_id]
+        change = edits[idiom_id]
+        new = {f: normalize_text(change.get(f) or row[f]) for f in db.EDIT_FIELDS}
+        diff = [(f, row[f] or "", new[f]) for f in db.EDIT_FIELDS if (row[f] or "") != new[f]]
+        if not diff:
+            unchanged += 1
+            continue
+
+        updates.append(dict(new, id=idiom_id))
+        if args.dry_run:
+            print(f"#{idiom_id}")
+            for f, old, value in diff:
+                print(f"  {f}: {old!r} -> {value!r}")
+
+    if args.dry_run:
+        print(f"Dry run: {len(updates)} idioms would change. Nothing was written.")
     else:
-        print("No changes applied.")
+        updated = db.update_idioms_bulk(updates)
+        print(f"Updated {updated} idioms.")
+    db.close()
+
+    print(f"  unchanged: {unchanged}")
+    if missing:
+        shown = ", ".join(map(str, missing[:20])) + (" ..." if len(missing) > 20 else "")
+        print(f"  not found: {len(missing)} ({shown})")
 
 
 if __name__ == "__main__":
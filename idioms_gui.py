@@ -1,35 +1,78 @@
+import argparse
+import functools
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import db
+import outbox
+import profiling
 import settings
-import similarity
 from util import normalize_text, required_fields_present, is_hebrew
 from models import IdiomData
-from export_csv import export_csv
+
+# similarity and export_csv are imported on first use (similarity is
+# preloaded on the worker thread once the window is up)
+
+THEME_DIR = os.path.join(os.path.dirname(__file__), "themes")
 
 
 # ---------------------------------------------------------
 #   GUI CLASS
 # ---------------------------------------------------------
 class IdiomGUI:
+    MAX_VARIANT_SUGGESTIONS = 3
+    SUGGEST_DELAY_MS = 150      # typing pause before suggestions are looked up
+    SUGGEST_REFRESH = 2.0       # seconds between corpus refreshes of the index
+    SEARCH_LIMIT = 50
+
     def __init__(self, root):
         self.root = root
         self.root.title("Idiom Manager")
-        self.root.geometry("1000x550")
+        self.root.geometry("1000x650")
         self.root.minsize(900, 500)
 
+        # --------------------------
+        #   BACKGROUND WORKER
+        #   One worker thread runs all DB / similarity work in order;
+        #   results come back through a queue polled with root.after.
+        # --------------------------
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idioms-db")
+        # Browse pages are read on their own thread, so scrolling never
+        # waits behind an export or a similarity check
+        self._browse_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idioms-browse")
+        # Searches: own thread, so a slow save or similarity check never
+        # holds up results while typing
+        self._search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idioms-search")
+        # Live suggestions: own thread, owns the in-memory index
+        self._suggest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idioms-suggest")
+        self._suggestions = None
+        self._suggest_refreshed = 0.0
+        self._suggest_gen = 0
+        self._suggest_after = None
+        self._suggest_future = None
+        self._ui_queue = queue.Queue()
+        self._variant_prompts = deque()
+        self._prompt_open = False
+        self._closing = False
+        # Set below once the DB folder is known (shutdown() runs either way)
+        self._outbox = None
+
         # --------------------------
         #   THEME (Sun Valley local)
         # --------------------------
         style = ttk.Style(self.root)
         self.current_theme = "light"
 
-        # Load themes from local directory
-        theme_path = os.path.join(os.path.dirname(__file__), "themes")
+        # Load the light theme from the local directory; the dark one is
+        # only sourced the first time it is toggled on
+        self._dark_theme_loaded = False
         try:
-            self.root.tk.call("source", os.path.join(theme_path, "sun-valley.tcl"))
-            self.root.tk.call("source", os.path.join(theme_path, "sun-valley-dark.tcl"))
+            self.root.tk.call("source", os.path.join(THEME_DIR, "sun-valley.tcl"))
             style.theme_use("sun-valley")
             ttk.Style().theme_use("sun-valley-light")
             self.current_theme = "light"
@@ -56,6 +99,14 @@ class IdiomGUI:
         db.set_db_path(db_dir)
         db.init_db()
 
+        # Optional local copy of the shared DB for read-only queries
+        if settings.load_settings().get("read_replica"):
+            db.set_read_replica(settings.get_cache_dir())
+
+        # Optional local outbox: inserts return at once, a background
+        # thread pushes them to the shared DB
+        self._outbox = outbox.open_from_settings()
+
         # --------------------------
         #   TOP FRAME (USERNAME)
         # --------------------------
@@ -71,12 +122,26 @@ class IdiomGUI:
         self.theme_button = ttk.Button(top_frame, text="Toggle Theme", command=self.toggle_theme)
         self.theme_button.pack(side="right")
 
+        # --------------------------
+        #   TABS: Add / Browse
+        # --------------------------
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill="both", expand=True, padx=20, pady=(5, 0))
+
+        self.add_tab = ttk.Frame(self.notebook)
+        self.browse_tab = ttk.Frame(self.notebook)
+        self.stats_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.add_tab, text="Add")
+        self.notebook.add(self.browse_tab, text="Browse")
+        self.notebook.add(self.stats_tab, text="Stats")
+        self.notebook.bind("<<NotebookTabChanged>>", self._tab_changed)
+
         # --------------------------
         #   MAIN INPUT AREA
         #   2 rows × 4 columns
         # --------------------------
-        main_frame = ttk.Frame(self.root)
-        main_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        main_frame = ttk.Frame(self.add_tab)
+        main_frame.pack(fill="both", expand=True, pady=10)
 
         # Row 1: English
         self.idiom_en = ttk.Entry(main_frame, font=("Segoe UI", 11))
@@ -116,11 +181,34 @@ class IdiomGUI:
         self.half_he.grid(row=3, column=2, sticky="ew", padx=5, pady=5)
         self.off_he.grid(row=3, column=3, sticky="ew", padx=5, pady=5)
 
+        # --------------------------
+        #   LIVE SUGGESTIONS
+        #   Existing idioms close to what is being typed
+        # --------------------------
+        suggest_frame = ttk.Frame(self.add_tab)
+        suggest_frame.pack(fill="x", pady=(0, 10))
+
+        ttk.Label(suggest_frame, text="Similar existing idioms:").pack(anchor="w")
+        columns = ("id", "score", "idiom_en", "idiom_he")
+        self.suggest_list = ttk.Treeview(
+            suggest_frame, columns=columns, show="headings",
+            height=self.MAX_VARIANT_SUGGESTIONS, selectmode="browse"
+        )
+        for col, title, width in zip(columns, ("ID", "Score", "Idiom (EN)", "Idiom (HE)"), (60, 60, 300, 300)):
+            self.suggest_list.heading(col, text=title)
+            self.suggest_list.column(col, width=width, stretch=col.startswith("idiom"),
+                                     anchor="e" if col.endswith("_he") else "w")
+        self.suggest_list.pack(fill="x")
+        self.suggest_list.bind("<Double-1>", self._suggestion_chosen)
+
+        for entry in (self.idiom_en, self.idiom_he):
+            entry.bind("<KeyRelease>", self._schedule_suggestions)
+
         # --------------------------
         #   ACTION BUTTONS
         # --------------------------
-        btn_frame = ttk.Frame(self.root)
-        btn_frame.pack(fill="x", padx=20)
+        btn_frame = ttk.Frame(self.add_tab)
+        btn_frame.pack(fill="x")
 
         self.add_button = ttk.Button(btn_frame, text="Add Idiom", command=self.add_idiom)
         self.add_button.pack(side="left")
@@ -128,6 +216,53 @@ class IdiomGUI:
         self.export_button = ttk.Button(btn_frame, text="Export CSV", command=self.export_csv_file)
         self.export_button.pack(side="right")
 
+        self.export_progress = ttk.Progressbar(btn_frame, mode="indeterminate", length=160)
+        self.export_status = ttk.Label(btn_frame, text="")
+
+        # --------------------------
+        #   SEARCH
+        # --------------------------
+        search_frame = ttk.Frame(self.add_tab)
+        search_frame.pack(fill="x", pady=(10, 0))
+
+        search_bar = ttk.Frame(search_frame)
+        search_bar.pack(fill="x")
+
+        ttk.Label(search_bar, text="Search:").pack(side="left")
+        self.search_entry = ttk.Entry(search_bar, font=("Segoe UI", 11))
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=10)
+        self.search_entry.bind("<Return>", self._search_pressed)
+
+        self.search_lang = tk.StringVar(value="all")
+        ttk.Combobox(
+            search_bar, textvariable=self.search_lang,
+            values=("all", "en", "he"), width=5, state="readonly"
+        ).pack(side="left")
+
+        ttk.Button(search_bar, text="Search", command=self.search).pack(side="left", padx=(10, 0))
+
+        columns = ("id", "idiom_en", "idiom_he", "translation_en", "translation_he")
+        self.search_results = ttk.Treeview(search_frame, columns=columns, show="headings", height=5)
+        for col, title, width in zip(
+            columns,
+            ("ID", "Idiom (EN)", "Idiom (HE)", "Translation (EN)", "Translation (HE)"),
+            (60, 200, 200, 200, 200)
+        ):
+            self.search_results.heading(col, text=title)
+            self.search_results.column(col, width=width, stretch=col != "id",
+                                       anchor="e" if col.endswith("_he") else "w")
+        self.search_results.bind("<Double-1>", self._search_result_chosen)
+
+        # --------------------------
+        #   BROWSE TAB
+        # --------------------------
+        self._build_browse_tab(self.browse_tab)
+
+        # --------------------------
+        #   STATS TAB
+        # --------------------------
+        self._build_stats_tab(self.stats_tab)
+
         # --------------------------
         #   LOG OUTPUT
         # --------------------------
@@ -141,10 +276,19 @@ class IdiomGUI:
 
         # Keyboard bindings
         self.root.bind("<Return>", self._enter_pressed)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # Initial focus
         self.idiom_en.focus_set()
 
+        self._poll_ui_queue()
+
+        # Build the suggestion index in the background once the window is up
+        self.root.after_idle(lambda: self._run_in_background(
+            self._refresh_suggestions,
+            on_error=self._suggestions_failed, executor=self._suggest_executor
+        ))
+
     # ---------------------------------------------------------
     #   THEME TOGGLE
     # ---------------------------------------------------------
@@ -154,6 +298,9 @@ class IdiomGUI:
             style = ttk.Style()
 
             if self.current_theme == "light":
+                if not self._dark_theme_loaded:
+                    self.root.tk.call("source", os.path.join(THEME_DIR, "sun-valley-dark.tcl"))
+                    self._dark_theme_loaded = True
                 style.theme_use("sun-valley-dark")
                 self.current_theme = "dark"
 
@@ -178,11 +325,562 @@ class IdiomGUI:
             print("Theme switching error:", e)
 
 
+    # ---------------------------------------------------------
+    #   BACKGROUND WORK
+    # ---------------------------------------------------------
+    def _run_in_background(self, fn, *args, on_done=None, on_error=None, executor=None):
+        """
+        Run fn(*args) on the worker thread (or `executor`). on_done(result) /
+        on_error(exc) are called later on the Tk main thread.
+        Returns the Future.
+        """
+        def _done(future):
+            exc = future.exception()
+            if exc is not None:
+                self._ui_queue.put((on_error or self._show_error, exc))
+            elif on_done is not None:
+                self._ui_queue.put((on_done, future.result()))
+
+        future = (executor or self._executor).submit(fn, *args)
+        future.add_done_callback(_done)
+        return future
+
+    def _call_on_ui(self, fn, *args):
+        """Thread-safe: schedule fn(*args) on the Tk main thread."""
+        self._ui_queue.put((lambda a: fn(*a), args))
+
+    def _poll_ui_queue(self):
+        try:
+            while True:
+                callback, value = self._ui_queue.get_nowait()
+                callback(value)
+        except queue.Empty:
+            pass
+        self.root.after(50, self._poll_ui_queue)
+
+    def _show_error(self, exc):
+        self.log(f"ERROR: {exc}")
+        messagebox.showerror("Error", str(exc))
+
+    def _on_close(self):
+        """Window close: warn if idioms still wait for a variant decision."""
+        waiting = len(self._variant_prompts) + self._prompt_open
+        if waiting and not messagebox.askokcancel(
+            "Close Idiom Manager",
+            f"{waiting} idiom(s) still wait for a variant decision.\n"
+            f"Close anyway? They will be saved without a variant link."
+        ):
+            return
+        self._closing = True
+        self.root.destroy()
+
+    def shutdown(self):
+        """
+        Let queued submissions finish, save the idioms still waiting for
+        a variant decision (without a link), then release the DB.
+        """
+        self._browse_executor.shutdown(wait=True, cancel_futures=True)
+        self._search_executor.shutdown(wait=True, cancel_futures=True)
+        self._suggest_executor.shutdown(wait=True, cancel_futures=True)
+        self._executor.shutdown(wait=True)
+
+        # Checks that finished after the window closed never reached the UI
+        waiting = [data for data, _ in self._variant_prompts]
+        while True:
+            try:
+                callback, value = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if callback == self._similarity_checked:
+                waiting.append(value[0])
+
+        for data in waiting:
+            try:
+                self._insert(data, None)
+                print(f"Saved without a variant decision: {data.idiom_en} | {data.idiom_he}")
+            except Exception as e:
+                print(f"ERROR: could not save {data.idiom_en} | {data.idiom_he}: {e}")
+
+        if self._outbox is not None:
+            remaining = self._outbox.stop(flush=True)
+            if remaining:
+                print(f"{remaining} idioms still queued in {self._outbox.path}; "
+                      f"they will be sent next time.")
+        db.close()
+
     # ---------------------------------------------------------
     #   ENTER KEY HANDLER
     # ---------------------------------------------------------
     def _enter_pressed(self, event):
-        self.add_idiom()
+        if self.notebook.select() == str(self.add_tab):
+            self.add_idiom()
+
+    # ---------------------------------------------------------
+    #   LIVE SUGGESTIONS
+    #   Keystrokes restart a SUGGEST_DELAY_MS timer; when it fires, the
+    #   lookup runs on the suggest thread against similarity.SuggestionIndex.
+    #   A newer keystroke cancels a lookup that has not started yet, and
+    #   results of an outdated lookup (generation moved on) are dropped.
+    # ---------------------------------------------------------
+    def _schedule_suggestions(self, event=None):
+        if self._suggest_after is not None:
+            self.root.after_cancel(self._suggest_after)
+        self._suggest_after = self.root.after(self.SUGGEST_DELAY_MS, self._request_suggestions)
+
+    def _request_suggestions(self):
+        self._suggest_after = None
+        text_en = normalize_text(self.idiom_en.get())
+        text_he = normalize_text(self.idiom_he.get())
+
+        self._suggest_gen += 1
+        if self._suggest_future is not None:
+            self._suggest_future.cancel()
+
+        if not text_en and not text_he:
+            self.suggest_list.delete(*self.suggest_list.get_children())
+            return
+
+        self._suggest_future = self._run_in_background(
+            self._find_suggestions, self._suggest_gen, text_en, text_he,
+            on_done=self._show_suggestions,
+            on_error=self._suggestions_failed,
+            executor=self._suggest_executor
+        )
+
+    def _refresh_suggestions(self):
+        """Suggest thread: create / update the index from the corpus cache."""
+        import similarity
+
+        if self._suggestions is None:
+            self._suggestions = similarity.SuggestionIndex()
+        elif time.monotonic() - self._suggest_refreshed < self.SUGGEST_REFRESH:
+            return
+        self._suggestions.refresh(db.get_corpus())
+        self._suggest_refreshed = time.monotonic()
+
+    def _suggestions_failed(self, exc):
+        # Not fatal: the next lookup tries to build the index again
+        self.log(f"Suggestions unavailable: {exc}")
+
+    def _find_suggestions(self, gen, text_en, text_he):
+        """Suggest thread: (generation, matches)."""
+        if gen != self._suggest_gen:
+            return gen, []
+        self._refresh_suggestions()
+        return gen, self._suggestions.suggest(text_en, text_he, k=self.MAX_VARIANT_SUGGESTIONS)
+
+    def _show_suggestions(self, result):
+        gen, matches = result
+        if gen != self._suggest_gen:
+            return
+        self.suggest_list.delete(*self.suggest_list.get_children())
+        for (idiom_id, score, lang), row in matches:
+            self.suggest_list.insert("", "end", values=(idiom_id, f"{score:.2f}", row["idiom_en"], row["idiom_he"]))
+
+    def _clear_suggestions(self):
+        if self._suggest_after is not None:
+            self.root.after_cancel(self._suggest_after)
+            self._suggest_after = None
+        self._suggest_gen += 1
+        self.suggest_list.delete(*self.suggest_list.get_children())
+
+    def _suggestion_chosen(self, event):
+        item = self.suggest_list.focus()
+        if not item:
+            return
+        idiom_id = self.suggest_list.item(item, "values")[0]
+        self.root.clipboard_clear()
+        self.root.clipboard_append(str(idiom_id))
+        self.log(f"Copied idiom ID {idiom_id} to clipboard.")
+
+    # ---------------------------------------------------------
+    #   SEARCH
+    # ---------------------------------------------------------
+    def _search_pressed(self, event):
+        self.search()
+        # Keep Enter from also adding an idiom
+        return "break"
+
+    def search(self):
+        query = normalize_text(self.search_entry.get())
+        if not query:
+            self.search_results.pack_forget()
+            return
+
+        lang = self.search_lang.get()
+        self._run_in_background(
+            db.search, query, None if lang == "all" else lang, self.SEARCH_LIMIT,
+            on_done=self._show_search_results,
+            executor=self._search_executor
+        )
+
+    def _show_search_results(self, rows):
+        self.search_results.delete(*self.search_results.get_children())
+        for row in rows:
+            self.search_results.insert("", "end", values=(
+                row["id"], row["idiom_en"], row["idiom_he"],
+                row["translation_en"], row["translation_he"]
+            ))
+        self.search_results.pack(fill="x", pady=(5, 0))
+
+        if not rows:
+            self.log("Search: no matches.")
+
+    def _search_result_chosen(self, event):
+        item = self.search_results.focus()
+        if not item:
+            return
+        idiom_id = self.search_results.item(item, "values")[0]
+        self.root.clipboard_clear()
+        self.root.clipboard_append(str(idiom_id))
+        self.log(f"Copied idiom ID {idiom_id} to clipboard.")
+
+    # ---------------------------------------------------------
+    #   BROWSE
+    #   The tree only ever holds a window of BROWSE_MAX_PAGES pages.
+    #   Scrolling near either end fetches the neighbouring page (keyset
+    #   pagination, on the browse thread) and drops the page at the far
+    #   end, so the view costs the same at 100 rows or 100k.
+    # ---------------------------------------------------------
+    BROWSE_MAX_PAGES = 3
+    BROWSE_PREFETCH = 0.15  # fetch when within this fraction of either end
+    BROWSE_COLUMNS = ("id", "created_by", "created_at", "idiom_en", "idiom_he", "translation_en", "translation_he")
+
+    def _build_browse_tab(self, parent):
+        self._browse_gen = 0
+        self._browse_filter = {}
+        self._browse_rows = {}
+        self._browse_total = None
+        self._browse_loading = False
+        self._browse_at_start = True
+        self._browse_at_end = True
+        self._browse_opened = False
+
+        bar = ttk.Frame(parent)
+        bar.pack(fill="x", pady=(10, 5))
+
+        ttk.Label(bar, text="Created by:").pack(side="left")
+        self.browse_user = tk.StringVar()
+        self.browse_user_box = ttk.Combobox(bar, textvariable=self.browse_user, width=18)
+        self.browse_user_box.pack(side="left", padx=(5, 15))
+
+        ttk.Label(bar, text="From:").pack(side="left")
+        self.browse_from = ttk.Entry(bar, width=12)
+        self.browse_from.pack(side="left", padx=(5, 10))
+        ttk.Label(bar, text="To:").pack(side="left")
+        self.browse_to = ttk.Entry(bar, width=12)
+        self.browse_to.pack(side="left", padx=5)
+        ttk.Label(bar, text="(YYYY-MM-DD)").pack(side="left")
+
+        ttk.Button(bar, text="Apply", command=self.browse_reload).pack(side="left", padx=(10, 0))
+
+        self.browse_status = ttk.Label(bar, text="")
+        self.browse_status.pack(side="right")
+
+        for widget in (self.browse_user_box, self.browse_from, self.browse_to):
+            widget.bind("<Return>", self._browse_filter_entered)
+        self.browse_user_box.bind("<<ComboboxSelected>>", lambda e: self.browse_reload())
+
+        tree_frame = ttk.Frame(parent)
+        tree_frame.pack(fill="both", expand=True)
+
+        self.browse_tree = ttk.Treeview(tree_frame, columns=self.BROWSE_COLUMNS, show="headings", selectmode="browse")
+        for col, title, width in zip(
+            self.BROWSE_COLUMNS,
+            ("ID", "Created by", "Created at", "Idiom (EN)", "Idiom (HE)", "Translation (EN)", "Translation (HE)"),
+            (60, 100, 130, 180, 180, 180, 180)
+        ):
+            self.browse_tree.heading(col, text=title)
+            self.browse_tree.column(col, width=width, stretch=col not in ("id", "created_by", "created_at"),
+                                    anchor="e" if col.endswith("_he") else "w")
+
+        scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.browse_tree.yview)
+        self.browse_tree.configure(yscrollcommand=functools.partial(self._browse_scrolled, scroll))
+        scroll.pack(side="right", fill="y")
+        self.browse_tree.pack(side="left", fill="both", expand=True)
+
+        self.browse_tree.bind("<Double-1>", self._browse_row_chosen)
+        self.browse_tree.bind("<Return>", self._browse_row_chosen)
+
+    def _tab_changed(self, event):
+        if self.notebook.select() == str(self.stats_tab):
+            self.stats_reload()
+
+        # The first visit loads the first page and the list of users
+        if self.notebook.select() == str(self.browse_tab) and not self._browse_opened:
+            self._browse_opened = True
+            self._run_in_background(
+                db.get_creators,
+                on_done=lambda users: self.browse_user_box.configure(values=[""] + users),
+                executor=self._browse_executor
+            )
+            self.browse_reload()
+
+    def _browse_filter_entered(self, event):
+        self.browse_reload()
+        # Keep Enter from reaching the Add tab
+        return "break"
+
+    def browse_reload(self):
+        """Start over from the first page with the current filters."""
+        filters = {
+            "created_by": normalize_text(self.browse_user.get()) or None,
+            "date_from": normalize_text(self.browse_from.get()) or None,
+            "date_to": normalize_text(self.browse_to.get()) or None,
+        }
+        for key in ("date_from", "date_to"):
+            if filters[key]:
+                try:
+                    datetime.strptime(filters[key], "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Invalid date", f"Dates are YYYY-MM-DD, got: {filters[key]}")
+                    return
+
+        # Pages of an earlier filter still in flight are ignored
+        self._browse_gen += 1
+        self._browse_filter = filters
+        self._browse_rows.clear()
+        self._browse_total = None
+        self.browse_tree.delete(*self.browse_tree.get_children())
+        self._browse_at_start = True
+        self._browse_at_end = False
+        self.browse_status.configure(text="Loading...")
+
+        self._browse_fetch("reset")
+        self._run_in_background(
+            functools.partial(db.count_idioms, **filters),
+            on_done=functools.partial(self._browse_counted, self._browse_gen),
+            executor=self._browse_executor
+        )
+
+    def _browse_fetch(self, where):
+        """Queue the page after the window ("next"/"reset") or before it ("prev")."""
+        self._browse_loading = True
+        children = self.browse_tree.get_children()
+        kwargs = dict(self._browse_filter)
+        if where == "next" and children:
+            kwargs["after_id"] = int(children[-1])
+        elif where == "prev":
+            kwargs["before_id"] = int(children[0])
+
+        self._run_in_background(
+            functools.partial(db.browse_idioms, **kwargs),
+            on_done=functools.partial(self._browse_page_loaded, self._browse_gen, where),
+            on_error=self._browse_failed,
+            executor=self._browse_executor
+        )
+
+    def _browse_failed(self, exc):
+        self._browse_loading = False
+        self.browse_status.configure(text="")
+        self._show_error(exc)
+
+    def _browse_values(self, row):
+        return tuple(row[c] for c in self.BROWSE_COLUMNS)
+
+    def _browse_page_loaded(self, gen, where, rows):
+        if gen != self._browse_gen:
+            return
+        self._browse_loading = False
+        tree = self.browse_tree
+        full_page = len(rows) >= db.BROWSE_PAGE_SIZE
+        limit = self.BROWSE_MAX_PAGES * db.BROWSE_PAGE_SIZE
+
+        if where == "prev":
+            for row in reversed(rows):
+                tree.insert("", 0, iid=str(row["id"]), values=self._browse_values(row))
+                self._browse_rows[row["id"]] = row
+            # Rows went in above the view: scroll by as much to stay put
+            tree.yview_scroll(len(rows), "units")
+            self._browse_at_start = not full_page
+
+            excess = len(tree.get_children()) - limit
+            if excess > 0:
+                dropped = tree.get_children()[-excess:]
+                tree.delete(*dropped)
+                for iid in dropped:
+                    self._browse_rows.pop(int(iid), None)
+                self._browse_at_end = False
+        else:
+            for row in rows:
+                tree.insert("", "end", iid=str(row["id"]), values=self._browse_values(row))
+                self._browse_rows[row["id"]] = row
+            self._browse_at_end = not full_page
+
+            excess = len(tree.get_children()) - limit
+            if excess > 0:
+                dropped = tree.get_children()[:excess]
+                tree.delete(*dropped)
+                for iid in dropped:
+                    self._browse_rows.pop(int(iid), None)
+                tree.yview_scroll(-excess, "units")
+                self._browse_at_start = False
+
+        self._browse_show_range()
+
+    def _browse_counted(self, gen, count):
+        if gen != self._browse_gen:
+            return
+        self._browse_total = count
+        self._browse_show_range()
+
+    def _browse_show_range(self):
+        children = self.browse_tree.get_children()
+        if not children:
+            self.browse_status.configure(text="Loading..." if self._browse_loading else "No idioms match.")
+            return
+        text = f"#{children[0]} – #{children[-1]}"
+        if self._browse_total is not None:
+            text += f"  ({self._browse_total} matching)"
+        self.browse_status.configure(text=text)
+
+    def _browse_scrolled(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        if self._browse_loading:
+            return
+        first, last = float(first), float(last)
+        if last >= 1 - self.BROWSE_PREFETCH and not self._browse_at_end:
+            self._browse_fetch("next")
+        elif first <= self.BROWSE_PREFETCH and not self._browse_at_start:
+            self._browse_fetch("prev")
+
+    def _browse_row_chosen(self, event):
+        item = self.browse_tree.focus()
+        if not item:
+            return
+        row = self._browse_rows.get(int(item))
+        if row is not None:
+            self._edit_dialog(row)
+        return "break"
+
+    def _edit_dialog(self, row):
+        """Edit one idiom; saving goes through db.update_idiom."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Edit idiom #{row['id']}")
+        dialog.transient(self.root)
+
+        frame = ttk.Frame(dialog, padding=15)
+        frame.pack(fill="both", expand=True)
+        frame.columnconfigure(1, weight=1)
+
+        ttk.Label(frame, text=f"Created by {row['created_by']} at {row['created_at']}").grid(
+            row=0, column=0, columnspan=2, sticky="w", pady=(0, 10)
+        )
+
+        entries = {}
+        labels = ("Idiom (EN)*", "Idiom (HE)*", "Translation (EN)*", "Translation (HE)*",
+                  "Half (EN)", "Half (HE)", "Off (EN)", "Off (HE)")
+        for r, (field, label) in enumerate(zip(db.EDIT_FIELDS, labels), start=1):
+            ttk.Label(frame, text=label).grid(row=r, column=0, sticky="w", padx=(0, 10))
+            entry = ttk.Entry(frame, width=50, font=("Segoe UI", 11),
+                              justify="right" if field.endswith("_he") else "left")
+            entry.insert(0, row[field] or "")
+            entry.grid(row=r, column=1, sticky="ew", pady=3)
+            entries[field] = entry
+
+        def _save():
+            data = IdiomData(created_by=row["created_by"], **{f: e.get() for f, e in entries.items()})
+            data.normalize()
+            if not required_fields_present(
+                data.idiom_en, data.idiom_he, data.translation_en, data.translation_he
+            ):
+                messagebox.showerror("Missing fields", "English and Hebrew idiom + translations are required.",
+                                     parent=dialog)
+                return
+
+            fields = {f: getattr(data, f) for f in db.EDIT_FIELDS}
+            self._run_in_background(
+                functools.partial(db.update_idiom, row["id"], **fields),
+                on_done=functools.partial(self._browse_row_saved, row["id"], fields)
+            )
+            dialog.destroy()
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=len(labels) + 1, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        ttk.Button(buttons, text="Save", command=_save).pack(side="left")
+        ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side="right")
+
+        dialog.bind("<Return>", lambda e: _save())
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+        entries["idiom_en"].focus_set()
+        dialog.grab_set()
+
+    def _browse_row_saved(self, idiom_id, fields, updated):
+        if not updated:
+            self.log(f"Idiom #{idiom_id} no longer exists.")
+            return
+
+        row = self._browse_rows.get(idiom_id)
+        if row is not None:
+            row.update(fields)
+            self.browse_tree.item(str(idiom_id), values=self._browse_values(row))
+        self.log(f"Updated idiom #{idiom_id}: {fields['idiom_en']} | {fields['idiom_he']}")
+
+    # ---------------------------------------------------------
+    #   STATS
+    #   Read from the trigger-maintained user_stats / user_daily
+    #   tables: a few indexed reads, however large the DB.
+    # ---------------------------------------------------------
+    STATS_PERIODS = {"All time": None, "Last 7 days": 7, "Last 30 days": 30}
+    LEADERBOARD_SIZE = 20
+
+    def _build_stats_tab(self, parent):
+        bar = ttk.Frame(parent)
+        bar.pack(fill="x", pady=(10, 5))
+
+        self.stats_user = ttk.Label(bar, text="")
+        self.stats_user.pack(side="left")
+
+        ttk.Button(bar, text="Refresh", command=self.stats_reload).pack(side="right")
+        self.stats_period = tk.StringVar(value="All time")
+        period_box = ttk.Combobox(
+            bar, textvariable=self.stats_period,
+            values=tuple(self.STATS_PERIODS), width=12, state="readonly"
+        )
+        period_box.pack(side="right", padx=10)
+        period_box.bind("<<ComboboxSelected>>", lambda e: self.stats_reload())
+
+        columns = ("rank", "created_by", "recent", "idioms", "first_at", "last_at")
+        self.stats_board = ttk.Treeview(parent, columns=columns, show="headings", height=12)
+        for col, title, width in zip(
+            columns,
+            ("#", "User", "In period", "All time", "First contribution", "Last contribution"),
+            (40, 180, 90, 90, 160, 160)
+        ):
+            self.stats_board.heading(col, text=title)
+            self.stats_board.column(col, width=width, stretch=col == "created_by",
+                                    anchor="w" if col == "created_by" else "e")
+        self.stats_board.pack(fill="both", expand=True)
+
+    def stats_reload(self):
+        username = normalize_text(self.username_entry.get())
+        days = self.STATS_PERIODS[self.stats_period.get()]
+
+        def _load():
+            mine = db.get_user_stats(username) if username else None
+            return mine, db.leaderboard(self.LEADERBOARD_SIZE, days=days)
+
+        self._run_in_background(_load, on_done=self._show_stats, executor=self._browse_executor)
+
+    def _show_stats(self, result):
+        mine, board = result
+        if mine is None:
+            self.stats_user.configure(text="Enter a username to see your own numbers.")
+        elif not mine["idioms"]:
+            self.stats_user.configure(text=f"{mine['created_by']}: no idioms yet.")
+        else:
+            self.stats_user.configure(
+                text=f"{mine['created_by']}: {mine['idioms']} idioms, {mine['today']} today, "
+                     f"{sum(n for _, n in mine['daily'])} in the last 30 days "
+                     f"(since {(mine['first_at'] or '')[:10]})"
+            )
+
+        self.stats_board.delete(*self.stats_board.get_children())
+        for rank, row in enumerate(board, start=1):
+            self.stats_board.insert("", "end", values=(
+                rank, row["created_by"], row["recent"], row["idioms"],
+                (row["first_at"] or "")[:16], (row["last_at"] or "")[:16]
+            ))
 
     # ---------------------------------------------------------
     #   LOGGING
@@ -195,14 +893,41 @@ class IdiomGUI:
     #   EXPORT CSV
     # ---------------------------------------------------------
     def export_csv_file(self):
-        try:
-            path = export_csv()
-            self.log(f"CSV exported to: {path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"CSV export failed:\n{e}")
+        self.export_button.state(["disabled"])
+        self.export_status.configure(text="Exporting...")
+        self.export_status.pack(side="right", padx=10)
+        self.export_progress.pack(side="right")
+        self.export_progress.start(10)
+
+        def _progress(rows):
+            self._call_on_ui(self.export_status.configure, {"text": f"Exporting... {rows} rows"})
+
+        from export_csv import export_csv
+
+        self._run_in_background(
+            functools.partial(export_csv, _progress, incremental=True),
+            on_done=self._export_finished,
+            on_error=self._export_failed
+        )
+
+    def _export_finished(self, path):
+        self._export_reset()
+        self.log(f"CSV exported to: {path}")
+
+    def _export_failed(self, exc):
+        self._export_reset()
+        messagebox.showerror("Error", f"CSV export failed:\n{exc}")
+
+    def _export_reset(self):
+        self.export_progress.stop()
+        self.export_progress.pack_forget()
+        self.export_status.pack_forget()
+        self.export_button.state(["!disabled"])
 
     # ---------------------------------------------------------
     #   MAIN INSERT LOGIC
+    #   Runs on the UI thread only long enough to read and validate
+    #   the fields; the rest is queued on the worker thread.
     # ---------------------------------------------------------
     def add_idiom(self):
         username = normalize_text(self.username_entry.get())
@@ -210,11 +935,6 @@ class IdiomGUI:
             messagebox.showerror("Error", "Username is required.")
             return
 
-        # Save username persistently
-        s = settings.load_settings()
-        s["last_username"] = username
-        settings.save_settings(s)
-
         data = IdiomData(
             created_by=username,
 
@@ -240,54 +960,115 @@ class IdiomGUI:
             messagebox.showerror("Missing fields", "English and Hebrew idiom + translations are required.")
             return
 
-        # -------------------------
-        #   SIMILARITY CHECK
-        # -------------------------
-        all_rows = {r["id"]: r for r in db.get_all_idioms()}
+        # Fields are free for the next idiom right away
+        self._clear_fields()
+        self.log(f"Queued: {data.idiom_en} | {data.idiom_he}")
+
+        self._run_in_background(self._check_similarity, data, on_done=self._similarity_checked)
+
+    def _check_similarity(self, data):
+        """Worker thread: persist username, look for a possible variant."""
+        import similarity
+
+        s = settings.load_settings()
+        s["last_username"] = data.created_by
+        settings.save_settings(s)
+
+        corpus = db.get_corpus()
+        candidates = db.get_match_candidates(data.idiom_en, data.idiom_he)
 
-        match = similarity.find_best_match(
-            idioms=all_rows,
+        matches = similarity.find_top_matches(
+            idioms=corpus,
             new_en=data.idiom_en,
-            new_he=data.idiom_he
+            new_he=data.idiom_he,
+            k=self.MAX_VARIANT_SUGGESTIONS,
+            candidates=candidates
         )
 
-        if match:
-            idiom_id, score, lang = match
-            existing = db.get_idiom(idiom_id)
-
-            answer = messagebox.askyesno(
-                "Possible Variant Detected",
-                f"This idiom looks similar to:\n"
-                f"EN: {existing['idiom_en']}\n"
-                f"HE: {existing['idiom_he']}\n\n"
-                f"Similarity: {round(score, 3)}\n\n"
-                f"Is this a variant?"
-            )
+        return data, [(m, corpus[m[0]]) for m in matches]
 
-            if answer:
-                # Insert row
-                new_id = db.add_idiom(
-                    created_by=data.created_by,
-                    idiom_en=data.idiom_en,
-                    idiom_he=data.idiom_he,
-                    translation_en=data.translation_en,
-                    translation_he=data.translation_he,
-                    half_en=data.half_en,
-                    half_he=data.half_he,
-                    off_en=data.off_en,
-                    off_he=data.off_he,
-                )
-                # Bidirectional linking
-                db.add_variant_link(idiom_id, new_id)
+    def _similarity_checked(self, result):
+        data, matches = result
+        if not matches:
+            self._run_in_background(self._insert, data, None, on_done=self._inserted)
+            return
 
-                self.log(f"Added VARIANT #{new_id} linked to #{idiom_id}.")
-                self._clear_fields()
-                return
+        # One variant prompt at a time, in submission order
+        self._variant_prompts.append((data, matches))
+        if not self._prompt_open:
+            self._next_variant_prompt()
 
-        # -------------------------
-        #   NORMAL INSERT
-        # -------------------------
-        new_id = db.add_idiom(
+    def _next_variant_prompt(self):
+        if not self._variant_prompts or self._closing:
+            # When closing, shutdown() saves what is left
+            self._prompt_open = False
+            return
+
+        self._prompt_open = True
+        data, matches = self._variant_prompts.popleft()
+
+        variant_of = self._ask_variant(data, matches)
+
+        self._run_in_background(
+            self._insert, data, variant_of,
+            on_done=self._inserted
+        )
+        self._next_variant_prompt()
+
+    def _ask_variant(self, data, matches):
+        """
+        Modal dialog listing the closest existing idioms.
+        Returns the id to link the new idiom to, or None.
+        """
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Possible Variant Detected")
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+
+        frame = ttk.Frame(dialog, padding=15)
+        frame.pack(fill="both", expand=True)
+
+        ttk.Label(
+            frame,
+            text=f"This idiom looks similar to existing idioms:\n"
+                 f"EN: {data.idiom_en}\n"
+                 f"HE: {data.idiom_he}"
+        ).pack(anchor="w", pady=(0, 10))
+
+        chosen = tk.IntVar(value=matches[0][0][0])
+        for (idiom_id, score, lang), existing in matches:
+            ttk.Radiobutton(
+                frame,
+                variable=chosen,
+                value=idiom_id,
+                text=f"#{idiom_id}  ({round(score, 3)})\n"
+                     f"EN: {existing['idiom_en']}\n"
+                     f"HE: {existing['idiom_he']}"
+            ).pack(anchor="w", pady=2)
+
+        result = {"id": None}
+
+        def _link():
+            result["id"] = chosen.get()
+            dialog.destroy()
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill="x", pady=(10, 0))
+        ttk.Button(buttons, text="Link as variant", command=_link).pack(side="left")
+        ttk.Button(buttons, text="Not a variant", command=dialog.destroy).pack(side="right")
+
+        dialog.bind("<Return>", lambda e: _link())
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+        dialog.grab_set()
+        dialog.focus_set()
+        self.root.wait_window(dialog)
+
+        return result["id"]
+
+    def _insert(self, data, variant_of):
+        """Worker thread: insert (and link) the idiom, fetch the user count."""
+        writer = self._outbox or db
+        new_id = writer.add_idiom(
             created_by=data.created_by,
             idiom_en=data.idiom_en,
             idiom_he=data.idiom_he,
@@ -299,14 +1080,34 @@ class IdiomGUI:
             off_he=data.off_he,
         )
 
-        self.log(f"Added IDIOM #{new_id}: {data.idiom_en} | {data.idiom_he}")
+        if variant_of is not None:
+            # Bidirectional linking
+            writer.add_variant_link(variant_of, new_id)
+            return data, new_id, variant_of, None
+
+        count = db.count_user_idioms(data.created_by)
+        if self._outbox is not None:
+            count += self._outbox.pending(data.created_by)
+        return data, new_id, None, count
+
+    def _inserted(self, result):
+        data, new_id, variant_of, count = result
+
+        # The next lookup re-reads the corpus, so the new idiom is suggested
+        self._suggest_refreshed = 0.0
+
+        # Outbox ids are provisional (negative) until synced
+        label = f"#{new_id}" if new_id > 0 else f"#{new_id} (queued for sync)"
+
+        if variant_of is not None:
+            self.log(f"Added VARIANT {label} linked to #{variant_of}.")
+            return
+
+        self.log(f"Added IDIOM {label}: {data.idiom_en} | {data.idiom_he}")
 
         # User milestone
-        count = db.count_user_idioms(username)
         if count % 10 == 0:
-            self.log(f"🎉 {username}, you’ve added {count} idioms so far!")
-
-        self._clear_fields()
+            self.log(f"🎉 {data.created_by}, you’ve added {count} idioms so far!")
 
     # ---------------------------------------------------------
     #   CLEAR INPUT FIELDS (NOT USERNAME)
@@ -324,6 +1125,7 @@ class IdiomGUI:
         self.off_en.delete(0, "end")
         self.off_he.delete(0, "end")
 
+        self._clear_suggestions()
         self.idiom_en.focus_set()
 
 
@@ -331,6 +1133,11 @@ class IdiomGUI:
 #   ENTRY POINT
 # ---------------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Idiom Manager GUI.")
+    profiling.add_argument(parser)
+    profiling.install(parser.parse_args().profile)
+
     root = tk.Tk()
     app = IdiomGUI(root)
     root.mainloop()
+    app.shutdown()
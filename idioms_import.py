@@ -0,0 +1,302 @@
+import argparse
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import db
+import settings
+import similarity
+from util import normalize_text, read_records, required_fields_present, safe_int
+from models import Corpus, IdiomData
+
+
+TEXT_FIELDS = (
+    "idiom_en", "idiom_he",
+    "translation_en", "translation_he",
+    "half_en", "half_he",
+    "off_en", "off_he",
+)
+
+REVIEW_HEADER = [
+    "source_id",
+    "created_by",
+    *TEXT_FIELDS,
+    "match_id",
+    "match_score",
+    "match_lang",
+]
+
+
+def parse_variants(value) -> List[int]:
+    """Variants column: "3,17" in CSV, "3,17" or [3, 17] in JSONL."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).split(",")
+    ids = [safe_int(str(v).strip()) for v in items]
+    return [i for i in ids if i > 0]
+
+
+# ---------------------------------------------------------
+#   IMPORTER
+# ---------------------------------------------------------
+class Importer:
+    """
+    Streams records into the DB in chunks of `chunk_size`.
+
+    on_match policy for records similar to an existing idiom:
+        "ignore" -> no similarity check (fastest)
+        "skip"   -> record is not imported
+        "review" -> record is not imported, written to the review file
+        "link"   -> imported and linked when score >= link_threshold,
+                    otherwise written to the review file
+
+    Similarity is checked against the idioms in the DB when the import
+    started (loaded into memory once, with an in-memory trigram index),
+    never against rows of the same file: those are linked through the
+    variants column. So what gets imported does not depend on chunk_size.
+
+    Each record is only scored against the idioms sharing the most
+    trigrams with it plus exact duplicates, so the cost per record
+    stays close to flat. full_scan=True scores every existing idiom
+    instead (no missed matches, but O(N) per record; see README).
+    """
+
+    def __init__(
+        self,
+        *,
+        default_user: str,
+        on_match: str = "skip",
+        threshold: float = 0.60,
+        link_threshold: float = 0.90,
+        chunk_size: int = 1000,
+        review_path: Optional[Path] = None,
+        full_scan: bool = False,
+    ):
+        self.default_user = default_user
+        self.on_match = on_match
+        self.threshold = threshold
+        self.link_threshold = link_threshold
+        self.chunk_size = chunk_size
+        self.review_path = review_path
+        self.full_scan = full_scan
+
+        self._review_file = None
+        self._review_writer = None
+
+        # (source_id, data, created_at, link_to) per pending record
+        self._chunk: List[Tuple[Optional[int], IdiomData, Optional[str], Optional[int]]] = []
+        self._id_map: Dict[int, int] = {}
+        self._file_variants: List[Tuple[int, List[int]]] = []
+        self._match_links: List[Tuple[int, int]] = []
+
+        # Idioms present before the import, for the similarity check
+        self._existing: Optional[Corpus] = None
+        self._index: Optional[similarity.SuggestionIndex] = None
+
+        self.stats = {
+            "read": 0,
+            "imported": 0,
+            "invalid": 0,
+            "skipped": 0,
+            "review": 0,
+            "linked": 0,
+            "variant_links": 0,
+            "unresolved_variants": 0,
+        }
+
+    # ----- review file -----
+    def _review(self, source_id, data: IdiomData, match: Tuple[int, float, str]):
+        if self._review_writer is None:
+            if self.review_path is None:
+                raise RuntimeError("A review file is required for this on-match policy.")
+            self._review_file = open(self.review_path, "w", encoding="utf-8-sig", newline="")
+            self._review_writer = csv.writer(self._review_file)
+            self._review_writer.writerow(REVIEW_HEADER)
+
+        match_id, score, lang = match
+        self._review_writer.writerow([
+            source_id or "",
+            data.created_by,
+            *(getattr(data, f) for f in TEXT_FIELDS),
+            match_id,
+            round(score, 3),
+            lang,
+        ])
+        self.stats["review"] += 1
+
+    # ----- per record -----
+    def add(self, rec: Dict):
+        self.stats["read"] += 1
+
+        data = IdiomData(
+            created_by=rec.get("created_by") or self.default_user,
+            **{f: str(rec.get(f) or "") for f in TEXT_FIELDS},
+        )
+        data.normalize()
+
+        if not required_fields_present(
+            data.created_by, data.idiom_en, data.idiom_he, data.translation_en, data.translation_he
+        ):
+            self.stats["invalid"] += 1
+            return
+
+        source_id = safe_int(str(rec.get("id") or ""), default=0) or None
+        link_to = None
+
+        if self.on_match != "ignore":
+            if self._existing is None:
+                self._existing = db.load_corpus()
+                if not self.full_scan:
+                    self._index = similarity.SuggestionIndex()
+                    self._index.refresh(self._existing)
+
+            candidates = None
+            if not self.full_scan:
+                candidates = self._index.candidates(data.idiom_en, data.idiom_he)
+
+            match = similarity.find_best_match(
+                self._existing, data.idiom_en, data.idiom_he,
+                threshold_en=self.threshold, threshold_he=self.threshold,
+                candidates=candidates
+            )
+            if match:
+                if self.on_match == "skip":
+                    self.stats["skipped"] += 1
+                    return
+                if self.on_match == "link" and match[1] >= self.link_threshold:
+                    link_to = match[0]
+                else:
+                    self._review(source_id, data, match)
+                    return
+
+        variants = parse_variants(rec.get("variants"))
+        if source_id is not None and variants:
+            self._file_variants.append((source_id, variants))
+
+        created_at = normalize_text(str(rec.get("created_at") or "")) or None
+        self._chunk.append((source_id, data, created_at, link_to))
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._chunk:
+            return
+
+        rows = []
+        for _, data, created_at, _ in self._chunk:
+            row = {f: getattr(data, f) for f in TEXT_FIELDS}
+            row["created_by"] = data.created_by
+            row["created_at"] = created_at
+            rows.append(row)
+
+        new_ids = db.add_idioms_bulk(rows)
+
+        for (source_id, _, _, link_to), new_id in zip(self._chunk, new_ids):
+            if source_id is not None:
+                self._id_map[source_id] = new_id
+            if link_to is not None:
+                self._match_links.append((link_to, new_id))
+
+        self.stats["imported"] += len(new_ids)
+        self._chunk = []
+
+    def finish(self):
+        """Flush the last chunk and rebuild variant links."""
+        self.flush()
+
+        pairs = set()
+        for source_id, variants in self._file_variants:
+            a = self._id_map[source_id]
+            for v in variants:
+                b = self._id_map.get(v)
+                if b is None:
+                    self.stats["unresolved_variants"] += 1
+                elif a != b:
+                    pairs.add((min(a, b), max(a, b)))
+
+        self.stats["variant_links"] = len(pairs)
+        self.stats["linked"] = len(self._match_links)
+        pairs.update(self._match_links)
+
+        if pairs:
+            db.add_variant_links_bulk(sorted(pairs))
+
+        if self._review_file is not None:
+            self._review_file.close()
+
+
+# ---------------------------------------------------------
+#   ENTRY POINT
+# ---------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import idioms from CSV or JSONL.")
+    parser.add_argument("path", help="CSV (export_csv.py format) or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from file extension")
+    parser.add_argument("--user", help="created_by for records without one (default: last GUI username)")
+    parser.add_argument("--on-match", choices=["ignore", "skip", "review", "link"], default="skip",
+                        help="What to do with records similar to an existing idiom")
+    parser.add_argument("--threshold", type=float, default=0.60, help="Similarity threshold")
+    parser.add_argument("--link-threshold", type=float, default=0.90,
+                        help="Minimum score to auto-link with --on-match link")
+    parser.add_argument("--review-file", help="Default: <input>.review.csv")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--full-scan", action="store_true",
+                        help="Compare every record with every existing idiom (misses nothing, slow on large DBs)")
+    parser.add_argument("--workers", type=int,
+                        help="Processes for --full-scan on large DBs (default: \"parallel_workers\" in settings.json, else 1)")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"ERROR: File not found: {path}")
+        return
+
+    db_dir = settings.get_db_dir()
+    if not db_dir:
+        print("ERROR: DB path not set. Run GUI first.")
+        return
+
+    default_user = normalize_text(args.user or settings.load_settings().get("last_username", ""))
+    if not default_user:
+        print("ERROR: No username. Pass --user.")
+        return
+
+    db.set_db_path(db_dir)
+    db.init_db()
+    similarity.set_parallel(args.workers or settings.load_settings().get("parallel_workers", 1))
+
+    review_path = Path(args.review_file) if args.review_file else path.with_suffix(".review.csv")
+
+    importer = Importer(
+        default_user=default_user,
+        on_match=args.on_match,
+        threshold=args.threshold,
+        link_threshold=args.link_threshold,
+        chunk_size=args.chunk_size,
+        review_path=review_path,
+        full_scan=args.full_scan,
+    )
+
+    for rec in read_records(path, args.format):
+        importer.add(rec)
+    importer.finish()
+    db.close()
+
+    s = importer.stats
+    print(f"Read {s['read']} records, imported {s['imported']}.")
+    print(f"  invalid (missing required fields): {s['invalid']}")
+    if args.on_match != "ignore":
+        print(f"  skipped as similar: {s['skipped']}")
+        print(f"  auto-linked to existing idioms: {s['linked']}")
+        if s["review"]:
+            print(f"  sent to review file: {s['review']} -> {review_path}")
+    print(f"  variant links from file: {s['variant_links']}")
+    if s["unresolved_variants"]:
+        print(f"  variant ids not found in file: {s['unresolved_variants']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
+import argparse
 import db
+import outbox
+import profiling
 import settings
 import similarity
-from util import normalize_text, required_fields_present
+from util import normalize_text, required_fields_present, safe_int
 from models import IdiomData
 
 
@@ -11,6 +14,10 @@ def cli_prompt(prompt: str) -> str:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Add idioms from the terminal.")
+    profiling.add_argument(parser)
+    profiling.install(parser.parse_args().profile)
+
     # Ensure DB is ready
     db_dir = settings.get_db_dir()
     if not db_dir:
@@ -19,6 +26,8 @@ def main():
 
     db.set_db_path(db_dir)
     db.init_db()
+    box = outbox.open_from_settings()
+    writer = box or db
 
     print("=== Idiom Manager CLI ===")
     print("Enter 'q' or Ctrl+C to quit.\n")
@@ -70,21 +79,28 @@ def main():
             data.normalize()
 
             # Variant detection
-            all_rows = {r["id"]: r for r in db.get_all_idioms()}
-            match = similarity.find_best_match(all_rows, data.idiom_en, data.idiom_he)
-
-            if match:
-                idiom_id, score, lang = match
-                row = db.get_idiom(idiom_id)
-
-                print("\nPossible variant found:")
-                print(f"  EN: {row['idiom_en']}")
-                print(f"  HE: {row['idiom_he']}")
-                print(f"  Similarity: {round(score,3)}")
-                ans = cli_prompt("Is this a variant? (y/n): ").lower()
+            corpus = db.get_corpus()
+            candidates = db.get_match_candidates(data.idiom_en, data.idiom_he)
+            matches = similarity.find_top_matches(
+                corpus, data.idiom_en, data.idiom_he, k=3, candidates=candidates
+            )
 
-                if ans.startswith("y"):
-                    new_id = db.add_idiom(
+            if matches:
+                print("\nPossible variants found:")
+                for n, (idiom_id, score, lang) in enumerate(matches, 1):
+                    row = corpus[idiom_id]
+                    print(f"  [{n}] #{idiom_id}  Similarity: {round(score,3)}")
+                    print(f"      EN: {row['idiom_en']}")
+                    print(f"      HE: {row['idiom_he']}")
+
+                prompt = "Is this a variant? (y/n): " if len(matches) == 1 \
+                    else f"Variant of which? (1-{len(matches)}, or n): "
+                ans = cli_prompt(prompt).lower()
+                choice = 1 if ans.startswith("y") else safe_int(ans)
+
+                if 1 <= choice <= len(matches):
+                    idiom_id = matches[choice - 1][0]
+                    new_id = writer.add_idiom(
                         created_by=data.created_by,
                         idiom_en=data.idiom_en,
                         idiom_he=data.idiom_he,
@@ -95,12 +111,12 @@ def main():
                         off_en=data.off_en,
                         off_he=data.off_he,
                     )
-                    db.add_variant_link(idiom_id, new_id)
-                    print(f"✅ Added VARIANT #{new_id} linked to #{idiom_id}")
+                    writer.add_variant_link(idiom_id, new_id)
+                    print(f"✅ Added VARIANT #{new_id} linked to #{idiom_id}" + (" (queued)" if new_id < 0 else ""))
                     continue
 
             # Normal insert
-            new_id = db.add_idiom(
+            new_id = writer.add_idiom(
                 created_by=username,
                 idiom_en=data.idiom_en,
                 idiom_he=data.idiom_he,
@@ -111,9 +127,11 @@ def main():
                 off_en=data.off_en,
                 off_he=data.off_he,
             )
-            print(f"✅ Added IDIOM #{new_id}")
+            print(f"✅ Added IDIOM #{new_id}" + (" (queued)" if new_id < 0 else ""))
 
             count = db.count_user_idioms(username)
+            if box is not None:
+                count += box.pending(username)
             if count % 10 == 0:
                 print(f"🎉 {username}, you’ve added {count} idioms so far!")
 
@@ -123,6 +141,12 @@ def main():
         except Exception as e:
             print("❌ ERROR:", e)
 
+    if box is not None:
+        remaining = box.stop(flush=True)
+        if remaining:
+            print(f"{remaining} idioms still queued in {box.path}; they will be sent next time.")
+    db.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,36 @@
+import argparse
+import db
+import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search idioms, translations, half and off fields.")
+    parser.add_argument("query", nargs="+", help="Words to look for (prefixes match too)")
+    parser.add_argument("--lang", choices=("en", "he"), help="Only search this language's fields")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    db_dir = settings.get_db_dir()
+    if not db_dir:
+        print("ERROR: DB path not set. Run GUI first.")
+        return
+
+    db.set_db_path(db_dir)
+    db.init_db()
+    if settings.load_settings().get("read_replica"):
+        db.set_read_replica(settings.get_cache_dir())
+
+    rows = db.search(" ".join(args.query), lang=args.lang, limit=args.limit)
+    db.close()
+
+    if not rows:
+        print("No matches.")
+        return
+
+    for row in rows:
+        print(f"#{row['id']}  {row['idiom_en']} | {row['idiom_he']}")
+        print(f"      {row['translation_en']} | {row['translation_he']}")
+
+
+if __name__ == "__main__":
+    main()
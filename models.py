@@ -1,6 +1,10 @@
-from dataclasses import dataclass
+import bisect
+from array import array
+from collections.abc import ItemsView, Mapping, ValuesView
+from dataclasses import dataclass, fields
 from datetime import datetime
-from util import normalize_text
+from typing import Dict, Iterable, List, Optional, Sequence
+from util import match_key, normalize_many
 
 
 @dataclass
@@ -17,15 +21,9 @@ class IdiomData:
 
     def normalize(self):
         """Normalize all text fields."""
-        self.created_by = normalize_text(self.created_by)
-        self.idiom_en = normalize_text(self.idiom_en)
-        self.idiom_he = normalize_text(self.idiom_he)
-        self.translation_en = normalize_text(self.translation_en)
-        self.translation_he = normalize_text(self.translation_he)
-        self.half_en = normalize_text(self.half_en)
-        self.half_he = normalize_text(self.half_he)
-        self.off_en = normalize_text(self.off_en)
-        self.off_he = normalize_text(self.off_he)
+        names = [f.name for f in fields(self)]
+        for name, value in zip(names, normalize_many(getattr(self, n) for n in names)):
+            setattr(self, name, value)
 
     def to_db_tuple(self):
         """Return data in form compatible with DB insertion."""
@@ -41,3 +39,124 @@ class IdiomData:
             self.off_en,
             self.off_he,
         )
+
+
+# ---------------------------------------------------------
+#  COMPACT CORPUS
+#  The idioms the matching code scans, stored column-wise: an
+#  array('q') of ids (ascending) and one list of strings per loaded
+#  column, instead of an 11-key dict per row. It still reads like the
+#  old {id: row} dict: corpus[id]["idiom_en"], corpus.items(), len().
+#  Rows are CorpusRow views made on access.
+# ---------------------------------------------------------
+class CorpusRow(Mapping):
+    """Read-only view of one corpus row: "id" plus the loaded columns."""
+
+    __slots__ = ("_corpus", "_pos")
+
+    def __init__(self, corpus: "Corpus", pos: int):
+        self._corpus = corpus
+        self._pos = pos
+
+    def __getitem__(self, name: str):
+        if name == "id":
+            return self._corpus.ids[self._pos]
+        return self._corpus.columns[name][self._pos]
+
+    def __iter__(self):
+        yield "id"
+        yield from self._corpus.columns
+
+    def __len__(self) -> int:
+        return len(self._corpus.columns) + 1
+
+    def __repr__(self) -> str:
+        return f"CorpusRow({dict(self)!r})"
+
+
+class _CorpusItems(ItemsView):
+    def __iter__(self):
+        corpus = self._mapping
+        for pos, idiom_id in enumerate(corpus.ids):
+            yield idiom_id, CorpusRow(corpus, pos)
+
+
+class _CorpusValues(ValuesView):
+    def __iter__(self):
+        corpus = self._mapping
+        for pos in range(len(corpus.ids)):
+            yield CorpusRow(corpus, pos)
+
+
+class Corpus(Mapping):
+    """
+    {id: CorpusRow} mapping over parallel columns, in id order.
+    Grows only by appending larger ids; anything else means building a
+    new Corpus (so a corpus handed out earlier only ever gains rows).
+    """
+
+    __slots__ = ("ids", "columns")
+
+    def __init__(self, columns: Sequence[str]):
+        self.ids = array("q")
+        self.columns: Dict[str, List[Optional[str]]] = {c: [] for c in columns}
+
+    def append(self, row: Sequence):
+        """Add one (id, *column values) row; its id must be the largest so far."""
+        idiom_id = row[0]
+        if self.ids and idiom_id <= self.ids[-1]:
+            raise ValueError(f"corpus ids must grow: {idiom_id} after {self.ids[-1]}")
+        # Columns first: a row counts (len, ids) only once it is complete,
+        # so readers on other threads can slice up to len() safely
+        for values, value in zip(self.columns.values(), row[1:]):
+            values.append(value)
+        self.ids.append(idiom_id)
+
+    def extend(self, rows: Iterable[Sequence]):
+        for row in rows:
+            self.append(row)
+
+    def _position(self, idiom_id) -> int:
+        pos = bisect.bisect_left(self.ids, idiom_id)
+        if pos == len(self.ids) or self.ids[pos] != idiom_id:
+            return -1
+        return pos
+
+    def __getitem__(self, idiom_id: int) -> CorpusRow:
+        pos = self._position(idiom_id)
+        if pos < 0:
+            raise KeyError(idiom_id)
+        return CorpusRow(self, pos)
+
+    def __contains__(self, idiom_id) -> bool:
+        return isinstance(idiom_id, int) and self._position(idiom_id) >= 0
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def items(self):
+        return _CorpusItems(self)
+
+    def values(self):
+        return _CorpusValues(self)
+
+    def match_keys(self, lang: str, start: int = 0, end: Optional[int] = None) -> List[str]:
+        """
+        Match keys of one language for positions start..end (default:
+        to the current size): the stored match_<lang> column, computed
+        from idiom_<lang> where it is missing (not loaded, or NULL in
+        the DB).
+        """
+        if end is None:
+            end = len(self.ids)
+        stored = self.columns.get(f"match_{lang}")
+        if stored is None:
+            return [match_key(text) for text in self.columns[f"idiom_{lang}"][start:end]]
+        texts = self.columns[f"idiom_{lang}"]
+        return [
+            key if key is not None else match_key(texts[pos])
+            for pos, key in enumerate(stored[start:end], start)
+        ]
@@ -0,0 +1,285 @@
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import db
+import settings
+from db import IDIOM_FIELDS
+
+# ---------------------------------------------------------
+#  LOCAL WRITE OUTBOX
+#  Writes land in a small SQLite file on the local disk (instant, never
+#  blocked by the Drive sync client) and get provisional ids: -1, -2, ...
+#  A background thread flushes them into the shared idioms.db in one
+#  transaction per batch (db.add_batch), retrying while the shared file
+#  is locked, and remembers which shared id each provisional id became.
+#
+#  Enable with "use_outbox": true in settings.json.
+#  Pending idioms are not visible to variant detection or exports until
+#  they are flushed.
+# ---------------------------------------------------------
+
+FLUSH_INTERVAL = 2.0        # seconds between flushes while idle
+BUSY_RETRIES = 5            # attempts per flush while the shared DB is locked
+BUSY_BACKOFF = 0.2          # first retry delay, doubled each attempt
+MAX_IDLE_BACKOFF = 60.0     # longest wait after repeated failed flushes
+
+
+def is_busy_error(exc: Exception) -> bool:
+    """SQLITE_BUSY / SQLITE_LOCKED: someone else holds the shared DB."""
+    msg = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ("locked" in msg or "busy" in msg)
+
+
+class Outbox:
+    """
+    Local queue of idioms and variant links waiting for the shared DB.
+    Thread-safe; start() runs the background flusher.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[Exception] = None
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        columns = ",\n".join(f"{f} TEXT" for f in IDIOM_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS pending_idioms (
+                    local_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    {columns}
+                );
+            """)
+            # Negative ids are provisional (-local_id), positive ones shared
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_links (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id1 INTEGER NOT NULL,
+                    id2 INTEGER NOT NULL
+                );
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS id_map (
+                    local_id INTEGER PRIMARY KEY,
+                    shared_id INTEGER NOT NULL
+                );
+            """)
+            # The batch being flushed: token and the rows it covers
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS flush_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+
+    # ---------------------------------------------------------
+    #  WRITES (instant, local)
+    # ---------------------------------------------------------
+    def add_idiom(self, **fields) -> int:
+        """Queue an idiom (db.add_idiom arguments). Returns its provisional id (< 0)."""
+        names = ", ".join(IDIOM_FIELDS)
+        marks = ", ".join("?" * len(IDIOM_FIELDS))
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"INSERT INTO pending_idioms ({names}) VALUES ({marks});",
+                tuple(fields.get(f) for f in IDIOM_FIELDS)
+            )
+            local_id = cur.lastrowid
+        self._wake.set()
+        return -local_id
+
+    def add_variant_link(self, id1: int, id2: int):
+        """Queue a variant link; either id may be provisional."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO pending_links (id1, id2) VALUES (?, ?);", (id1, id2))
+        self._wake.set()
+
+    # ---------------------------------------------------------
+    #  STATE
+    # ---------------------------------------------------------
+    def pending(self, created_by: Optional[str] = None) -> int:
+        """Idioms not yet in the shared DB (optionally by one user)."""
+        with self._lock:
+            if created_by is None:
+                cur = self._conn.execute("SELECT COUNT(*) FROM pending_idioms;")
+            else:
+                cur = self._conn.execute(
+                    "SELECT COUNT(*) FROM pending_idioms WHERE created_by = ?;", (created_by,)
+                )
+            return cur.fetchone()[0]
+
+    def resolve(self, idiom_id: int) -> Optional[int]:
+        """Shared id of `idiom_id`: itself if not provisional, None if not flushed yet."""
+        if idiom_id > 0:
+            return idiom_id
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT shared_id FROM id_map WHERE local_id = ?;", (-idiom_id,)
+            ).fetchone()
+        return row["shared_id"] if row else None
+
+    # ---------------------------------------------------------
+    #  FLUSH
+    # ---------------------------------------------------------
+    def _batch(self) -> Tuple[str, int, int]:
+        """
+        (token, last local_id, last link seq) of the batch to flush.
+        Reused until it is confirmed, so a retry after an unknown outcome
+        sends the very same batch under the same token.
+        """
+        with self._lock, self._conn:
+            state = dict(self._conn.execute("SELECT key, value FROM flush_state;").fetchall())
+            if state:
+                return state["token"], int(state["max_local"]), int(state["max_seq"])
+
+            max_local = self._conn.execute(
+                "SELECT COALESCE(MAX(local_id), 0) FROM pending_idioms;"
+            ).fetchone()[0]
+            max_seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM pending_links;"
+            ).fetchone()[0]
+            token = uuid.uuid4().hex
+            self._conn.executemany(
+                "INSERT INTO flush_state (key, value) VALUES (?, ?);",
+                [("token", token), ("max_local", str(max_local)), ("max_seq", str(max_seq))]
+            )
+            return token, max_local, max_seq
+
+    def _read_batch(self, max_local: int, max_seq: int):
+        with self._lock:
+            idioms = self._conn.execute(
+                "SELECT * FROM pending_idioms WHERE local_id <= ? ORDER BY local_id;", (max_local,)
+            ).fetchall()
+            links = self._conn.execute(
+                "SELECT id1, id2 FROM pending_links WHERE seq <= ? ORDER BY seq;", (max_seq,)
+            ).fetchall()
+            id_map = dict(self._conn.execute("SELECT local_id, shared_id FROM id_map;").fetchall())
+        return idioms, links, id_map
+
+    def flush(self) -> int:
+        """
+        Push every pending idiom and link to the shared DB in one
+        transaction, retrying with backoff while it is locked.
+        Returns the number of idioms flushed; raises if the shared DB
+        stayed locked (the batch stays queued).
+        """
+        with self._flush_lock:
+            token, max_local, max_seq = self._batch()
+            idioms, links, id_map = self._read_batch(max_local, max_seq)
+            if not idioms and not links:
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM flush_state;")
+                return 0
+
+            rows: List[Dict] = []
+            position: Dict[int, int] = {}
+            for r in idioms:
+                position[r["local_id"]] = len(rows)
+                rows.append({f: r[f] for f in ("created_at",) + IDIOM_FIELDS})
+
+            def _remap(i):
+                # Provisional ids: this batch -> -(position + 1), earlier batches -> shared id
+                if i > 0:
+                    return i
+                if -i in position:
+                    return -(position[-i] + 1)
+                return id_map[-i]
+
+            pairs = [(_remap(l["id1"]), _remap(l["id2"])) for l in links]
+
+            delay = BUSY_BACKOFF
+            for attempt in range(BUSY_RETRIES):
+                try:
+                    new_ids = db.add_batch(rows, pairs, token=token)
+                    break
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                        raise
+                    time.sleep(delay)
+                    delay *= 2
+
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO id_map (local_id, shared_id) VALUES (?, ?);",
+                    [(r["local_id"], new_id) for r, new_id in zip(idioms, new_ids)]
+                )
+                self._conn.execute("DELETE FROM pending_idioms WHERE local_id <= ?;", (max_local,))
+                self._conn.execute("DELETE FROM pending_links WHERE seq <= ?;", (max_seq,))
+                self._conn.execute("DELETE FROM flush_state;")
+
+            return len(new_ids)
+
+    # ---------------------------------------------------------
+    #  BACKGROUND FLUSHER
+    # ---------------------------------------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="idioms-outbox", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        wait = self.flush_interval
+        while not self._stop.is_set():
+            self._wake.wait(wait)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+                self.last_error = None
+                wait = self.flush_interval
+            except Exception as e:
+                # Keep the batch; back off while the shared DB is unavailable
+                self.last_error = e
+                wait = min(max(wait, self.flush_interval) * 2, MAX_IDLE_BACKOFF)
+
+    def stop(self, flush: bool = True) -> int:
+        """
+        Stop the flusher and close the outbox; with flush=True, try one
+        last flush first. Returns the number of idioms still queued.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        if flush:
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = e
+        remaining = self.pending()
+        with self._lock:
+            self._conn.close()
+        return remaining
+
+
+def outbox_path() -> Path:
+    """Local outbox file, next to settings.json (never in the shared folder)."""
+    return settings.SETTINGS_FILE.with_name("outbox.db")
+
+
+def open_from_settings() -> Optional[Outbox]:
+    """Started Outbox when settings.json has "use_outbox": true, else None."""
+    if not settings.load_settings().get("use_outbox"):
+        return None
+    box = Outbox(outbox_path())
+    box.start()
+    return box
@@ -0,0 +1,295 @@
+import atexit
+import functools
+import inspect
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+# ---------------------------------------------------------
+#  LATENCY INSTRUMENTATION
+#  db.py and similarity.py decorate their entry points with @timed.
+#  While disabled (the default) a decorated call costs one flag check;
+#  once enable()d, every call is counted into a per-operation latency
+#  histogram. install() wires this to the --profile command-line flag.
+# ---------------------------------------------------------
+
+# Histogram bucket upper bounds, in seconds (the last one catches the rest)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+_enabled = False
+_lock = threading.Lock()
+
+
+class OpStats:
+    """Call count, total/max latency and histogram of one operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (max for the last bucket)."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max)
+        return self.max
+
+
+_stats: Dict[str, OpStats] = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def record(name: str, seconds: float):
+    with _lock:
+        op = _stats.get(name)
+        if op is None:
+            op = _stats[name] = OpStats()
+        op.add(seconds)
+
+
+def snapshot() -> Dict[str, OpStats]:
+    """Copy of the collected stats, {operation: OpStats}."""
+    with _lock:
+        out = {}
+        for name, op in _stats.items():
+            copy = OpStats()
+            copy.count, copy.total, copy.max = op.count, op.total, op.max
+            copy.buckets = list(op.buckets)
+            out[name] = copy
+        return out
+
+
+# ---------------------------------------------------------
+#  DECORATOR / CONTEXT MANAGER
+# ---------------------------------------------------------
+def timed(fn):
+    """
+    Record every call of fn as "<module>.<qualname>" while enabled.
+    Generator functions are timed over the time spent producing items,
+    not the time the caller spends between them.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    if inspect.isgeneratorfunction(fn):
+        def _timed_gen(gen):
+            spent = 0.0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(gen)
+                    except StopIteration:
+                        spent += time.perf_counter() - start
+                        return
+                    spent += time.perf_counter() - start
+                    yield item
+            finally:
+                record(name, spent)
+
+        @functools.wraps(fn)
+        def gen_wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            return _timed_gen(fn(*args, **kwargs))
+
+        return gen_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """
+    Time a block as operation `name`:
+        with profiling.span("db.commit"):
+            ...
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+# ---------------------------------------------------------
+#  REPORT
+# ---------------------------------------------------------
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+def summary() -> str:
+    """Table of every operation, slowest total first (times in ms)."""
+    stats = snapshot()
+    if not stats:
+        return "No timed operations recorded."
+
+    width = max(len(name) for name in stats)
+    header = f"{'operation':<{width}}  {'calls':>7}  {'total':>10}  {'mean':>8}  {'p50':>8}  {'p95':>8}  {'max':>8}"
+    lines = [header, "-" * len(header)]
+    for name, op in sorted(stats.items(), key=lambda kv: -kv[1].total):
+        lines.append(
+            f"{name:<{width}}  {op.count:>7}  {_ms(op.total):>10}  {_ms(op.total / op.count):>8}"
+            f"  {_ms(op.percentile(0.5)):>8}  {_ms(op.percentile(0.95)):>8}  {_ms(op.max):>8}"
+        )
+
+    bounds = ["<=" + (_ms(b) if b != float("inf") else "inf") for b in BUCKETS]
+    lines += ["", "Latency histogram (ms):", f"{'':<{width}}  " + " ".join(f"{b:>8}" for b in bounds)]
+    for name, op in sorted(stats.items()):
+        lines.append(f"{name:<{width}}  " + " ".join(f"{n:>8}" for n in op.buckets))
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------
+#  --profile SUPPORT
+# ---------------------------------------------------------
+# cProfile / pstats are only imported when --profile asks for them
+_profiles: List["cProfile.Profile"] = []
+
+
+def _start_cprofile():
+    import cProfile
+
+    main = cProfile.Profile()
+    _profiles.append(main)
+    main.enable()
+
+    if sys.version_info < (3, 12):
+        # Before 3.12 a profiler only sees the thread that enabled it:
+        # give every thread started from now on (e.g. the GUI's DB
+        # worker) its own, merged at exit
+        def _per_thread(*_):
+            profile = cProfile.Profile()
+            _profiles.append(profile)
+            profile.enable()
+
+        threading.setprofile(_per_thread)
+
+
+def _dump_cprofile(path: str):
+    import pstats
+
+    threading.setprofile(None)
+    stats = None
+    for profile in _profiles:
+        profile.disable()
+        try:
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        except TypeError:
+            # A thread that never ran Python code under the profiler
+            pass
+    if stats is not None:
+        stats.dump_stats(path)
+
+
+def install(target: Optional[str]):
+    """
+    Handle a --profile flag: enable timing and report at interpreter exit.
+      target ""        summary to stderr
+      target "x.prof"  also run cProfile over the whole session, saved there
+      other target     summary written to that file
+    None leaves profiling off.
+    """
+    if target is None:
+        return
+
+    enable()
+    cprofile_path = target if target.endswith(".prof") else None
+    if cprofile_path:
+        _start_cprofile()
+
+    def _report():
+        if cprofile_path:
+            _dump_cprofile(cprofile_path)
+        text = summary()
+        if target and not cprofile_path:
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            print(f"Profile summary written to {target}", file=sys.stderr)
+        else:
+            print(text, file=sys.stderr)
+            if cprofile_path:
+                print(f"cProfile data written to {cprofile_path}", file=sys.stderr)
+
+    atexit.register(_report)
+
+
+def add_argument(parser):
+    """Add the standard --profile [PATH] option to an argparse parser."""
+    parser.add_argument(
+        "--profile", nargs="?", const="", metavar="PATH",
+        help="Time DB and similarity calls; print a summary at exit "
+             "(or write it to PATH; a .prof PATH also saves cProfile data)"
+    )
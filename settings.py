@@ -27,6 +27,11 @@ def get_db_dir() -> str:
     return settings.get("db_dir", "")
 
 
+def get_cache_dir() -> str:
+    """Local folder for per-machine caches such as the read replica (next to settings.json)."""
+    return str(SETTINGS_FILE.with_name("cache"))
+
+
 def set_db_dir(path: str):
     """Save new DB directory into settings.json."""
     settings = load_settings()
@@ -1,36 +1,540 @@
+import atexit
+import bisect
 import difflib
-from typing import Optional, Tuple, Dict
-from util import normalize_text, is_hebrew, is_english
+import heapq
+import itertools
+import os
+from collections import Counter
+from multiprocessing import Pool
+from typing import Iterable, Optional, Set, Tuple, Dict, List
+from models import Corpus
+from profiling import timed
+from util import match_key, is_hebrew, is_english, char_ngrams
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # rapidfuzz is optional, difflib is always available
+    fuzz = None
+    process = None
+
+
+# ---------------------------------------------------------
+#  SCORER BACKENDS
+# ---------------------------------------------------------
+#  "difflib"   -> pure-Python SequenceMatcher, one pair at a time
+#  "rapidfuzz" -> one batched call per language column
+#
+#  In compat mode the rapidfuzz scores are only used to reject pairs:
+#  the Indel ratio of rapidfuzz is never lower than SequenceMatcher's
+#  ratio, so every pair that can pass the threshold survives and is
+#  re-scored with difflib. Scores and results stay identical to the
+#  difflib backend. With compat off the rapidfuzz score (0-100) is
+#  divided by 100 and used as-is.
+# ---------------------------------------------------------
+
+BACKENDS = ("difflib", "rapidfuzz")
+
+_backend = "rapidfuzz" if process is not None else "difflib"
+_compat = True
+
+
+def set_backend(name: str, compat: bool = True):
+    """Select the scorer backend ("difflib" or "rapidfuzz")."""
+    global _backend, _compat
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown similarity backend: {name}")
+    if name == "rapidfuzz" and process is None:
+        raise RuntimeError("rapidfuzz is not installed.")
+
+    _backend = name
+    _compat = compat
+
+
+def get_backend() -> str:
+    return _backend
 
 
 # ---------------------------------------------------------
 #  INTERNAL HELPERS
 # ---------------------------------------------------------
 
-def _similarity(a: str, b: str) -> float:
+def row_key(row: Dict, lang: str) -> str:
+    """Stored match key of a row, computed when missing."""
+    key = row.get(f"match_{lang}")
+    if key is None:
+        key = match_key(row[f"idiom_{lang}"])
+    return key
+
+
+def key_entries(
+    idioms: Dict[int, Dict],
+    use_en: bool = True,
+    use_he: bool = True,
+    start: int = 0,
+    end: Optional[int] = None
+) -> List[Tuple[int, Optional[str], Optional[str]]]:
     """
-    Compute similarity ratio using difflib.SequenceMatcher.
-    Returns a number between 0 and 1.
+    [(id, key_en, key_he), ...] for the rows of `idioms` at positions
+    start..end (default: up to its current size); a key is None when
+    its language is not used.
+    A Corpus is read column-wise, without building row views. Rows
+    another thread appends meanwhile are left out, never half read.
     """
-    a = normalize_text(a)
-    b = normalize_text(b)
+    if end is None:
+        end = len(idioms)
+    if isinstance(idioms, Corpus):
+        size = max(end - start, 0)
+        return list(zip(
+            idioms.ids[start:end],
+            idioms.match_keys("en", start, end) if use_en else itertools.repeat(None, size),
+            idioms.match_keys("he", start, end) if use_he else itertools.repeat(None, size),
+        ))
+    return [
+        (row["id"],
+         row_key(row, "en") if use_en else None,
+         row_key(row, "he") if use_he else None)
+        for row in list(idioms.values())[start:end]
+    ]
+
+
+class _CascadeScorer:
+    """
+    difflib ratio of a fixed query against many texts, with cheap upper
+    bounds tried first so most hopeless pairs never reach ratio():
+      1. length bound    2*min(la, lb) / (la + lb)   (= real_quick_ratio)
+      2. LCS bound       2*LCS(a, b) / (la + lb)
+      3. SequenceMatcher.ratio()
+    ratio() counts the characters of its matching blocks, which form a
+    common subsequence, so neither bound is ever below the exact score
+    (same arithmetic as ratio()). The LCS is computed bit-parallel
+    (Hyyrö), one pass over the text with the query as a bit mask; it
+    rejects far more pairs than the character histogram (quick_ratio)
+    at about the same cost.
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        self.len_q = len(query)
+        self.full = (1 << self.len_q) - 1
+        # Bit i of masks[ch] is set when query[i] == ch
+        self.masks: Dict[str, int] = {}
+        for i, ch in enumerate(query):
+            self.masks[ch] = self.masks.get(ch, 0) | (1 << i)
+        # Same argument order as ratio(query, text): ratio() is not symmetric
+        self.matcher = difflib.SequenceMatcher(None, query)
+
+    def _lcs(self, text: str) -> int:
+        masks = self.masks
+        full = self.full
+        v = full
+        for ch in text:
+            u = v & masks.get(ch, 0)
+            v = ((v + u) | (v - u)) & full
+        return self.len_q - bin(v).count("1")
+
+    def score(self, text: str, floor: float, above: Optional[float] = None) -> Optional[float]:
+        """
+        Return ratio(query, text) if it is >= floor and (when given)
+        strictly > above; otherwise None, usually without computing it.
+        """
+        total = self.len_q + len(text)
+
+        bound = 2.0 * min(self.len_q, len(text)) / total
+        if bound < floor or (above is not None and bound <= above):
+            return None
+
+        bound = 2.0 * self._lcs(text) / total
+        if bound < floor or (above is not None and bound <= above):
+            return None
+
+        self.matcher.set_seq2(text)
+        score = self.matcher.ratio()
+        if score < floor or (above is not None and score <= above):
+            return None
+        return score
+
+
+def _score_column_difflib(query: str, choices: Dict[int, str], cutoff: float) -> Dict[int, float]:
+    scores = {}
+    scorer = _CascadeScorer(query)
+    for key, text in choices.items():
+        score = scorer.score(text, cutoff)
+        if score is not None:
+            scores[key] = score
+    return scores
+
+
+class _PrecomputedScorer:
+    """Serves scores computed up front by a batched backend."""
+
+    def __init__(self, scores: Dict[int, float]):
+        self.scores = scores
+
+    def score_id(self, idiom_id: int, floor: float, above: Optional[float] = None) -> Optional[float]:
+        score = self.scores.get(idiom_id)
+        if score is None or score < floor or (above is not None and score <= above):
+            return None
+        return score
+
+
+def _score_column_rapidfuzz(query: str, choices: Dict[int, str], cutoff: float) -> Dict[int, float]:
+    # Small epsilon so float rounding never drops a pair sitting on the cutoff.
+    # processor=None: rapidfuzz < 3 lower-cases and strips by default,
+    # which would score other strings than difflib does
+    results = process.extract(
+        query,
+        choices,
+        scorer=fuzz.ratio,
+        processor=None,
+        score_cutoff=max(cutoff * 100 - 1e-6, 0),
+        limit=None
+    )
 
-    if not a or not b:
-        return 0.0
+    if not _compat:
+        return {key: score / 100 for _, score, key in results}
 
-    return difflib.SequenceMatcher(None, a, b).ratio()
+    survivors = {key: choices[key] for _, _, key in results}
+    return _score_column_difflib(query, survivors, cutoff)
+
+
+def _score_column(query: str, choices: Dict[int, str], cutoff: float) -> Dict[int, float]:
+    """
+    Score `query` against every choice in one batch.
+    Returns {key: score} for the choices scoring >= cutoff (0-1 scale).
+    """
+    if not query or not choices:
+        return {}
+    if _backend == "rapidfuzz":
+        return _score_column_rapidfuzz(query, choices, cutoff)
+    return _score_column_difflib(query, choices, cutoff)
+
+
+def _top_matches(
+    entries: List[Tuple[int, Optional[str], Optional[str]]],
+    query_en: str,
+    query_he: str,
+    use_en: bool,
+    use_he: bool,
+    k: int,
+    threshold_en: float,
+    threshold_he: float,
+    offset: int = 0
+) -> List[Tuple[float, int, int, str]]:
+    """
+    Core of find_top_matches over [(id, key_en, key_he), ...] in corpus
+    order. Returns [(-score, position, id, lang)] sorted, at most k
+    entries; positions start at `offset` so partial scans can be merged.
+    """
+    if _backend == "rapidfuzz":
+        # One batched call per column, then the same reduction below
+        batch = {}
+        for lang, col, use, query, threshold in (
+            ("en", 1, use_en, query_en, threshold_en),
+            ("he", 2, use_he, query_he, threshold_he),
+        ):
+            column = {}
+            if use:
+                for position, entry in enumerate(entries):
+                    if entry[col]:
+                        column[position] = entry[col]
+            batch[lang] = _PrecomputedScorer(_score_column(query, column, threshold))
+
+        def _score(lang, position, text, floor, above):
+            return batch[lang].score_id(position, floor, above)
+    else:
+        cascade = {
+            "en": _CascadeScorer(query_en) if use_en else None,
+            "he": _CascadeScorer(query_he) if use_he else None,
+        }
+
+        def _score(lang, position, text, floor, above):
+            return cascade[lang].score(text, floor, above)
+
+    top = []
+
+    for position, (idiom_id, existing_en, existing_he) in enumerate(entries):
+        # Later rows must strictly beat the k-th best to enter
+        kth = -top[-1][0] if len(top) == k else None
+        row_best = None
+
+        if use_en and existing_en:
+            score_en = _score("en", position, existing_en, threshold_en, kth)
+            if score_en is not None:
+                row_best = (score_en, "en")
+
+        if use_he and existing_he:
+            above = kth
+            if row_best is not None:
+                above = row_best[0] if kth is None else max(kth, row_best[0])
+            score_he = _score("he", position, existing_he, threshold_he, above)
+            if score_he is not None:
+                row_best = (score_he, "he")
+
+        if row_best is not None:
+            bisect.insort(top, (-row_best[0], offset + position, idiom_id, row_best[1]))
+            del top[k:]
+
+    return top
+
+
+# ---------------------------------------------------------
+#  PARALLEL SCAN
+# ---------------------------------------------------------
+#  Opt-in (set_parallel, "parallel_workers" in settings.json or a
+#  --workers flag): above PARALLEL_MIN_ROWS rows the scan is split into
+#  contiguous chunks scored by a persistent process pool. Workers receive the
+#  corpus keys once (pool initializer); later calls only send the
+#  query. Rows appended since, or edited/deleted in a reloaded corpus,
+#  are handled in-process (see _ParallelScan).
+#  Chunk results are merged on (score, corpus position), which gives
+#  exactly the serial result, ties included.
+# ---------------------------------------------------------
+
+PARALLEL_MIN_ROWS = 20000
+# Upper bound on pool processes, whatever is asked for
+PARALLEL_MAX_WORKERS = 8
+
+_parallel_workers = 1  # off until set_parallel() turns it on
+_parallel_min_rows = PARALLEL_MIN_ROWS
+_parallel = None
+
+
+def set_parallel(workers: int = 1, min_rows: int = PARALLEL_MIN_ROWS):
+    """
+    Configure the parallel scan: `workers` processes (<= 1, the default,
+    disables it; capped at the number of cores and PARALLEL_MAX_WORKERS),
+    used for corpora of at least `min_rows`. Calling it again with the
+    same values keeps the running pool.
+    """
+    global _parallel_workers, _parallel_min_rows, _parallel
+
+    workers = max(1, min(workers or 1, os.cpu_count() or 1, PARALLEL_MAX_WORKERS))
+    if (workers, min_rows) == (_parallel_workers, _parallel_min_rows):
+        return
+
+    if _parallel is not None:
+        _parallel.close()
+        _parallel = None
+
+    _parallel_workers = workers
+    _parallel_min_rows = min_rows
+
+
+def _parallel_scan() -> "_ParallelScan":
+    global _parallel
+    if _parallel is None:
+        _parallel = _ParallelScan(_parallel_workers)
+        atexit.register(_parallel.close)
+    return _parallel
+
+
+_scan_entries: List[Tuple[int, Optional[str], Optional[str]]] = []
+
+
+def _init_scan_worker(entries, backend, compat):
+    global _scan_entries, _backend, _compat
+    _scan_entries = entries
+    _backend = backend
+    _compat = compat
+
+
+def _scan_chunk(start, end, query_en, query_he, use_en, use_he, k, threshold_en, threshold_he):
+    return _top_matches(
+        _scan_entries[start:end], query_en, query_he, use_en, use_he,
+        k, threshold_en, threshold_he, offset=start
+    )
+
+
+class _ParallelScan:
+    """
+    The workers keep the keys they were started with. A reloaded corpus
+    (db.get_corpus() after an edit or delete) is described relative to
+    them instead of restarting the pool: rows edited or deleted since
+    are dropped from the worker results, edited and new rows are scored
+    in-process. The pool is only restarted (and the keys sent again)
+    once that concerns more than a tenth of the rows.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.pool = None
+        self.backend = None
+        # What the workers hold: {id: (position, key_en, key_he)}
+        self.held: Dict[int, Tuple[int, Optional[str], Optional[str]]] = {}
+        self.chunks: List[Tuple[int, int]] = []
+        # The corpus last seen, relative to the workers' rows
+        self.source = None
+        self.size = 0
+        self.stale: List[int] = []                                      # worker positions to drop
+        self.extra: List[Tuple[int, Optional[str], Optional[str]]] = []  # rows scored here
+        self.position: Optional[Dict[int, int]] = None                  # id -> position in source
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        self.held = {}
+        self.source = None
+
+    def _snapshot(self, idioms: Dict[int, Dict]):
+        self.close()
+        entries = key_entries(idioms)
+        self.pool = Pool(
+            self.workers,
+            initializer=_init_scan_worker,
+            initargs=(entries, _backend, _compat)
+        )
+        self.backend = (_backend, _compat)
+        self.held = {i: (position, en, he) for position, (i, en, he) in enumerate(entries)}
+        step = -(-len(entries) // self.workers)
+        self.chunks = [(start, min(start + step, len(entries))) for start in range(0, len(entries), step)]
+
+        # Keep a reference: identity is how later calls recognise the corpus
+        self.source = idioms
+        self.size = len(entries)
+        self.stale, self.extra, self.position = [], [], None
+
+    def _patch(self, idioms: Dict[int, Dict]) -> bool:
+        """Describe `idioms` relative to the workers' rows; False if too much changed."""
+        entries = key_entries(idioms)
+        limit = len(self.held) // 10
+        position, extra, kept = {}, [], set()
+        last = -1
+        for pos, (i, en, he) in enumerate(entries):
+            position[i] = pos
+            held = self.held.get(i)
+            if held is not None and held[1:] == (en, he) and held[0] > last:
+                kept.add(i)
+                last = held[0]
+            else:
+                extra.append((i, en, he))
+                if len(extra) > limit:
+                    return False
+
+        stale = sorted(p for i, (p, _, _) in self.held.items() if i not in kept)
+        if len(stale) > limit:
+            return False
+
+        self.source = idioms
+        self.size = len(entries)
+        self.stale, self.extra, self.position = stale, extra, position
+        return True
+
+    def top_matches(self, idioms, query_en, query_he, use_en, use_he, k, threshold_en, threshold_he):
+        # Rows appended by another thread from here on wait for the next call
+        size = len(idioms)
+        if self.pool is None or self.backend != (_backend, _compat):
+            self._snapshot(idioms)
+        elif idioms is not self.source or size < self.size:
+            if not self._patch(idioms):
+                self._snapshot(idioms)
+        elif size - self.size + len(self.extra) > len(self.held) // 10:
+            self._snapshot(idioms)
+
+        # Each chunk keeps enough rows to still have k once its stale ones are dropped
+        tasks = [
+            (start, end, query_en, query_he, use_en, use_he,
+             k + bisect.bisect_left(self.stale, end) - bisect.bisect_left(self.stale, start),
+             threshold_en, threshold_he)
+            for start, end in self.chunks
+        ]
+        async_result = self.pool.starmap_async(_scan_chunk, tasks)
+
+        # Edited rows and rows appended since, scored while the pool works
+        top = []
+        if self.extra:
+            local = [
+                (e[0], e[1] if use_en else None, e[2] if use_he else None) for e in self.extra
+            ]
+            top = [
+                (neg, self.position[i], i, lang)
+                for neg, _, i, lang in _top_matches(
+                    local, query_en, query_he, use_en, use_he, k, threshold_en, threshold_he
+                )
+            ]
+        delta = key_entries(idioms, use_en, use_he, start=self.size, end=max(size, self.size))
+        top.extend(_top_matches(
+            delta, query_en, query_he, use_en, use_he,
+            k, threshold_en, threshold_he, offset=self.size
+        ))
+
+        stale = set(self.stale)
+        for chunk_top in async_result.get():
+            for neg, pos, i, lang in chunk_top:
+                if pos in stale:
+                    continue
+                if self.position is not None:
+                    pos = self.position[i]
+                top.append((neg, pos, i, lang))
+        top.sort()
+        return top[:k]
 
 
 # ---------------------------------------------------------
 #  PUBLIC API
 # ---------------------------------------------------------
 
+@timed
+def find_top_matches(
+    idioms: Dict[int, Dict],
+    new_en: str,
+    new_he: str,
+    k: int = 3,
+    threshold_en: float = 0.60,
+    threshold_he: float = 0.60,
+    candidates: Optional[Iterable[int]] = None
+) -> List[Tuple[int, float, str]]:
+    """
+    Like find_best_match, but return up to k matches:
+        [(id, score, "en" or "he"), ...]  best first
+    Each idiom appears once, with its better language (EN wins ties).
+    Equal scores keep the order of `idioms`.
+
+    With the difflib backend, candidates whose cheap upper bound cannot
+    beat the current k-th best score are dropped before ratio() runs.
+    Large corpora can be scanned in parallel (opt-in, see set_parallel).
+
+    candidates: only score these ids of `idioms` (e.g. the keys of
+    db.get_match_candidates), so the cost no longer grows with the
+    table. The shortlist ranks rows by shared trigrams, which does not
+    bound the difflib ratio: a row above the threshold that shares few
+    trigrams with the input (reordered words, heavy rewording) can be
+    missed. Exact duplicates are always on the shortlist. Leave it out
+    for an exhaustive scan.
+    """
+    if k <= 0:
+        return []
+
+    new_en_norm = match_key(new_en)
+    new_he_norm = match_key(new_he)
+    use_en = bool(new_en_norm) and is_english(new_en_norm)
+    use_he = bool(new_he_norm) and is_hebrew(new_he_norm)
+
+    if candidates is not None:
+        idioms = {i: idioms[i] for i in sorted(candidates) if i in idioms}
+
+    if _parallel_workers > 1 and len(idioms) >= _parallel_min_rows:
+        top = _parallel_scan().top_matches(
+            idioms, new_en_norm, new_he_norm, use_en, use_he, k, threshold_en, threshold_he
+        )
+    else:
+        entries = key_entries(idioms, use_en, use_he)
+        top = _top_matches(
+            entries, new_en_norm, new_he_norm, use_en, use_he, k, threshold_en, threshold_he
+        )
+
+    return [(idiom_id, -neg_score, lang) for neg_score, _, idiom_id, lang in top]
+
+
+@timed
 def find_best_match(
     idioms: Dict[int, Dict],
     new_en: str,
     new_he: str,
     threshold_en: float = 0.60,
-    threshold_he: float = 0.60
+    threshold_he: float = 0.60,
+    candidates: Optional[Iterable[int]] = None
 ) -> Optional[Tuple[int, float, str]]:
     """
     Compare the new idiom (English + Hebrew) against all existing idioms.
@@ -43,36 +547,203 @@ def find_best_match(
     - English compared only with idiom_en
     - Hebrew compared only with idiom_he
     - Prevents cross-language false positives
+
+    Rows carrying precomputed match keys (match_en / match_he, as
+    returned by db.py) are used as-is; other rows are keyed on the fly.
+    candidates: as for find_top_matches (faster, may miss a match).
     """
 
-    best_id = None
-    best_score = 0.0
-    best_lang = None
+    top = find_top_matches(
+        idioms, new_en, new_he,
+        k=1, threshold_en=threshold_en, threshold_he=threshold_he, candidates=candidates
+    )
+    if not top:
+        return None
 
-    new_en_norm = normalize_text(new_en)
-    new_he_norm = normalize_text(new_he)
+    return top[0]
 
-    for idiom_id, row in idioms.items():
 
-        # ----- English similarity -----
-        existing_en = normalize_text(row["idiom_en"])
-        if existing_en and new_en_norm and is_english(new_en_norm):
-            score_en = _similarity(new_en_norm, existing_en)
-            if score_en >= threshold_en and score_en > best_score:
-                best_score = score_en
-                best_id = row["id"]
-                best_lang = "en"
+@timed
+def score_many(query: str, choices: Dict[int, str], threshold: float) -> Dict[int, float]:
+    """
+    Score an already-keyed query against {id: key} with the active backend.
+    Returns {id: score} for the choices scoring >= threshold.
+    """
+    return _score_column(query, choices, threshold)
 
-        # ----- Hebrew similarity -----
-        existing_he = normalize_text(row["idiom_he"])
-        if existing_he and new_he_norm and is_hebrew(new_he_norm):
-            score_he = _similarity(new_he_norm, existing_he)
-            if score_he >= threshold_he and score_he > best_score:
-                best_score = score_he
-                best_id = row["id"]
-                best_lang = "he"
 
-    if best_id is None:
-        return None
+# ---------------------------------------------------------
+#  IN-MEMORY N-GRAM INDEX
+# ---------------------------------------------------------
+
+class NGramIndex:
+    """
+    Character n-gram inverted index over {id: text}, kept in memory.
+    Same grams as the idiom_ngrams table in db.py (util.char_ngrams).
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, set] = {}
+        self.grams: Dict[int, set] = {}
+
+    def add(self, idiom_id: int, text: str):
+        self.remove(idiom_id)
+        grams = char_ngrams(text)
+        self.grams[idiom_id] = grams
+        for g in grams:
+            self.postings.setdefault(g, set()).add(idiom_id)
+
+    def remove(self, idiom_id: int):
+        for g in self.grams.pop(idiom_id, ()):
+            ids = self.postings.get(g)
+            if ids is not None:
+                ids.discard(idiom_id)
+                if not ids:
+                    del self.postings[g]
+
+    def __len__(self) -> int:
+        return len(self.grams)
+
+    def candidates(
+        self,
+        text: str,
+        limit: int,
+        max_df: Optional[int] = None,
+        min_id: Optional[int] = None,
+        probe: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Ids sharing the most grams with `text`, as [(id, shared), ...].
+        Grams found in more than `max_df` entries are skipped (they
+        block nothing); with `probe`, only the `probe` rarest grams of
+        `text` are looked up. Only ids > `min_id` are returned when given.
+        """
+        postings = []
+        for g in char_ngrams(text):
+            ids = self.postings.get(g)
+            if ids and (max_df is None or len(ids) <= max_df):
+                postings.append(ids)
+
+        if probe is not None:
+            postings = sorted(postings, key=len)[:probe]
+
+        hits = Counter()
+        for ids in postings:
+            hits.update(ids)
+
+        if min_id is not None:
+            hits = Counter({i: n for i, n in hits.items() if i > min_id})
+
+        # Ties broken by id so results do not depend on set/hash order
+        return heapq.nsmallest(limit, hits.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+# ---------------------------------------------------------
+#  AS-YOU-TYPE SUGGESTIONS
+#  An NGramIndex per language over the cached corpus (db.get_corpus()).
+#  refresh() only indexes what changed: rows appended to the corpus
+#  since the last call, or, after a full corpus reload, the rows whose
+#  match keys differ (plus removal of deleted ones). Each lookup then
+#  scores a few dozen candidates instead of the whole table.
+# ---------------------------------------------------------
+SUGGEST_CANDIDATES = 100
+# Trigrams found in more than this share of the index (and on more than
+# SUGGEST_MAX_DF idioms) are not looked up
+SUGGEST_MAX_DF_RATIO = 0.2
+SUGGEST_MAX_DF = 2000
+
+
+class SuggestionIndex:
+    """In-memory index for live suggestions; not thread-safe (use one thread)."""
+
+    def __init__(self):
+        self._corpus: Dict[int, Dict] = {}
+        self._indexed = 0
+        self._keys: Dict[str, Dict[int, str]] = {"en": {}, "he": {}}
+        self._by_key: Dict[str, Dict[str, Set[int]]] = {"en": {}, "he": {}}
+        self._index = {"en": NGramIndex(), "he": NGramIndex()}
+
+    def __len__(self) -> int:
+        return len(self._corpus)
+
+    def _set_key(self, lang: str, idiom_id: int, key: str):
+        keys = self._keys[lang]
+        usable = bool(key) and (is_english(key) if lang == "en" else is_hebrew(key))
+        old = keys.get(idiom_id)
+        if old == key or (old is None and not usable):
+            return
+
+        if old is not None:
+            del keys[idiom_id]
+            self._unmap_key(lang, old, idiom_id)
+            self._index[lang].remove(idiom_id)
+        if usable:
+            keys[idiom_id] = key
+            self._by_key[lang].setdefault(key, set()).add(idiom_id)
+            self._index[lang].add(idiom_id, key)
+
+    def _unmap_key(self, lang: str, key: str, idiom_id: int):
+        ids = self._by_key[lang][key]
+        ids.discard(idiom_id)
+        if not ids:
+            del self._by_key[lang][key]
+
+    @timed
+    def refresh(self, corpus: Dict[int, Dict]):
+        """
+        Bring the index up to date with `corpus` (a db.get_corpus() result).
+        Safe while another thread appends to it: rows from the size
+        read on entry are indexed by the next call.
+        """
+        size = len(corpus)
+        if corpus is self._corpus and size >= self._indexed:
+            start = self._indexed
+        else:
+            for lang, keys in self._keys.items():
+                for idiom_id in [i for i in keys if i not in corpus]:
+                    self._unmap_key(lang, keys.pop(idiom_id), idiom_id)
+                    self._index[lang].remove(idiom_id)
+            start = 0
+
+        for idiom_id, key_en, key_he in key_entries(corpus, start=start, end=size):
+            self._set_key("en", idiom_id, key_en)
+            self._set_key("he", idiom_id, key_he)
+
+        self._corpus = corpus
+        self._indexed = size
+
+    def candidates(self, text_en: str, text_he: str, limit: int = SUGGEST_CANDIDATES) -> Set[int]:
+        """
+        Ids of the `limit` idioms per language sharing the most trigrams
+        with the input, plus those with the same match key.
+        """
+        ids = set()
+        for lang, text in (("en", text_en), ("he", text_he)):
+            key = match_key(text) if text else ""
+            index = self._index[lang]
+            if key and len(index):
+                max_df = max(50, min(int(len(index) * SUGGEST_MAX_DF_RATIO), SUGGEST_MAX_DF))
+                ids.update(i for i, _ in index.candidates(key, limit, max_df=max_df))
+                ids.update(self._by_key[lang].get(key, ()))
+        return ids
+
+    @timed
+    def suggest(
+        self,
+        text_en: str,
+        text_he: str,
+        k: int = 3,
+        limit: int = SUGGEST_CANDIDATES
+    ) -> List[Tuple[Tuple[int, float, str], Dict]]:
+        """
+        Up to k existing idioms close to the (partial) input, best first:
+            [((id, score, lang), row), ...]
+        Same scoring as find_top_matches, over the `limit` idioms per
+        language sharing the most trigrams with the input.
+        """
+        ids = self.candidates(text_en, text_he, limit)
+        if not ids:
+            return []
 
-    return (best_id, best_score, best_lang)
+        rows = {i: self._corpus[i] for i in sorted(ids)}
+        return [(m, rows[m[0]]) for m in find_top_matches(rows, text_en, text_he, k=k)]
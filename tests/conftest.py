@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Run from the repo root: python -m pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import settings
+import similarity
+
+
+@pytest.fixture
+def idioms_db(tmp_path, monkeypatch):
+    """Fresh idioms.db in a temporary folder, also set as the DB folder in settings."""
+    monkeypatch.setattr(settings, "SETTINGS_FILE", tmp_path / "settings.json")
+    settings.set_db_dir(str(tmp_path))
+    db.set_db_path(str(tmp_path))
+    db.init_db()
+    similarity.set_parallel(workers=1)
+    yield tmp_path
+    db.close()
@@ -0,0 +1,109 @@
+import sys
+
+import pytest
+
+import db
+import idioms_delete
+import idioms_edit
+from util import parse_ids
+
+ROWS = [
+    {"created_by": "dana", "idiom_en": f"kick the bucket {n}", "idiom_he": f"הלך לעולמו {n}",
+     "translation_en": "die", "translation_he": "למות"}
+    for n in range(5)
+]
+
+
+def _run(monkeypatch, module, *argv):
+    monkeypatch.setattr(sys, "argv", [module.__name__, *argv])
+    module.main()
+    # main() closes the DB; reopen for the assertions
+    db.init_db()
+
+
+def _texts():
+    return {r["id"]: r["idiom_en"] for r in db.get_all_idioms()}
+
+
+def test_parse_ids():
+    assert parse_ids("12") == [12]
+    assert parse_ids("3,7,9") == [3, 7, 9]
+    assert parse_ids("100-103") == [100, 101, 102, 103]
+    assert parse_ids(" 3, 10-12 ,") == [3, 10, 11, 12]
+
+    for bad in ("abc", "5-2", "1-x", "1--3"):
+        with pytest.raises(ValueError):
+            parse_ids(bad)
+
+
+def test_edit_dry_run_writes_nothing(idioms_db, monkeypatch, capsys):
+    ids = db.add_idioms_bulk(ROWS)
+    before = _texts()
+
+    _run(monkeypatch, idioms_edit, "--id", f"{ids[0]}-{ids[1]}", "--translation_en", "pass away", "--dry-run")
+
+    assert _texts() == before
+    assert all(r["translation_en"] == "die" for r in db.get_all_idioms())
+    out = capsys.readouterr().out
+    assert "Dry run: 2 idioms would change" in out
+    assert "'die' -> 'pass away'" in out
+
+
+def test_edit_mixed_ids(idioms_db, monkeypatch, capsys):
+    ids = db.add_idioms_bulk(ROWS)
+    missing = ids[-1] + 100
+    # ids[2] already has this translation: unchanged
+    db.update_idioms_bulk([dict({f: ROWS[2].get(f) for f in db.EDIT_FIELDS},
+                                id=ids[2], translation_en="pass away")])
+
+    _run(monkeypatch, idioms_edit, "--id", f"{ids[0]},{ids[2]},{missing}", "--id", str(ids[3]),
+         "--translation_en", "pass away")
+
+    updated = {r["id"] for r in db.get_all_idioms() if r["translation_en"] == "pass away"}
+    assert updated == {ids[0], ids[2], ids[3]}
+    out = capsys.readouterr().out
+    assert "Updated 2 idioms." in out
+    assert "unchanged: 1" in out
+    assert f"not found: 1 ({missing})" in out
+
+
+def test_delete_dry_run_writes_nothing(idioms_db, monkeypatch, capsys):
+    ids = db.add_idioms_bulk(ROWS)
+
+    _run(monkeypatch, idioms_delete, "--id", f"{ids[0]}-{ids[2]}", "--dry-run")
+
+    assert sorted(_texts()) == ids
+    assert "Dry run: 3 idioms would be deleted" in capsys.readouterr().out
+
+
+def test_delete_mixed_ids(idioms_db, monkeypatch, capsys):
+    ids = db.add_idioms_bulk(ROWS)
+    db.add_variant_link(ids[0], ids[4])
+    missing = ids[-1] + 100
+
+    _run(monkeypatch, idioms_delete, "--id", f"{ids[0]},{missing}", "--id", f"{ids[1]}-{ids[2]}")
+
+    assert sorted(_texts()) == [ids[3], ids[4]]
+    assert db.get_variant_pairs() == []
+    out = capsys.readouterr().out
+    assert "Deleted 3 idioms." in out
+    assert f"not found: 1 ({missing})" in out
+
+
+def test_bad_id_spec_is_reported(idioms_db, monkeypatch, capsys):
+    ids = db.add_idioms_bulk(ROWS)
+
+    _run(monkeypatch, idioms_delete, "--id", "7-3")
+
+    assert sorted(_texts()) == ids
+    assert "ERROR: empty id range: '7-3'" in capsys.readouterr().out
+
+
+def test_bulk_functions_count_only_existing_rows(idioms_db):
+    ids = db.add_idioms_bulk(ROWS)
+    edit = {f: "x" for f in db.EDIT_FIELDS}
+
+    assert db.update_idioms_bulk([dict(edit, id=ids[0]), dict(edit, id=ids[-1] + 1)]) == 1
+    assert db.delete_idioms_bulk([ids[1], ids[1], ids[-1] + 1]) == 1
+    assert db.update_idioms_bulk([]) == 0
+    assert db.delete_idioms_bulk([]) == 0
@@ -0,0 +1,40 @@
+import os
+import sqlite3
+
+import db
+
+
+def _rows_in_main_file():
+    """Idioms visible in idioms.db alone, ignoring the -wal file (what Drive syncs)."""
+    conn = sqlite3.connect(f"file:{db.DB_PATH}?mode=ro&immutable=1", uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM idioms;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_commits_reach_the_main_file(idioms_db):
+    for n in range(3):
+        db.add_idiom(
+            created_by="dana", idiom_en=f"kick the bucket {n}", idiom_he="הלך לעולמו",
+            translation_en="die", translation_he="למות",
+            half_en="", half_he="", off_en="", off_he="",
+        )
+    db.add_idioms_bulk([
+        {"created_by": "dana", "idiom_en": "spill the beans", "idiom_he": "לגלות את הסוד",
+         "translation_en": "reveal a secret", "translation_he": "לחשוף סוד"}
+    ])
+
+    # Connections are still open
+    assert _rows_in_main_file() == 4
+
+
+def test_close_empties_the_wal(idioms_db):
+    db.add_idioms_bulk([
+        {"created_by": "dana", "idiom_en": "spill the beans", "idiom_he": "לגלות את הסוד",
+         "translation_en": "reveal a secret", "translation_he": "לחשוף סוד"}
+    ])
+    db.close()
+
+    wal = f"{db.DB_PATH}-wal"
+    assert not os.path.exists(wal) or os.path.getsize(wal) == 0
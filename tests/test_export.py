@@ -0,0 +1,82 @@
+import os
+import random
+
+import pytest
+
+import db
+import export_csv
+
+HE = "שלום"
+
+
+def _add(rng, n):
+    rows = [
+        {"created_by": "dana", "idiom_en": f"idiom {rng.random()}", "idiom_he": f"{HE} {i}",
+         "translation_en": "t", "translation_he": "ת",
+         "half_en": None, "half_he": None, "off_en": None, "off_he": None}
+        for i in range(n)
+    ]
+    return db.add_idioms_bulk(rows)
+
+
+def _assert_incremental_matches_full():
+    path = export_csv.export_csv(incremental=True)
+    with open(path, "rb") as f:
+        incremental = f.read()
+    export_csv.export_csv()
+    with open(path, "rb") as f:
+        assert f.read() == incremental
+
+
+@pytest.fixture
+def exported(idioms_db):
+    rng = random.Random(1)
+    ids = _add(rng, 500)
+    _assert_incremental_matches_full()
+    return rng, ids
+
+
+def test_incremental_export_matches_full_export(exported):
+    rng, ids = exported
+
+    ids += _add(rng, 50)
+    _assert_incremental_matches_full()
+
+    db.update_idiom(ids[5], idiom_en="changed", idiom_he="שונה", translation_en="x",
+                    translation_he="y", half_en="h", half_he=None, off_en=None, off_he=None)
+    ids += _add(rng, 3)
+    _assert_incremental_matches_full()
+
+    db.add_variant_link(ids[1], ids[7])
+    db.add_variant_link(ids[7], ids[100])
+    _assert_incremental_matches_full()
+
+    db.delete_idiom(ids[3])
+    _assert_incremental_matches_full()
+
+    db.add_variant_link(ids[1], ids[-1])
+    _assert_incremental_matches_full()
+
+
+def test_incremental_export_picks_cheapest_path(exported, monkeypatch):
+    rng, ids = exported
+    calls = []
+    for name in ("_export_full", "_export_patch", "_export_append"):
+        real = getattr(export_csv, name)
+        monkeypatch.setattr(export_csv, name,
+                            lambda *a, _real=real, _name=name: (calls.append(_name), _real(*a))[1])
+
+    # Nothing changed: the file is left alone
+    path = export_csv.export_csv(incremental=True)
+    stamp = os.stat(path).st_mtime_ns
+    export_csv.export_csv(incremental=True)
+    assert os.stat(path).st_mtime_ns == stamp
+    calls.clear()
+
+    _add(rng, 2)
+    export_csv.export_csv(incremental=True)
+    assert calls == ["_export_append"]
+
+    db.add_variant_link(ids[10], ids[11])
+    export_csv.export_csv(incremental=True)
+    assert calls == ["_export_append", "_export_patch"]
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import db
+import similarity
+from idioms_import import Importer
+from util import read_records
+
+EXISTING = [
+    {"created_by": "dana", "idiom_en": "break the ice", "idiom_he": "לשבור את הקרח",
+     "translation_en": "start talking", "translation_he": "להתחיל לדבר"},
+    {"created_by": "dana", "idiom_en": "spill the beans", "idiom_he": "לגלות את הסוד",
+     "translation_en": "reveal a secret", "translation_he": "לחשוף סוד"},
+]
+
+RECORDS = [
+    # Two variants of each other, declared in the file
+    {"id": 1, "idiom_en": "kick the bucket", "idiom_he": "הלך לעולמו",
+     "translation_en": "die", "translation_he": "למות", "variants": "2"},
+    {"id": 2, "idiom_en": "kicked the bucket", "idiom_he": "הלך לעולמו בשלום",
+     "translation_en": "died", "translation_he": "מת", "variants": "1"},
+    # Similar to an idiom already in the DB
+    {"id": 3, "idiom_en": "breaking the ice", "idiom_he": "שובר את הקרח",
+     "translation_en": "start talking", "translation_he": "להתחיל לדבר"},
+    # Unrelated
+    {"id": 4, "idiom_en": "once in a blue moon", "idiom_he": "פעם ביובל",
+     "translation_en": "rarely", "translation_he": "לעיתים רחוקות"},
+    {"id": 5, "idiom_en": "under the weather", "idiom_he": "לא מרגיש טוב",
+     "translation_en": "ill", "translation_he": "חולה", "variants": "4,99"},
+]
+
+
+def _import(folder, path, chunk_size, on_match="skip", full_scan=False):
+    db.set_db_path(str(folder))
+    db.init_db()
+    similarity.set_parallel(workers=1)
+    db.add_idioms_bulk(EXISTING)
+
+    importer = Importer(
+        default_user="tester", on_match=on_match, chunk_size=chunk_size,
+        review_path=folder / "review.csv", full_scan=full_scan
+    )
+    for rec in read_records(path):
+        importer.add(rec)
+    importer.finish()
+
+    rows = [(r["idiom_en"], r["idiom_he"]) for r in db.get_all_idioms()]
+    en = {r["id"]: r["idiom_en"] for r in db.get_all_idioms()}
+    links = sorted(tuple(sorted((en[a], en[b]))) for a, b in db.get_variant_pairs())
+    db.close()
+    return importer.stats, rows, links
+
+
+@pytest.mark.parametrize("full_scan", [False, True])
+@pytest.mark.parametrize("on_match", ["skip", "review", "link"])
+def test_result_does_not_depend_on_chunk_size(tmp_path, on_match, full_scan):
+    path = tmp_path / "idioms.jsonl"
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in RECORDS), encoding="utf-8")
+
+    (tmp_path / "one").mkdir()
+    (tmp_path / "all").mkdir()
+    one = _import(tmp_path / "one", path, chunk_size=1, on_match=on_match, full_scan=full_scan)
+    whole = _import(tmp_path / "all", path, chunk_size=1000, on_match=on_match, full_scan=full_scan)
+
+    assert one == whole
+
+
+def test_file_variants_are_kept_with_skip(tmp_path):
+    path = tmp_path / "idioms.jsonl"
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in RECORDS), encoding="utf-8")
+
+    stats, rows, links = _import(tmp_path, path, chunk_size=1)
+
+    assert stats["skipped"] == 1  # only the record close to "break the ice"
+    assert stats["imported"] == 4
+    assert ("kick the bucket", "kicked the bucket") in links
+    assert ("once in a blue moon", "under the weather") in links
+    assert stats["unresolved_variants"] == 1  # 99 is not in the file
+
+
+def test_exact_duplicates_are_skipped_among_many_similar(tmp_path):
+    db.set_db_path(str(tmp_path))
+    db.init_db()
+    # Every trigram of the record is too common to be looked up
+    db.add_idioms_bulk([
+        {"created_by": "dana", "idiom_en": f"break the ice {'x' * n}", "idiom_he": f"לשבור את הקרח {'ש' * n}",
+         "translation_en": "die", "translation_he": "למות"}
+        for n in range(1, 300)
+    ] + EXISTING)
+
+    importer = Importer(default_user="tester", chunk_size=10)
+    importer.add({"idiom_en": "Break the ice!", "idiom_he": "לִשְׁבּוֹר את הקרח",
+                  "translation_en": "x", "translation_he": "y"})
+    importer.finish()
+    db.close()
+
+    assert importer.stats["skipped"] == 1
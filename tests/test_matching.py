@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+
+import db
+import similarity
+from models import Corpus
+from benchmarks.corpus import CorpusGenerator
+
+
+@pytest.fixture
+def corpus_rows(idioms_db):
+    gen = CorpusGenerator(seed=3)
+    rows = list(gen.rows(3000))
+    db.add_idioms_bulk(rows)
+    return gen, rows
+
+
+def test_candidates_are_the_scored_set(corpus_rows):
+    gen, rows = corpus_rows
+    corpus = db.get_corpus()
+
+    same_best = 0
+    queries = gen.queries(rows, 120)
+    for en, he in queries:
+        candidates = db.get_match_candidates(en, he)
+        top = similarity.find_top_matches(corpus, en, he, k=3, candidates=candidates)
+
+        # Only the shortlist is scored
+        assert top == similarity.find_top_matches(candidates, en, he, k=3)
+        assert similarity.find_best_match(corpus, en, he, candidates=candidates) == (top[0] if top else None)
+
+        full = similarity.find_top_matches(corpus, en, he, k=3)
+        same_best += top[:1] == full[:1]
+
+    # Recall trade-off: the best match is almost always on the shortlist
+    assert same_best >= 0.95 * len(queries)
+
+
+def test_exact_duplicates_are_always_candidates(corpus_rows):
+    _, rows = corpus_rows
+    for row in rows[::300]:
+        # Niqqud and final letters fold into the same match key
+        he = row["idiom_he"].replace("ם", "מ") + "\u05b8"
+        candidates = db.get_match_candidates(row["idiom_en"].upper(), he, limit=1)
+        match = similarity.find_best_match(db.get_corpus(), row["idiom_en"].upper(), he, candidates=candidates)
+        assert match is not None and match[1] == 1.0
+
+
+def test_cascade_bounds_never_change_scores():
+    pairs = [
+        ("abcd", "axbxcxd"),
+        ("kick the bucket", "kicked the buckets"),
+        ("בירח שמע חתולימ", "בירח שמע חתולימ פספס"),
+        ("aaaa", "a"),
+        ("", "abc"),
+    ]
+    for a, b in pairs:
+        exact = similarity.difflib.SequenceMatcher(None, a, b).ratio() if a or b else 0.0
+        scorer = similarity._CascadeScorer(a)
+        assert scorer.score(b, 0.0) == pytest.approx(exact, abs=0)
+        assert scorer.score(b, exact) == exact
+        assert scorer.score(b, exact, above=exact) is None
+
+
+def test_suggestion_index_keeps_up_with_concurrent_appends():
+    corpus = Corpus(db.CORPUS_COLUMNS)
+    index = similarity.SuggestionIndex()
+    ids = range(1, 30001)
+
+    def _append():
+        for i in ids:
+            corpus.append((i, f"idiom number {i}", "", None, None))
+
+    writer = threading.Thread(target=_append)
+    writer.start()
+    while writer.is_alive():
+        index.refresh(corpus)
+    writer.join()
+    index.refresh(corpus)
+
+    assert sorted(index._keys["en"]) == list(ids)
+
+
+def test_parallel_scan_is_opt_in_and_bounded():
+    similarity.set_parallel(workers=1000)
+    assert 1 <= similarity._parallel_workers <= similarity.PARALLEL_MAX_WORKERS
+    similarity.set_parallel()
+    assert similarity._parallel_workers == 1
+
+
+@pytest.fixture
+def two_workers(monkeypatch):
+    """A 2-process scan even on a single-core machine."""
+    monkeypatch.setattr(similarity.os, "cpu_count", lambda: 2)
+    similarity.set_parallel(workers=2, min_rows=0)
+    yield
+    similarity.set_parallel(workers=1)
+
+
+def test_parallel_scan_gives_serial_results(corpus_rows, two_workers):
+    gen, rows = corpus_rows
+    corpus = db.get_corpus()
+    queries = gen.queries(rows, 20)
+
+    parallel = [similarity.find_top_matches(corpus, en, he, k=3) for en, he in queries]
+    assert similarity._parallel is not None
+
+    similarity.set_parallel(workers=1)
+    assert parallel == [similarity.find_top_matches(corpus, en, he, k=3) for en, he in queries]
+
+
+def test_parallel_pool_survives_edits(corpus_rows, two_workers):
+    gen, rows = corpus_rows
+    queries = gen.queries(rows, 10)
+    similarity.find_top_matches(db.get_corpus(), "warm up", "")
+    pool = similarity._parallel.pool
+
+    ids = db.get_corpus().ids
+    db.delete_idiom(ids[5])
+    row = db.get_idiom(ids[40])
+    db.update_idiom(ids[40], **dict(
+        {f: row[f] for f in db.EDIT_FIELDS}, idiom_en=queries[0][0], idiom_he=queries[0][1]
+    ))
+    db.add_idioms_bulk(list(gen.rows(5)))
+
+    corpus = db.get_corpus()
+    parallel = [similarity.find_top_matches(corpus, en, he, k=3) for en, he in queries]
+    assert similarity._parallel.pool is pool
+
+    similarity.set_parallel(workers=1)
+    assert parallel == [similarity.find_top_matches(corpus, en, he, k=3) for en, he in queries]
+    assert parallel[0][0][0] == ids[40]
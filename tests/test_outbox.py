@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+import db
+import outbox
+
+FIELDS = {
+    "created_by": "dana", "idiom_en": "kick the bucket", "idiom_he": "הלך לעולמו",
+    "translation_en": "die", "translation_he": "למות",
+    "half_en": None, "half_he": None, "off_en": None, "off_he": None,
+}
+
+
+@pytest.fixture
+def box(idioms_db):
+    box = outbox.Outbox(idioms_db / "outbox.db", flush_interval=0.1)
+    yield box
+    box.stop(flush=False)
+
+
+def test_flush_remaps_provisional_ids(box):
+    existing = db.add_idiom(**FIELDS)
+    a = box.add_idiom(**FIELDS)
+    b = box.add_idiom(**dict(FIELDS, idiom_en="kicked the bucket"))
+    assert a < 0 and b < 0
+    box.add_variant_link(existing, a)
+    box.add_variant_link(a, b)
+    assert box.pending() == 2
+    assert box.resolve(a) is None
+
+    assert box.flush() == 2
+    assert box.pending() == 0
+    shared_a, shared_b = box.resolve(a), box.resolve(b)
+    assert db.get_variant_group(existing) == sorted([existing, shared_a, shared_b])
+
+    # A later batch may link to an idiom flushed earlier under its provisional id
+    c = box.add_idiom(**dict(FIELDS, idiom_en="the bucket was kicked"))
+    box.add_variant_link(b, c)
+    assert box.flush() == 1
+    assert db.get_variant_group(existing) == sorted([existing, shared_a, shared_b, box.resolve(c)])
+
+
+def test_retry_after_unknown_outcome_does_not_duplicate(box, monkeypatch):
+    a = box.add_idiom(**FIELDS)
+    real_add_batch = db.add_batch
+
+    def lost_reply(*args, **kwargs):
+        # The shared commit lands but the reply never reaches us
+        real_add_batch(*args, **kwargs)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db, "add_batch", lost_reply)
+    with pytest.raises(sqlite3.OperationalError):
+        box.flush()
+    assert box.pending() == 1
+
+    monkeypatch.setattr(db, "add_batch", real_add_batch)
+    assert box.flush() == 1
+    assert box.pending() == 0
+    assert len(db.get_all_idioms()) == 1
+    assert box.resolve(a) == db.get_all_idioms()[0]["id"]
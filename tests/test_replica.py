@@ -0,0 +1,38 @@
+import db
+
+ROWS = [
+    {"created_by": "dana", "idiom_en": f"kick the bucket {n}", "idiom_he": "הלך לעולמו",
+     "translation_en": "die", "translation_he": "למות"}
+    for n in range(50)
+]
+
+
+def test_replica_sees_new_rows(idioms_db):
+    db.set_read_replica(str(idioms_db / "cache"), min_interval=0)
+    try:
+        db.add_idioms_bulk(ROWS[:10])
+        assert len(db.get_all_idioms()) == 10
+
+        new_id = db.add_idioms_bulk(ROWS[10:11])[0]
+        assert db.get_idiom(new_id)["idiom_en"] == "kick the bucket 10"
+        assert len(db.get_all_idioms()) == 11
+    finally:
+        db.set_read_replica(None)
+
+
+def test_replica_read_during_streaming_read(idioms_db):
+    db.set_read_replica(str(idioms_db / "cache"), min_interval=0)
+    try:
+        db.add_idioms_bulk(ROWS)
+        rows = db.iter_idioms_with_variants(batch_size=10)
+        next(rows)
+
+        # Written while the stream is still open on this thread
+        new_id = db.add_idioms_bulk(ROWS[:1])[0]
+        assert db.get_idiom(new_id) is not None
+        assert len(db.get_all_idioms()) == len(ROWS) + 1
+
+        # The stream still reads its own snapshot to the end
+        assert len(list(rows)) == len(ROWS) - 1
+    finally:
+        db.set_read_replica(None)
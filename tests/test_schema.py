@@ -0,0 +1,75 @@
+import sqlite3
+
+import db
+from util import key_ngrams, match_key
+
+
+def _grams(idiom_id):
+    conn = sqlite3.connect(db.DB_PATH)
+    rows = conn.execute(
+        "SELECT lang, gram FROM idiom_ngrams WHERE idiom_id = ?;", (idiom_id,)
+    ).fetchall()
+    conn.close()
+    return set(rows)
+
+
+def test_edit_by_older_client_reindexes_ngrams(idioms_db):
+    idiom_id = db.add_idiom(
+        created_by="dana", idiom_en="kick the bucket", idiom_he="הלך לעולמו",
+        translation_en="die", translation_he="למות",
+        half_en="", half_he="", off_en="", off_he="",
+    )
+    db.close()
+
+    # An older client only knows the text columns
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.execute("UPDATE idioms SET idiom_en = 'spill the beans' WHERE id = ?;", (idiom_id,))
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    key_en, key_he = match_key("spill the beans"), match_key("הלך לעולמו")
+    expected = {("en", g) for g in key_ngrams(key_en)} | {("he", g) for g in key_ngrams(key_he)}
+    assert _grams(idiom_id) == expected
+    assert idiom_id in db.get_match_candidates("spill the beans", "")
+    assert db.get_idiom(idiom_id)["match_en"] == key_en
+
+
+def test_edit_keeping_the_match_key_keeps_it(idioms_db):
+    fields = dict(
+        created_by="dana", idiom_en="kick the bucket", idiom_he="הלך לעולמו",
+        translation_en="die", translation_he="למות",
+        half_en="", half_he="", off_en="", off_he="",
+    )
+    first = db.add_idiom(**fields)
+    second = db.add_idiom(**fields)
+
+    # Only niqqud changes: same match keys
+    edit = {k: v for k, v in fields.items() if k != "created_by"}
+    edit.update(idiom_he="הָלַךְ לְעוֹלָמוֹ")
+    db.update_idiom(first, **edit)
+    db.update_idioms_bulk([dict(edit, id=second)])
+
+    for idiom_id in (first, second):
+        row = db.get_idiom(idiom_id)
+        assert row["match_en"] == match_key("kick the bucket")
+        assert row["match_he"] == match_key("הלך לעולמו")
+
+    conn = db._get_conn()
+    assert db._schema_current(conn.cursor())
+
+
+def test_date_filter_uses_an_index(idioms_db):
+    db.add_idioms_bulk([
+        {"created_by": "dana", "idiom_en": f"idiom {n}", "idiom_he": f"ניב {n}",
+         "translation_en": "t", "translation_he": "ת", "created_at": f"2024-01-{n:02d} 12:00:00"}
+        for n in range(1, 11)
+    ])
+    assert db.count_idioms(date_from="2024-01-03", date_to="2024-01-05") == 3
+
+    where, params = db._browse_filter(None, "2024-01-03", "2024-01-05")
+    plan = db._get_conn().execute(
+        f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM idioms WHERE {' AND '.join(where)};", params
+    ).fetchall()
+    assert any("idx_idioms_created_at" in r["detail"] for r in plan)
@@ -0,0 +1,56 @@
+import db
+
+ROWS = [
+    {"created_by": "dana", "idiom_en": "break the ice", "idiom_he": "לשבור את הקרח",
+     "translation_en": "start talking", "translation_he": "להתחיל לדבר"},
+    {"created_by": "dana", "idiom_en": "spill the beans", "idiom_he": "לִגְלוֹת אֶת הַסּוֹד",
+     "translation_en": "reveal a secret", "translation_he": "לחשוף סוד"},
+    {"created_by": "dana", "idiom_en": "kick the bucket", "idiom_he": "הלך לעולמו",
+     "translation_en": "die", "translation_he": "למות"},
+]
+
+
+def _ids(query, lang=None):
+    return [r["id"] for r in db.search(query, lang)]
+
+
+def test_search_words_and_prefixes(idioms_db):
+    ice, beans, bucket = db.add_idioms_bulk(ROWS)
+
+    assert _ids("ice") == [ice]
+    assert _ids("spi bea") == [beans]
+    assert sorted(_ids("the")) == [ice, beans, bucket]
+    assert _ids("secret", lang="he") == []
+    assert _ids("nothing here") == []
+
+
+def test_hebrew_search_ignores_niqqud(idioms_db):
+    ice, beans, _ = db.add_idioms_bulk(ROWS)
+
+    # Pointed query, unpointed text
+    assert _ids("הַקֶּרַח") == [ice]
+    # Unpointed query, pointed text; prefix letters on either side
+    assert _ids("סוד", lang="he") == [beans]
+    assert _ids("קרח") == [ice]
+    assert _ids("והסוד") == [beans]
+
+
+def test_search_follows_edits_and_deletes(idioms_db):
+    ice, beans, bucket = db.add_idioms_bulk(ROWS)
+
+    db.update_idiom(ice, idiom_en="melt the snow", idiom_he="להמיס את השלג",
+                    translation_en="start talking", translation_he="להתחיל לדבר",
+                    half_en=None, half_he=None, off_en=None, off_he=None)
+    assert _ids("ice") == []
+    assert _ids("snow") == [ice]
+    assert _ids("השלג") == [ice]
+
+    db.update_idioms_bulk([dict(ROWS[1], id=beans, idiom_en="spill the peas")])
+    assert _ids("beans") == []
+    assert _ids("peas") == [beans]
+
+    db.delete_idiom(bucket)
+    assert _ids("bucket") == []
+    db.delete_idioms_bulk([beans])
+    assert _ids("peas") == []
+    assert _ids("the") == [ice]
@@ -0,0 +1,68 @@
+import random
+
+import db
+
+USERS = ("dana", "roee", "noa")
+
+
+def _row(user, n, created_at=None):
+    return {"created_by": user, "idiom_en": f"idiom {n}", "idiom_he": f"ניב {n}",
+            "translation_en": "t", "translation_he": "ת", "created_at": created_at}
+
+
+def _assert_stats_match_idioms():
+    conn = db._get_conn()
+    users = {r["created_by"] for r in conn.execute("SELECT created_by FROM idioms;")} | set(USERS)
+    for user in users:
+        stats = db.get_user_stats(user, days=10000)
+        count = db.count_user_idioms(user)
+        assert stats["idioms"] == count, user
+
+        first, last = conn.execute(
+            "SELECT MIN(created_at), MAX(created_at) FROM idioms WHERE created_by = ?;", (user,)
+        ).fetchone()
+        if count:
+            # Deletes keep the history: the range can only be wider
+            assert stats["first_at"] <= first and stats["last_at"] >= last, user
+        daily = dict(conn.execute("""
+            SELECT date(created_at), COUNT(*) FROM idioms
+            WHERE created_by = ? GROUP BY date(created_at);
+        """, (user,)).fetchall())
+        assert dict(stats["daily"]) == daily, user
+
+    board = db.leaderboard()
+    assert [(r["created_by"], r["idioms"]) for r in board] == sorted(
+        ((u, db.count_user_idioms(u)) for u in users if db.count_user_idioms(u)),
+        key=lambda uc: (-uc[1], uc[0])
+    )
+
+
+def test_user_stats_follow_every_write(idioms_db):
+    rng = random.Random(7)
+    ids = []
+    for n in range(20):
+        user = rng.choice(USERS)
+        if n % 4:
+            row = _row(user, n)
+            del row["created_at"]
+            ids.append(db.add_idiom(**row, half_en=None, half_he=None, off_en=None, off_he=None))
+        else:
+            ids += db.add_idioms_bulk([_row(user, n, f"2024-0{1 + n % 9}-1{n % 10} 10:00:00")])
+    _assert_stats_match_idioms()
+
+    # Edits that keep the creator, then a creator change (an older client or a manual fix)
+    db.update_idiom(ids[0], idiom_en="changed", idiom_he="שונה", translation_en="t", translation_he="ת",
+                    half_en=None, half_he=None, off_en=None, off_he=None)
+    conn = db._get_conn()
+    with conn:
+        conn.execute("UPDATE idioms SET created_by = 'gil' WHERE id IN (?, ?);", (ids[1], ids[2]))
+        conn.execute("UPDATE idioms SET created_at = '2023-05-05 09:00:00' WHERE id = ?;", (ids[3],))
+    _assert_stats_match_idioms()
+
+    db.delete_idiom(ids[4])
+    db.delete_idioms_bulk(ids[5:12])
+    _assert_stats_match_idioms()
+
+    db.delete_idioms_bulk(ids)
+    _assert_stats_match_idioms()
+    assert db.leaderboard() == []
@@ -0,0 +1,80 @@
+import random
+import sqlite3
+
+import db
+from benchmarks.corpus import CorpusGenerator
+
+
+def _components(alive):
+    """Connected components of the link graph, by brute force."""
+    adj = {}
+    for a, b in db.get_variant_pairs():
+        adj.setdefault(a, set()).add(b)
+        adj.setdefault(b, set()).add(a)
+    comp = {}
+    for start in alive:
+        if start in comp:
+            continue
+        seen, stack = {start}, [start]
+        while stack:
+            for y in adj.get(stack.pop(), ()):
+                if y not in seen:
+                    seen.add(y)
+                    stack.append(y)
+        members = sorted(seen)
+        for x in seen:
+            comp[x] = members
+    return comp
+
+
+def test_groups_follow_links_and_deletes(idioms_db):
+    ids = db.add_idioms_bulk(list(CorpusGenerator(seed=1).rows(200)))
+    alive = set(ids)
+    rng = random.Random(5)
+
+    for step in range(150):
+        op = rng.random()
+        pool = sorted(alive)
+        if op < 0.6:
+            db.add_variant_link(rng.choice(pool), rng.choice(pool))
+        elif op < 0.8:
+            # Large batches take the rebuild path, small ones the merge path
+            size = rng.choice([3, 450])
+            db.add_variant_links_bulk([(rng.choice(pool), rng.choice(pool)) for _ in range(size)])
+        else:
+            victim = rng.choice(pool)
+            db.delete_idiom(victim)
+            alive.discard(victim)
+
+        comp = _components(alive)
+        for x in alive:
+            assert db.get_variant_group(x) == comp[x], step
+
+    comp = _components(alive)
+    for row in db.iter_idioms_with_variants():
+        assert row["variant_group"] == comp[row["id"]][0]
+
+
+def test_delete_splits_group(idioms_db):
+    a, b, c = db.add_idioms_bulk(list(CorpusGenerator(seed=2).rows(3)))
+    db.add_variant_link(a, b)
+    db.add_variant_link(b, c)
+    assert db.get_variant_group(a) == [a, b, c]
+
+    db.delete_idiom(b)
+    assert db.get_variant_group(a) == [a]
+    assert db.get_variant_group(c) == [c]
+
+
+def test_links_written_by_older_client_are_grouped(idioms_db):
+    a, b = db.add_idioms_bulk(list(CorpusGenerator(seed=4).rows(2)))
+
+    # An older client only knows about variants_link
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.executemany("INSERT OR IGNORE INTO variants_link VALUES (?, ?);", [(a, b), (b, a)])
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    assert db.get_variant_group(a) == [a, b]
+    assert db.get_variant_group(b) == [a, b]
@@ -1,5 +1,9 @@
+import csv
+import json
 import re
 import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
 
 
 # ---------------------------------------------------------
@@ -11,6 +15,15 @@ HEBREW_RANGE = r"\u0590-\u05FF"
 hebrew_re = re.compile(f"[{HEBREW_RANGE}]")
 english_re = re.compile(r"[A-Za-z]")
 
+# Cantillation marks and vowel points (niqqud): combining marks that
+# decorate Hebrew letters without changing the word
+HEBREW_MARKS = "".join(
+    chr(c) for c in range(0x0591, 0x05C8) if unicodedata.category(chr(c)) == "Mn"
+)
+
+# The vowel points and dots alone (no cantillation)
+HEBREW_POINTS = "".join(chr(c) for c in (*range(0x05B0, 0x05BE), 0x05BF, 0x05C1, 0x05C2, 0x05C7))
+
 
 def is_hebrew(text: str) -> bool:
     """Return True if the text contains any Hebrew characters."""
@@ -30,16 +43,185 @@ def is_english(text: str) -> bool:
 #  NORMALIZATION
 # ---------------------------------------------------------
 
+# Invisible direction/format characters pasted along with Hebrew text:
+# LRM/RLM, ALM, embeddings/overrides, isolates, zero-width space, BOM
+BIDI_MARKS = (
+    "\u200e\u200f\u061c"
+    "\u202a\u202b\u202c\u202d\u202e"
+    "\u2066\u2067\u2068\u2069"
+    "\u200b\ufeff"
+)
+
+_NORMALIZE_TABLE = str.maketrans("", "", BIDI_MARKS)
+
+
 def normalize_text(text: str) -> str:
     """Normalize input: strip, normalize unicode, remove zero-width chars."""
     if text is None:
         return ""
 
-    text = text.replace("\u200f", "").replace("\u200e", "")
-    text = unicodedata.normalize("NFC", text)
+    # Plain ASCII is already NFC and has no marks to remove
+    if text.isascii():
+        return text.strip()
+
+    text = text.translate(_NORMALIZE_TABLE)
+    if not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
     return text.strip()
 
 
+def normalize_many(texts: Iterable[str]) -> List[str]:
+    """normalize_text() over many values (bulk import / export paths)."""
+    table = _NORMALIZE_TABLE
+    is_normalized = unicodedata.is_normalized
+    normalize = unicodedata.normalize
+
+    out = []
+    append = out.append
+    for text in texts:
+        if text is None:
+            append("")
+        elif text.isascii():
+            append(text.strip())
+        else:
+            text = text.translate(table)
+            if not is_normalized("NFC", text):
+                text = normalize("NFC", text)
+            append(text.strip())
+    return out
+
+
+# ---------------------------------------------------------
+#  MATCH KEYS
+# ---------------------------------------------------------
+
+# Bump whenever match_key() changes: stored keys (and the n-gram index
+# built from them) are then recomputed
+MATCH_KEY_VERSION = 2
+
+# Punctuation with several look-alike spellings, folded to one
+PUNCTUATION_FOLD = {
+    "\u05f3": "'",    # Hebrew geresh
+    "\u2019": "'",
+    "\u2018": "'",
+    "\u00b4": "'",
+    "\u05f4": '"',    # Hebrew gershayim
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u05be": "-",    # maqaf
+    "\u2010": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u00a0": " ",
+}
+
+# Final letter forms -> regular forms
+FINAL_LETTERS = {"ך": "כ", "ם": "מ", "ן": "נ", "ף": "פ", "ץ": "צ"}
+
+
+def _match_table(strip_points: bool, fold_finals: bool) -> dict:
+    table = dict(PUNCTUATION_FOLD)
+    if strip_points:
+        table.update(dict.fromkeys(HEBREW_MARKS, None))
+    if fold_finals:
+        table.update(FINAL_LETTERS)
+    return str.maketrans(table)
+
+
+_MATCH_TABLES = {
+    (points, finals): _match_table(points, finals)
+    for points in (True, False)
+    for finals in (True, False)
+}
+
+
+def match_key(text: str, strip_points: bool = True, fold_finals: bool = True) -> str:
+    """
+    Key used for similarity matching (stored as idioms.match_en/he):
+    the normalized text with punctuation variants folded, Hebrew
+    niqqud/cantillation removed and final letters folded to their
+    regular forms (the last two can be turned off).
+    """
+    text = normalize_text(text)
+    if text.isascii():
+        return text
+    return text.translate(_MATCH_TABLES[(strip_points, fold_finals)])
+
+
+# ---------------------------------------------------------
+#  CHARACTER N-GRAMS
+# ---------------------------------------------------------
+
+NGRAM_SIZE = 3
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """
+    Return the set of character n-grams of the lower-cased match key of
+    the text (see key_ngrams).
+    """
+    return key_ngrams(match_key(text), n)
+
+
+def key_ngrams(key: str, n: int = NGRAM_SIZE) -> set:
+    """
+    char_ngrams() of a value that already is a match key.
+    The text is padded with one space on each side so short idioms and
+    word boundaries still produce grams.
+    """
+    text = key.lower()
+    if not text:
+        return set()
+
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+# ---------------------------------------------------------
+#  UNION-FIND
+# ---------------------------------------------------------
+
+class UnionFind:
+    """
+    Disjoint sets over hashable items (union by size, path halving):
+    near-constant time find/union. Items are added on first use.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, x):
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
+            self.size[x] = 1
+            return x
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return ra
+
+    def groups(self) -> dict:
+        """{root: [items]} for every set."""
+        out = {}
+        for x in self.parent:
+            out.setdefault(self.find(x), []).append(x)
+        return out
+
+
 # ---------------------------------------------------------
 #  VALIDATION HELPERS
 # ---------------------------------------------------------
@@ -62,6 +244,32 @@ def detect_language_pair(en_candidate: str, he_candidate: str) -> bool:
     return is_en_ok and is_he_ok
 
 
+# ---------------------------------------------------------
+#  RECORD FILES (streaming, one dict per record)
+# ---------------------------------------------------------
+def read_csv(path: Path) -> Iterator[Dict]:
+    """Read a CSV with a header row (export_csv.py format is accepted)."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for rec in csv.DictReader(f):
+            yield rec
+
+
+def read_jsonl(path: Path) -> Iterator[Dict]:
+    """Read one JSON object per line; blank lines are ignored."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_records(path: Path, fmt: Optional[str] = None) -> Iterator[Dict]:
+    fmt = fmt or ("jsonl" if path.suffix.lower() in (".jsonl", ".json") else "csv")
+    if fmt == "jsonl":
+        return read_jsonl(path)
+    return read_csv(path)
+
+
 # ---------------------------------------------------------
 #  MISC
 # ---------------------------------------------------------
@@ -71,3 +279,25 @@ def safe_int(s: str, default: int = -1) -> int:
         return int(s)
     except:
         return default
+
+
+def parse_ids(spec: str) -> List[int]:
+    """
+    Idiom ids from "12", "3,7,9", "100-250" or a mix ("3,10-12").
+    Raises ValueError on anything else.
+    """
+    ids = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            lo = int(first)
+            hi = int(last) if sep else lo
+        except ValueError:
+            raise ValueError(f"not an id or id range: {part!r}") from None
+        if lo > hi:
+            raise ValueError(f"empty id range: {part!r}")
+        ids.extend(range(lo, hi + 1))
+    return ids